@@ -1,8 +1,10 @@
 from flask import Flask, jsonify
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
+from pymongo import MongoClient
 from config.config import Config
 from database.mongo import mongo
+from database.indexes import apply_indexes
 
 # Load ML models FIRST before importing routes
 from ml.recommendation_engine import recommendation_engine
@@ -19,6 +21,9 @@ from routes.academic_routes import academic_bp
 from routes.metrics_routes import metrics_bp
 from routes.advising_routes import advising_bp
 
+# Give up on creating indexes quickly when MongoDB is unreachable instead
+# of stalling startup for the driver's 30 s server selection timeout
+INDEX_BOOTSTRAP_TIMEOUT_MS = 2000
 
 
 def create_app():
@@ -26,6 +31,16 @@ def create_app():
     app.config.from_object(Config)
 
     mongo.init_app(app)
+
+    # Create any missing indexes (database/indexes.py) over a separate
+    # short-timeout connection
+    client = MongoClient(app.config["MONGO_URI"], serverSelectionTimeoutMS=INDEX_BOOTSTRAP_TIMEOUT_MS)
+    try:
+        for collection, name, error in apply_indexes(client.get_database(mongo.db.name)):
+            print(f"⚠️  Index {collection}.{name} not created: {error}")
+    finally:
+        client.close()
+
     jwt = JWTManager(app)
     CORS(app)
 
@@ -0,0 +1,190 @@
+"""
+Query plan audit
+Runs explain (queryPlanner verbosity, nothing is executed) on the query
+shapes the routes send per request and fails if any winning plan does a
+COLLSCAN, or a $lookup scans the joined collection. Run it against the
+live database to check that the indexes in database/indexes.py exist and
+are picked, and re-run it after adding a route query.
+
+Not audited: lookups by _id (always served by the _id index) and
+whole-collection reads that scan by design (listings, totals, the
+catalog snapshot load, the admin metrics pages).
+
+Usage:
+    python audit_indexes.py
+    python audit_indexes.py --apply          # create missing indexes first
+    python audit_indexes.py --uri mongodb://localhost:27017/fyp2
+"""
+import argparse
+import sys
+from datetime import datetime
+
+from bson import ObjectId
+from pymongo import MongoClient
+
+from config.config import Config
+from database.indexes import apply_indexes
+from database.queries import user_id_filter
+
+USER_ID = str(ObjectId())
+COURSE_ID = ObjectId()
+COURSE_CODE = "CSCI1100"
+STAFF_ROLES = ["lecturer", "admin", "staff"]
+
+# (route, explained command); values are placeholders, only the shape matters
+QUERY_SHAPES = [
+    ("POST /auth/login", {"find": "users", "filter": {"email": "student@iium.edu.my"}, "limit": 1}),
+    ("GET /advising/lecturers", {"find": "users", "filter": {"role": {"$in": STAFF_ROLES}}}),
+
+    ("GET /enroll/my", {
+        "aggregate": "enrollments",
+        "pipeline": [
+            {"$match": {"user_id": user_id_filter(USER_ID), "status": "enrolled"}},
+            {"$lookup": {"from": "courses", "localField": "course_id", "foreignField": "_id", "as": "course"}},
+            {"$unwind": "$course"}
+        ],
+        "cursor": {}
+    }),
+    ("POST /enroll (already enrolled)", {
+        "find": "enrollments",
+        "filter": {"user_id": ObjectId(USER_ID), "course_id": COURSE_ID, "status": "enrolled"},
+        "limit": 1
+    }),
+    ("POST /enroll (enrollment)", {
+        "update": "enrollments",
+        "updates": [{
+            "q": {"user_id": ObjectId(USER_ID), "course_id": COURSE_ID, "status": "enrolled"},
+            "u": {"$setOnInsert": {"enrolled_at": datetime.utcnow()}},
+            "upsert": True
+        }]
+    }),
+    ("DELETE /enroll/<course_id>", {
+        "findAndModify": "enrollments",
+        "query": {"user_id": ObjectId(USER_ID), "course_id": COURSE_ID, "status": "enrolled"},
+        "remove": True
+    }),
+    ("course enrollments (seat recount)", {
+        "count": "enrollments", "query": {"course_id": COURSE_ID, "status": "enrolled"}
+    }),
+
+    ("GET /feedback/course/<code>", {
+        "find": "feedback", "filter": {"course_code": COURSE_CODE}, "sort": {"created_at": -1}
+    }),
+    ("GET /feedback/my", {"find": "feedback", "filter": {"user_id": USER_ID}, "sort": {"created_at": -1}}),
+    ("GET /recommend/ (feedback count)", {"count": "feedback", "query": {"user_id": USER_ID}}),
+
+    ("GET /preferences/", {
+        "find": "preferences", "filter": {"user_id": USER_ID}, "sort": {"created_at": -1}, "limit": 1
+    }),
+
+    ("GET /academic/", {"find": "academic_data", "filter": {"user_id": USER_ID}, "limit": 1}),
+    ("POST /academic/", {
+        "update": "academic_data",
+        "updates": [{"q": {"user_id": USER_ID}, "u": {"$set": {"cgpa": 3.5}}, "upsert": True}]
+    }),
+
+    ("course by code (scripts)", {"find": "courses", "filter": {"course_code": COURSE_CODE}, "limit": 1}),
+
+    ("GET /advising/my-requests", {
+        "find": "advising_requests", "filter": {"student_id": USER_ID}, "sort": {"created_at": -1}
+    }),
+    ("GET /advising/admin/requests?status=", {
+        "find": "advising_requests", "filter": {"status": "pending"}, "sort": {"created_at": -1}
+    }),
+    ("GET /advising/stats", {"count": "advising_requests", "query": {"status": "pending"}})
+]
+
+# $lookup strategies that scan the joined collection (slot-based engine)
+SCANNING_JOINS = {"NestedLoopJoin", "HashJoin"}
+
+
+def _walk(node):
+    """Every dict inside an explain document"""
+    if isinstance(node, dict):
+        yield node
+        for value in node.values():
+            yield from _walk(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from _walk(value)
+
+
+def plan_stages(explain):
+    """
+    Stages of the winning plan(s) in an explain result
+
+    Returns:
+        list of (stage, detail) with the index name of index scans and the
+        strategy of lookups
+    """
+    stages = []
+    for node in _walk(explain):
+        plan = node.get("winningPlan")
+        if not isinstance(plan, dict):
+            continue
+        for stage in _walk(plan):
+            if "stage" in stage:
+                stages.append((stage["stage"], stage.get("indexName") or stage.get("strategy") or ""))
+    return stages
+
+
+def audit(db, shapes=QUERY_SHAPES):
+    """
+    Explain every shape
+
+    Returns:
+        list of (route, collection, stages, problem); problem is None when
+        the plan uses indexes, "missing" when the collection doesn't exist
+    """
+    collections = set(db.list_collection_names())
+    results = []
+    for route, command in shapes:
+        collection = next(iter(command.values()))
+        if collection not in collections:
+            results.append((route, collection, [], "missing"))
+            continue
+
+        explain = db.command("explain", command, verbosity="queryPlanner")
+        stages = plan_stages(explain)
+        problem = None
+        if any(stage == "COLLSCAN" for stage, _ in stages):
+            problem = "COLLSCAN"
+        elif any(stage == "EQ_LOOKUP" and detail in SCANNING_JOINS for stage, detail in stages):
+            problem = "lookup scans the joined collection"
+        results.append((route, collection, stages, problem))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if a route query shape does a collection scan")
+    parser.add_argument("--uri", default=Config.MONGO_URI or "mongodb://localhost:27017/fyp2")
+    parser.add_argument("--apply", action="store_true", help="Create the indexes in database/indexes.py first")
+    args = parser.parse_args()
+
+    client = MongoClient(args.uri)
+    db = client.get_default_database("fyp2")
+    print(f"Auditing {len(QUERY_SHAPES)} query shapes on {db.name}\n")
+
+    if args.apply:
+        for collection, name, error in apply_indexes(db):
+            print(f"⚠️  Index {collection}.{name} not created: {error}")
+
+    failures = 0
+    for route, collection, stages, problem in audit(db):
+        plan = " > ".join(f"{stage} {detail}".strip() for stage, detail in stages)
+        if problem == "missing":
+            print(f"  -  {route:<36} {collection} does not exist, not checked")
+        elif problem:
+            failures += 1
+            print(f"  ❌ {route:<36} {problem}: {plan}")
+        else:
+            print(f"  ✓  {route:<36} {plan}")
+
+    if failures:
+        print(f"\n❌ {failures} query shape(s) scan a collection; add an index to database/indexes.py")
+        sys.exit(1)
+    print("\n✓ Every audited query uses an index")
+
+
+if __name__ == "__main__":
+    main()
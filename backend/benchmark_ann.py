@@ -0,0 +1,103 @@
+"""
+Benchmark the IVF (approximate nearest-neighbour) index
+Builds a synthetic catalog of clustered unit-length course embeddings
+(default 1M courses x 64 dimensions), then compares exact top-10 (one
+mat-vec + partial sort) with IVFIndex.search at increasing nprobe.
+
+recall@10 is the share of the exact top-10 that the approximate top-10
+finds; queries are perturbed course embeddings, so they have real
+near neighbours.
+
+Usage:
+    python benchmark_ann.py
+    python benchmark_ann.py --courses 200000 --nprobe 1,4,16
+"""
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from ml.ann import IVFIndex, default_num_lists
+from ml.scoring import top_k
+
+TOP_K = 10
+
+
+def synthetic_embeddings(num_rows, dimensions, num_topics, rng, chunk_rows=100000):
+    """Unit vectors scattered around num_topics random topic directions"""
+    topics = rng.standard_normal((num_topics, dimensions)).astype(np.float32)
+    embeddings = np.empty((num_rows, dimensions), dtype=np.float32)
+    for start in range(0, num_rows, chunk_rows):
+        end = min(start + chunk_rows, num_rows)
+        chunk = topics[rng.integers(0, num_topics, end - start)]
+        chunk += 0.6 * rng.standard_normal(chunk.shape).astype(np.float32)
+        chunk /= np.linalg.norm(chunk, axis=1, keepdims=True)
+        embeddings[start:end] = chunk
+    return embeddings
+
+
+def synthetic_queries(embeddings, count, rng):
+    queries = embeddings[rng.choice(len(embeddings), count, replace=False)]
+    queries = queries + 0.3 * rng.standard_normal(queries.shape).astype(np.float32)
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+
+def median_ms(fn, queries):
+    fn(queries[0])  # warm-up
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return statistics.median(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="IVF recall vs latency benchmark")
+    parser.add_argument("--courses", type=int, default=1000000)
+    parser.add_argument("--dims", type=int, default=64)
+    parser.add_argument("--topics", type=int, default=2000)
+    parser.add_argument("--lists", type=int, default=0, help="IVF clusters (0 = ~4*sqrt(courses))")
+    parser.add_argument("--nprobe", default="1,2,4,8,16,32,64,128")
+    parser.add_argument("--queries", type=int, default=100)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    embeddings = synthetic_embeddings(args.courses, args.dims, args.topics, rng)
+    queries = synthetic_queries(embeddings, args.queries, rng)
+
+    num_lists = args.lists or default_num_lists(args.courses)
+    start = time.perf_counter()
+    index = IVFIndex.build(embeddings, num_lists, rng=rng)
+    build_seconds = time.perf_counter() - start
+
+    index_mb = (index.centroids.nbytes + index.order.nbytes + index.offsets.nbytes) / 2**20
+    print(f"{args.courses} courses x {args.dims} dims, {index.num_lists} lists, "
+          f"build {build_seconds:.1f} s, index {index_mb:.1f} MB "
+          f"(+ {embeddings.nbytes / 2**20:.0f} MB embeddings)")
+    print()
+
+    exact = [set(top_k(embeddings @ q, TOP_K)[0]) for q in queries]
+
+    print(f"{'method':<20} {'median ms':>10} {'recall@10':>10} {'scanned %':>10}")
+    print("-" * 53)
+    latency = median_ms(lambda q: top_k(embeddings @ q, TOP_K), queries)
+    print(f"{'exact mat-vec':<20} {latency:>10.3f} {1.0:>10.3f} {100.0:>10.2f}")
+
+    list_sizes = np.diff(index.offsets)
+    for nprobe in [int(n) for n in args.nprobe.split(",")]:
+        latency = median_ms(lambda q: index.search(embeddings, q, TOP_K, nprobe), queries)
+        recall = statistics.mean(
+            len(expected & set(index.search(embeddings, q, TOP_K, nprobe)[0])) / TOP_K
+            for q, expected in zip(queries, exact)
+        )
+        scanned = statistics.mean(
+            100 * list_sizes[top_k(index.centroids @ q, nprobe)[0]].sum() / args.courses
+            for q in queries
+        )
+        print(f"{f'IVF nprobe={nprobe}':<20} {latency:>10.3f} {recall:>10.3f} {scanned:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark dense LSA scoring against the sparse TF-IDF path
+Builds synthetic catalogs, fits TruncatedSVD (on a row sample for large
+catalogs), and compares per-query latency of:
+- sparse: CosineScorer csc + top_k, and InvertedIndex.search
+- dense: DenseScorer (BLAS mat-vec) + top_k at several dimensions
+
+Also reports agreement@10: the share of the sparse top-10 that the LSA
+top-10 reproduces (LSA is expected to differ - it also ranks courses that
+share no literal term with the query).
+
+Usage:
+    python benchmark_lsa.py
+    python benchmark_lsa.py --sizes 1000,100000 --dims 64,128,256
+"""
+import argparse
+import statistics
+import time
+
+import numpy as np
+from sklearn.decomposition import TruncatedSVD
+
+from benchmark_scoring import synthetic_catalog, synthetic_queries
+from ml.inverted_index import InvertedIndex
+from ml.scoring import CosineScorer, DenseScorer, normalize_rows, top_k
+
+TOP_K = 10
+
+
+def fit_embeddings(matrix, dimensions, fit_sample, rng):
+    """Fit TruncatedSVD on up to fit_sample rows, then project every row"""
+    sample = matrix
+    if matrix.shape[0] > fit_sample:
+        sample = matrix[np.sort(rng.choice(matrix.shape[0], fit_sample, replace=False))]
+
+    svd = TruncatedSVD(n_components=dimensions, random_state=42)
+    svd.fit(sample)
+    projection = np.ascontiguousarray(svd.components_.T, dtype=np.float32)
+
+    scorer = DenseScorer(np.empty((0, dimensions), dtype=np.float32), projection)
+    embeddings = np.vstack([
+        scorer.embed(matrix[start:start + 100000])
+        for start in range(0, matrix.shape[0], 100000)
+    ])
+    return DenseScorer(embeddings, projection)
+
+
+def median_ms(fn, queries):
+    fn(queries[0])  # warm-up
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return statistics.median(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LSA vs sparse scoring benchmark")
+    parser.add_argument("--sizes", default="1000,100000,500000")
+    parser.add_argument("--dims", default="64,128,256")
+    parser.add_argument("--features", type=int, default=50000)
+    parser.add_argument("--terms-per-course", type=int, default=40)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--fit-sample", type=int, default=20000,
+                        help="Rows used to fit the SVD on large catalogs")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+
+    print(f"{'courses':>9} {'method':<26} {'median ms':>10} {'agree@10':>9} {'fit s':>7} {'MB':>8}")
+    print("-" * 74)
+
+    for size in [int(s) for s in args.sizes.split(",")]:
+        matrix, probabilities = synthetic_catalog(size, args.features, args.terms_per_course, rng)
+        matrix = normalize_rows(matrix)
+        queries = synthetic_queries(args.queries, args.features, probabilities, rng)
+
+        csc_scorer = CosineScorer(matrix, normalized=True)
+        index = InvertedIndex(csc_scorer.matrix)
+        sparse_mb = (csc_scorer.matrix.data.nbytes + csc_scorer.matrix.indices.nbytes) / 2**20
+
+        sparse_top = [set(top_k(csc_scorer.score(q), TOP_K)[0]) for q in queries]
+
+        latency = median_ms(lambda q: top_k(csc_scorer.score(q), TOP_K), queries)
+        print(f"{size:>9} {'sparse csc + top_k':<26} {latency:>10.3f} {'-':>9} {'-':>7} {sparse_mb:>8.1f}")
+        latency = median_ms(lambda q: index.search(q, TOP_K), queries)
+        print(f"{size:>9} {'sparse inverted index':<26} {latency:>10.3f} {'-':>9} {'-':>7} {sparse_mb:>8.1f}")
+
+        for dimensions in [int(d) for d in args.dims.split(",")]:
+            dimensions = min(dimensions, min(matrix.shape) - 1)
+
+            start = time.perf_counter()
+            dense = fit_embeddings(matrix, dimensions, args.fit_sample, rng)
+            fit_seconds = time.perf_counter() - start
+
+            latency = median_ms(lambda q: top_k(dense.score(q), TOP_K), queries)
+            agreement = statistics.mean(
+                len(expected & set(top_k(dense.score(q), TOP_K)[0])) / TOP_K
+                for q, expected in zip(queries, sparse_top)
+            )
+            dense_mb = dense.embeddings.nbytes / 2**20
+            print(f"{size:>9} {f'LSA {dimensions}-d mat-vec + top_k':<26} {latency:>10.3f} "
+                  f"{agreement:>9.2f} {fit_seconds:>7.1f} {dense_mb:>8.1f}")
+
+        print()
+
+
+if __name__ == "__main__":
+    main()
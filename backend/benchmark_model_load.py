@@ -0,0 +1,131 @@
+"""
+Benchmark model load time: joblib pickles vs memory-mapped .npy artifacts
+Each measurement runs in a fresh Python process so nothing is pre-warmed
+in the interpreter (the OS page cache is shared, as it is between workers).
+
+Usage:
+    python benchmark_model_load.py                    # uses ml/artifacts
+    python benchmark_model_load.py --synthetic 50000  # synthetic catalog
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+LOADERS = {
+    "pickle": """
+import joblib, os
+vectorizer = joblib.load(os.path.join(path, "tfidf_vectorizer.pkl"))
+matrix = joblib.load(os.path.join(path, "course_tfidf_matrix.pkl"))
+""",
+    "npy (mmap)": """
+from ml.artifacts import load_compact_artifacts
+vectorizer, matrix = load_compact_artifacts(path)
+""",
+    "npy (mmap + checksum)": """
+from ml.artifacts import load_compact_artifacts, read_manifest, validate_manifest
+vectorizer, matrix = load_compact_artifacts(path)
+validate_manifest(read_manifest(path), matrix, len(vectorizer.idf_))
+""",
+}
+
+RUNNER = """
+import json, sys, time
+path = sys.argv[1]
+import numpy, scipy.sparse, sklearn.feature_extraction.text
+
+def private_kb():
+    # Private (unshared) memory; mmapped artifact pages live in the shared page cache
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            return sum(int(line.split()[1]) for line in f if line.startswith("Private_"))
+    except OSError:
+        return 0
+
+before = private_kb()
+start = time.perf_counter()
+{body}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "private_kb": private_kb() - before}}))
+"""
+
+
+def build_synthetic_artifacts(path, num_courses, seed=42):
+    """Fit a bigram TF-IDF model on a random catalog and save both formats"""
+    import joblib
+    import numpy as np
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from ml.artifacts import build_manifest, save_compact_artifacts, write_manifest
+
+    rng = np.random.default_rng(seed)
+    words = np.array([f"term{i}" for i in range(5000)])
+    corpus = [" ".join(rng.choice(words, size=40)) for _ in range(num_courses)]
+    course_codes = [f"SYN{i:07d}" for i in range(num_courses)]
+
+    vectorizer = TfidfVectorizer(ngram_range=(1, 2), sublinear_tf=True)
+    matrix = vectorizer.fit_transform(corpus)
+
+    joblib.dump(vectorizer, os.path.join(path, "tfidf_vectorizer.pkl"))
+    joblib.dump(matrix, os.path.join(path, "course_tfidf_matrix.pkl"))
+    save_compact_artifacts(path, vectorizer, matrix)
+    write_manifest(path, build_manifest(course_codes, matrix, "synthetic"))
+
+    return matrix.shape, len(vectorizer.vocabulary_)
+
+
+def time_loader(name, path, repeats):
+    """Run a loader in fresh processes and collect timings"""
+    script = RUNNER.format(body=LOADERS[name])
+    runs = []
+    for _ in range(repeats):
+        output = subprocess.run(
+            [sys.executable, "-c", script, path],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    return runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--artifacts", default="ml/artifacts")
+    parser.add_argument("--synthetic", type=int, default=0,
+                        help="Build a synthetic catalog with this many courses")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    tmp_dir = None
+    path = args.artifacts
+
+    if args.synthetic:
+        tmp_dir = tempfile.TemporaryDirectory()
+        path = tmp_dir.name
+        print(f"Building synthetic catalog of {args.synthetic} courses...")
+        shape, vocab_size = build_synthetic_artifacts(path, args.synthetic)
+        print(f"  Matrix shape: {shape}, vocabulary: {vocab_size}")
+    else:
+        from ml.artifacts import convert_pickles, has_compact_artifacts, resolve_artifacts_path
+        path = resolve_artifacts_path(path)
+        if not has_compact_artifacts(path):
+            print("Compact artifacts missing, converting pickles first...")
+            convert_pickles(path)
+
+    print(f"\n{'Loader':<24} {'median ms':>10} {'min ms':>10} {'private +MB':>12}")
+    print("-" * 60)
+
+    for name in LOADERS:
+        runs = time_loader(name, path, args.repeats)
+        seconds = [r["seconds"] * 1000 for r in runs]
+        private = max(r["private_kb"] for r in runs) / 1024
+        print(f"{name:<24} {statistics.median(seconds):>10.2f} {min(seconds):>10.2f} {private:>12.1f}")
+
+    if tmp_dir:
+        tmp_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Benchmark text preprocessing throughput
+Compares the previous per-string implementation (re.sub with an inline
+pattern, one lemmatizer call per token) with the memoized
+preprocess_text() and the batch preprocess_many(), on:
+- the course corpus (ml/data/courses.csv, repeated to get stable timings)
+- a synthetic corpus drawn from the course vocabulary (default 1M documents)
+
+The synthetic run also times CleanedTextCache.clean() with an empty
+(cold) and a filled (warm) cache, in rebuild-sized batches.
+
+Throughput is input tokens per second. Lemmatization uses WordNet when it
+is installed locally (python -m nltk.downloader wordnet); otherwise tokens
+pass through unchanged and only the non-lemma work is measured.
+
+Usage:
+    python benchmark_preprocessing.py
+    python benchmark_preprocessing.py --docs 100000
+"""
+import argparse
+import csv
+import os
+import re
+import tempfile
+import time
+
+import numpy as np
+
+from ml import preprocessing
+from ml.model_builder import course_text
+from ml.preprocessing import get_stop_words, preprocess_many, preprocess_text
+from ml.text_cache import CleanedTextCache
+
+CACHE_BATCH = 5000
+
+
+def course_corpus(path="ml/data/courses.csv"):
+    with open(path, encoding="utf-8") as f:
+        return [
+            course_text({
+                "course_name": row["course_name"],
+                "description": row["description"],
+                "skills": row["skills"].split(",")
+            })
+            for row in csv.DictReader(f)
+        ]
+
+
+def synthetic_corpus(texts, num_docs, words_per_doc, rng):
+    """Documents of Zipf-sampled words from the course vocabulary"""
+    counts = {}
+    for text in texts:
+        for word in text.split():
+            counts[word] = counts.get(word, 0) + 1
+    words = sorted(counts, key=counts.get, reverse=True)
+    probabilities = 1.0 / np.arange(1, len(words) + 1)
+    probabilities /= probabilities.sum()
+
+    picks = rng.choice(len(words), size=(num_docs, words_per_doc), p=probabilities)
+    return [" ".join(words[i] for i in row) for row in picks]
+
+
+def make_baseline():
+    """The previous preprocess_text: inline regex, unmemoized lemmatizer"""
+    stop_words = get_stop_words()
+    _, lemmatize = preprocessing._load_lemmatizer()
+
+    def baseline(text):
+        text = text.lower()
+        text = re.sub(r"[^a-z\s]", "", text)
+        tokens = text.split()
+        tokens = [lemmatize(t) for t in tokens if t not in stop_words]
+        return " ".join(tokens)
+
+    return baseline
+
+
+def throughput(fn, texts, tokens):
+    start = time.perf_counter()
+    result = fn(texts)
+    elapsed = time.perf_counter() - start
+    return result, tokens / elapsed, elapsed
+
+
+def run_cache(texts, expected_tokens):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = CleanedTextCache(os.path.join(tmp_dir, "text_cache.sqlite"))
+
+        def clean_all(docs):
+            return [text for start in range(0, len(docs), CACHE_BATCH)
+                    for text in cache.clean(docs[start:start + CACHE_BATCH])]
+
+        for label in ("CleanedTextCache (cold)", "CleanedTextCache (warm)"):
+            _, rate, elapsed = throughput(clean_all, texts, expected_tokens)
+            print(f"  {label:<32} {rate:>12,.0f} tok/s {elapsed:>8.2f} s")
+        cache.close()
+
+
+def run(label, texts, baseline, with_cache=False):
+    tokens = sum(len(text.split()) for text in texts)
+    print(f"{label}: {len(texts)} documents, {tokens} tokens")
+
+    expected, rate, elapsed = throughput(lambda docs: [baseline(t) for t in docs], texts, tokens)
+    print(f"  {'baseline (per token lemmatize)':<32} {rate:>12,.0f} tok/s {elapsed:>8.2f} s")
+
+    preprocessing._token_memo = None  # start each method with a cold memo
+    result, rate, elapsed = throughput(lambda docs: [preprocess_text(t) for t in docs], texts, tokens)
+    assert result == expected
+    print(f"  {'preprocess_text (memoized)':<32} {rate:>12,.0f} tok/s {elapsed:>8.2f} s")
+
+    preprocessing._token_memo = None
+    result, rate, elapsed = throughput(preprocess_many, texts, tokens)
+    assert result == expected
+    print(f"  {'preprocess_many':<32} {rate:>12,.0f} tok/s {elapsed:>8.2f} s")
+    print(f"  lemma memo: {preprocessing.lemma_cache_info()}")
+
+    if with_cache:
+        run_cache(texts, tokens)
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Preprocessing throughput benchmark")
+    parser.add_argument("--docs", type=int, default=1000000, help="Synthetic corpus size")
+    parser.add_argument("--words-per-doc", type=int, default=30)
+    parser.add_argument("--course-repeats", type=int, default=200,
+                        help="Passes over the course corpus (it is only ~100 documents)")
+    args = parser.parse_args()
+
+    baseline = make_baseline()
+    lemmatizer = "identity (WordNet not installed)" if baseline("cars") == "cars" else "WordNet"
+    print(f"Lemmatizer: {lemmatizer}")
+    print()
+
+    courses = course_corpus()
+    run(f"Course corpus x{args.course_repeats}", courses * args.course_repeats, baseline)
+
+    rng = np.random.default_rng(7)
+    run("Synthetic corpus", synthetic_corpus(courses, args.docs, args.words_per_doc, rng), baseline,
+        with_cache=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Micro-benchmark for content scoring
+Compares per-call sklearn cosine_similarity with the pre-normalized
+CosineScorer kernel (CSR and CSC layouts) and the inverted index
+(candidate-only accumulation, MaxScore top-10) on synthetic catalogs.
+
+Queries are drawn from the catalog's (Zipf-like) term distribution, plus a
+"rare" set of long-tail terms where postings are short - the case the
+inverted index is built for.
+
+Reports median per-query latency and peak bytes allocated per query
+(tracemalloc sees NumPy/SciPy buffer allocations).
+
+Usage:
+    python benchmark_scoring.py
+    python benchmark_scoring.py --sizes 1000,100000 --queries 200
+"""
+import argparse
+import statistics
+import time
+import tracemalloc
+
+import numpy as np
+from scipy import sparse
+from sklearn.metrics.pairwise import cosine_similarity
+
+from ml.inverted_index import InvertedIndex
+from ml.scoring import CosineScorer, top_k
+
+
+def synthetic_catalog(num_courses, num_features, terms_per_course, rng):
+    """Random TF-IDF-like matrix with a skewed (Zipf-ish) term distribution"""
+    probabilities = 1.0 / (np.arange(num_features) + 10.0)
+    probabilities /= probabilities.sum()
+
+    cols = rng.choice(num_features, size=num_courses * terms_per_course, p=probabilities)
+    rows = np.repeat(np.arange(num_courses), terms_per_course)
+    data = rng.random(len(cols)) + 0.1
+
+    matrix = sparse.csr_matrix((data, (rows, cols)), shape=(num_courses, num_features))
+    matrix.sum_duplicates()
+    return matrix, probabilities
+
+
+def synthetic_queries(num_queries, num_features, probabilities, rng, terms=12):
+    """Queries drawn from the same term distribution as the catalog"""
+    queries = []
+    for _ in range(num_queries):
+        cols = np.unique(rng.choice(num_features, size=terms, p=probabilities))
+        data = rng.random(len(cols)) + 0.1
+        queries.append(sparse.csr_matrix(
+            (data, (np.zeros(len(cols), dtype=int), cols)), shape=(1, num_features)
+        ))
+    return queries
+
+
+def rare_term_queries(num_queries, num_features, rng, terms=6):
+    """Selective queries drawn from the long tail of the vocabulary"""
+    queries = []
+    for _ in range(num_queries):
+        cols = np.unique(rng.integers(num_features // 10, num_features, size=terms))
+        data = rng.random(len(cols)) + 0.1
+        queries.append(sparse.csr_matrix(
+            (data, (np.zeros(len(cols), dtype=int), cols)), shape=(1, num_features)
+        ))
+    return queries
+
+
+def measure(score_fn, queries):
+    """Median latency (ms) and median peak allocation (KB) per query"""
+    score_fn(queries[0])  # warm-up
+
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        score_fn(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    peaks = []
+    for query in queries[:min(len(queries), 20)]:
+        tracemalloc.start()
+        score_fn(query)
+        peaks.append(tracemalloc.get_traced_memory()[1] / 1024)
+        tracemalloc.stop()
+
+    return statistics.median(latencies), statistics.median(peaks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Content scoring micro-benchmark")
+    parser.add_argument("--sizes", default="1000,100000,1000000")
+    parser.add_argument("--features", type=int, default=50000)
+    parser.add_argument("--terms-per-course", type=int, default=40)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--baseline-queries", type=int, default=10,
+                        help="Queries for the (slow) cosine_similarity baseline")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+
+    print(f"{'courses':>9} {'method':<32} {'median ms':>10} {'peak KB':>12}")
+    print("-" * 67)
+
+    for size in [int(s) for s in args.sizes.split(",")]:
+        matrix, probabilities = synthetic_catalog(size, args.features, args.terms_per_course, rng)
+        queries = synthetic_queries(args.queries, args.features, probabilities, rng)
+        rare_queries = rare_term_queries(args.queries, args.features, rng)
+
+        start = time.perf_counter()
+        csc_scorer = CosineScorer(matrix, layout="csc")
+        prepare_ms = (time.perf_counter() - start) * 1000
+        csr_scorer = CosineScorer(matrix, layout="csr")
+        index = InvertedIndex(csc_scorer.matrix)
+
+        methods = [
+            ("cosine_similarity (per call)",
+             lambda q: cosine_similarity(q, matrix).ravel(),
+             queries[:args.baseline_queries]),
+            ("CosineScorer csr", csr_scorer.score, queries),
+            ("CosineScorer csc", csc_scorer.score, queries),
+            ("CosineScorer csc + top_k(10)", lambda q: top_k(csc_scorer.score(q), 10), queries),
+            ("InvertedIndex candidates", index.candidates, queries),
+            ("InvertedIndex search(10)", lambda q: index.search(q, 10), queries),
+            ("rare: csc + top_k(10)", lambda q: top_k(csc_scorer.score(q), 10), rare_queries),
+            ("rare: InvertedIndex candidates", index.candidates, rare_queries),
+            ("rare: InvertedIndex search(10)", lambda q: index.search(q, 10), rare_queries),
+        ]
+
+        for name, score_fn, method_queries in methods:
+            latency, peak = measure(score_fn, method_queries)
+            print(f"{size:>9} {name:<32} {latency:>10.3f} {peak:>12.1f}")
+
+        print(f"{size:>9} {'(one-time csc normalize)':<32} {prepare_ms:>10.1f}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Benchmark /courses/search matching
+Compares the catalog scan used when no model is loaded (case-insensitive
+regex over code, name, description and skills) with the ranked
+RecommendationEngine.keyword_search() (TF-IDF inverted index) on
+synthetic catalogs of increasing size.
+
+Courses are built from words drawn (Zipf-like) from the course corpus
+vocabulary; queries are one or two words from the same vocabulary,
+weighted towards the rarer half, as typed searches tend to be.
+
+Usage:
+    python benchmark_search.py
+    python benchmark_search.py --sizes 1000,100000 --queries 200
+"""
+import argparse
+import re
+import statistics
+import time
+
+import numpy as np
+from bson import ObjectId
+
+from benchmark_preprocessing import course_corpus
+from database.catalog import CatalogSnapshot
+from ml.model_builder import course_text, fit_vectorizer
+from ml.model_bundle import ModelBundle
+from ml.preprocessing import preprocess_many
+from ml.recommendation_engine import RecommendationEngine
+from ml.scoring import CosineScorer
+
+PAGE_SIZE = 20
+
+
+def synthetic_courses(words, probabilities, num_courses, rng):
+    """Course documents with Zipf-sampled names, descriptions and skills"""
+    def text(length):
+        return " ".join(words[i] for i in rng.choice(len(words), size=length, p=probabilities))
+
+    return [
+        {
+            "_id": ObjectId(),
+            "course_code": f"SYN{i:06d}",
+            "course_name": text(3),
+            "description": text(25),
+            "skills": [text(1) for _ in range(3)]
+        }
+        for i in range(num_courses)
+    ]
+
+
+def scan(snapshot, query):
+    """The route's no-model fallback: literal case-insensitive match over every course"""
+    pattern = re.compile(re.escape(query), re.IGNORECASE)
+
+    def matches(value):
+        return isinstance(value, str) and pattern.search(value) is not None
+
+    return [
+        course for course in snapshot.courses
+        if matches(course.get("course_code"))
+        or matches(course.get("course_name"))
+        or matches(course.get("description"))
+        or any(matches(skill) for skill in course.get("skills") or ())
+    ]
+
+
+def median_ms(fn, queries):
+    fn(queries[0])  # warm-up
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return statistics.median(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Course search latency benchmark")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Comma-separated catalog sizes")
+    parser.add_argument("--queries", type=int, default=100)
+    args = parser.parse_args()
+
+    counts = {}
+    for text in course_corpus():
+        for word in text.lower().split():
+            if word.isalpha():
+                counts[word] = counts.get(word, 0) + 1
+    words = sorted(counts, key=counts.get, reverse=True)
+    probabilities = 1.0 / np.arange(1, len(words) + 1)
+    probabilities /= probabilities.sum()
+
+    rng = np.random.default_rng(7)
+    rare = words[len(words) // 2:]
+    queries = [
+        " ".join(rng.choice(rare if rng.random() < 0.7 else words, size=rng.integers(1, 3)))
+        for _ in range(args.queries)
+    ]
+
+    # No query cache: every query is vectorized and scored
+    engine = RecommendationEngine(query_cache_size=0)
+
+    print(f"{len(queries)} queries, top {PAGE_SIZE}")
+    print(f"{'courses':>10} {'regex scan':>12} {'keyword_search':>16} {'speedup':>9}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        courses = synthetic_courses(words, probabilities, size, rng)
+        snapshot = CatalogSnapshot(0, courses)
+
+        vectorizer, matrix = fit_vectorizer(preprocess_many([course_text(c) for c in courses]))
+        bundle = ModelBundle(
+            "benchmark", vectorizer, matrix, CosineScorer(matrix),
+            {"course_codes": [c["course_code"] for c in courses]}, "memory"
+        )
+
+        scan_ms = median_ms(lambda q: scan(snapshot, q)[:PAGE_SIZE], queries)
+        index_ms = median_ms(lambda q: engine.keyword_search(q, PAGE_SIZE, bundle=bundle), queries)
+        print(f"{size:>10,} {scan_ms:>9.2f} ms {index_ms:>13.2f} ms {scan_ms / index_ms:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+MongoDB commands per request
+Counts the commands the app sends (via a pymongo CommandListener) while
+serving GET /enroll/my, POST /enroll and GET /recommend/ for a student
+with 1, 10 and 50 enrollments, and fails if any count grows with the
+number of enrollments (an N+1 query pattern).
+
+Runs against a throwaway database on the configured MongoDB server
+(MONGO_URI with the database name replaced), dropped at the end.
+GET /recommend/ is skipped when the models are not built.
+
+Usage:
+    python check_query_counts.py
+    python check_query_counts.py --enrollments 1 5 100 --database scrs_query_counts
+"""
+import argparse
+import os
+import sys
+from datetime import datetime
+
+from pymongo import monitoring, uri_parser
+
+from database.indexes import apply_indexes
+from database.seats import recount_enrollment_counters
+
+# Handshake / session housekeeping the driver sends on its own
+IGNORED_COMMANDS = {"hello", "ismaster", "isMaster", "ping", "endSessions", "saslStart", "saslContinue"}
+
+
+class CommandCounter(monitoring.CommandListener):
+    """Counts started commands by name"""
+
+    def __init__(self):
+        self.commands = []
+
+    def reset(self):
+        self.commands = []
+
+    def started(self, event):
+        if event.command_name not in IGNORED_COMMANDS:
+            self.commands.append(event.command_name)
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def test_database_uri(uri, database):
+    """MONGO_URI pointing at another database on the same server"""
+    parsed = uri_parser.parse_uri(uri)
+    base, _, query = uri.partition("?")
+    if parsed["database"]:
+        base = base[: base.rindex("/")]
+    base = base.rstrip("/")
+    return f"{base}/{database}" + (f"?{query}" if query else "")
+
+
+def seed(db, max_enrollments):
+    """A student, max_enrollments + 1 courses and the student's preferences"""
+    user_id = db.users.insert_one({
+        "name": "Query Count Student",
+        "email": "query-count@example.com",
+        "role": "student"
+    }).inserted_id
+    db.preferences.insert_one({"user_id": str(user_id), "kulliyyah": "KICT", "created_at": datetime.utcnow()})
+
+    course_ids = db.courses.insert_many([
+        {
+            "course_code": f"QC{i:04d}",
+            "course_name": f"Query Count Course {i}",
+            "description": "data structures and algorithms",
+            "level": 1,
+            # Zero credits keep the student under the credit hour limit
+            "credit_hours": 0,
+            "capacity": 100,
+            "is_available": True
+        }
+        for i in range(max_enrollments)
+    ]).inserted_ids
+    target_id = db.courses.insert_one({
+        "course_code": "QCTARGET",
+        "course_name": "Query Count Target",
+        "level": 1,
+        "credit_hours": 3,
+        "capacity": 100,
+        "is_available": True
+    }).inserted_id
+    return user_id, course_ids, target_id
+
+
+def enroll(db, user_id, course_ids):
+    db.enrollments.delete_many({"user_id": user_id})
+    if course_ids:
+        db.enrollments.insert_many([
+            {"user_id": user_id, "course_id": course_id, "enrolled_at": datetime.utcnow(), "status": "enrolled"}
+            for course_id in course_ids
+        ])
+    recount_enrollment_counters(db)
+
+
+def count(counter, client, setup, method, path, headers, body=None):
+    """Commands sent while serving one request (after a warm-up request)"""
+    for _ in range(2):
+        setup()
+        counter.reset()
+        response = client.open(path, method=method, headers=headers, json=body)
+    return response.status_code, len(counter.commands), counter.commands
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Count MongoDB commands per request")
+    parser.add_argument("--enrollments", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--database", default="scrs_query_counts", help="Throwaway database name")
+    args = parser.parse_args()
+
+    from config.config import Config
+    Config.MONGO_URI = test_database_uri(Config.MONGO_URI or "mongodb://localhost:27017", args.database)
+    Config.JWT_SECRET_KEY = Config.JWT_SECRET_KEY or os.urandom(32).hex()
+
+    # Register before the app's MongoClient is created
+    counter = CommandCounter()
+    monitoring.register(counter)
+
+    from flask_jwt_extended import create_access_token
+
+    from app import create_app
+    from database.catalog import catalog
+    from database.mongo import mongo
+    from ml.recommendation_engine import recommendation_engine
+
+    app = create_app()
+    client = app.test_client()
+
+    with app.app_context():
+        db = mongo.db
+        if db.name != args.database:
+            raise SystemExit(f"❌ Refusing to use database {db.name}")
+        mongo.cx.drop_database(args.database)
+        apply_indexes(db)
+
+        user_id, course_ids, target_id = seed(db, max(args.enrollments))
+        headers = {"Authorization": f"Bearer {create_access_token(identity=str(user_id))}"}
+
+    # Keep the catalog snapshot's periodic version check out of the counts
+    catalog.check_interval = float("inf")
+
+    requests = [("GET /enroll/my", "GET", "/enroll/my", None),
+                ("POST /enroll", "POST", "/enroll", {"course_id": str(target_id)})]
+    if recommendation_engine.is_loaded:
+        requests.append(("GET /recommend/", "GET", "/recommend/", None))
+    else:
+        print("Models not built; skipping GET /recommend/")
+
+    counts = {label: {} for label, *_ in requests}
+    try:
+        for num_enrollments in args.enrollments:
+            for label, method, path, body in requests:
+                def setup():
+                    with app.app_context():
+                        enroll(mongo.db, user_id, course_ids[:num_enrollments])
+
+                status, total, commands = count(counter, client, setup, method, path, headers, body)
+                counts[label][num_enrollments] = total
+                print(f"  {label:<16} {num_enrollments:>4} enrollments: HTTP {status}, "
+                      f"{total} commands ({', '.join(commands)})")
+    finally:
+        with app.app_context():
+            mongo.cx.drop_database(args.database)
+
+    failures = [
+        f"{label}: {', '.join(f'{n} enrollments -> {c}' for n, c in by_n.items())}"
+        for label, by_n in counts.items()
+        if len(set(by_n.values())) > 1
+    ]
+    for failure in failures:
+        print(f"❌ Command count grows with enrollments: {failure}")
+    if failures:
+        sys.exit(1)
+    print("✓ Command counts are independent of the number of enrollments")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Startup-time budget check
+Imports the app in a fresh interpreter with networking disabled (every
+socket connect / DNS lookup raises) and fails if the import exceeds the
+budget or leaves NLTK imported (preprocessing must stay lazy).
+
+Usage:
+    python check_startup.py
+    python check_startup.py --budget 2.5 --runs 5
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# Run in the child interpreter: block the network, then time `import app`
+CHILD = """
+import json, socket, sys, time
+
+def _blocked(*args, **kwargs):
+    raise OSError("network disabled by check_startup.py")
+
+socket.socket.connect = _blocked
+socket.socket.connect_ex = _blocked
+socket.create_connection = _blocked
+socket.getaddrinfo = _blocked
+
+start = time.perf_counter()
+import app
+elapsed = time.perf_counter() - start
+
+print(json.dumps({
+    "seconds": elapsed,
+    "models_loaded": app.recommendation_engine.is_loaded,
+    "nltk_imported": "nltk" in sys.modules
+}))
+"""
+
+
+def measure():
+    result = subprocess.run([sys.executable, "-c", CHILD], capture_output=True, text=True, timeout=120)
+    if result.returncode != 0:
+        print(result.stderr)
+        raise SystemExit("❌ import app failed")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that `import app` starts fast and offline")
+    parser.add_argument("--budget", type=float, default=3.0, help="Max median import time in seconds")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    runs = [measure() for _ in range(args.runs)]
+    median = statistics.median(run["seconds"] for run in runs)
+
+    timings = ", ".join(f"{run['seconds']:.2f}" for run in runs)
+    print(f"import app: median {median:.2f} s over {args.runs} runs ({timings}), budget {args.budget:.2f} s")
+    print(f"models loaded: {runs[-1]['models_loaded']}, nltk imported: {runs[-1]['nltk_imported']}")
+
+    failures = []
+    if median > args.budget:
+        failures.append(f"startup {median:.2f} s is over the {args.budget:.2f} s budget")
+    if any(run["nltk_imported"] for run in runs):
+        failures.append("nltk was imported at startup (preprocessing should load it lazily)")
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    if failures:
+        sys.exit(1)
+    print("✓ Startup within budget")
+
+
+if __name__ == "__main__":
+    main()
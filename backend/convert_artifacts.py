@@ -0,0 +1,21 @@
+"""
+Convert existing TF-IDF pickles to the memory-mappable .npy format
+Usage: python convert_artifacts.py [artifacts_dir]
+"""
+import sys
+from ml.artifacts import convert_pickles, resolve_artifacts_path
+
+artifacts_path = resolve_artifacts_path(sys.argv[1] if len(sys.argv) > 1 else "ml/artifacts")
+
+print(f"Converting pickles in {artifacts_path}...")
+
+try:
+    written = convert_pickles(artifacts_path)
+except Exception as e:
+    print(f"❌ Conversion failed: {e}")
+    sys.exit(1)
+
+for path in written:
+    print(f"  - {path}")
+
+print("\n✓ Compact artifacts written. Restart the backend (or POST /recommend/reload-models) to use them.")
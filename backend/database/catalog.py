@@ -0,0 +1,162 @@
+"""
+Course catalog snapshot
+An immutable in-memory copy of the courses collection, indexed by _id and
+course_code, shared by every request in the process. Writers bump a
+catalog version counter in the meta collection after changing courses;
+readers compare it at most every VERSION_CHECK_SECONDS and reload the
+snapshot only when it moved, so hot read paths make no catalog
+round-trips.
+
+Writes that skip the counter (e.g. a manual mongoimport) are picked up
+once the snapshot is MAX_SNAPSHOT_AGE_SECONDS old.
+"""
+import bisect
+import threading
+import time
+from types import MappingProxyType
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+from .mongo import mongo
+
+META_COLLECTION = "meta"
+CATALOG_VERSION_ID = "catalog_version"
+
+# How stale a worker's view of the version counter may get
+VERSION_CHECK_SECONDS = 2.0
+
+# Reload regardless of the counter after this long
+MAX_SNAPSHOT_AGE_SECONDS = 600.0
+
+
+def read_catalog_version(db):
+    """Current catalog version counter (0 before the first bump)"""
+    doc = db[META_COLLECTION].find_one({"_id": CATALOG_VERSION_ID})
+    return doc.get("value", 0) if doc else 0
+
+
+def bump_catalog_version(db):
+    """
+    Mark the catalog as changed; call after the course write
+
+    Args:
+        db: pymongo Database (mongo.db in the app, a MongoClient db in scripts)
+
+    Returns:
+        int: The new version
+    """
+    doc = db[META_COLLECTION].find_one_and_update(
+        {"_id": CATALOG_VERSION_ID},
+        {"$inc": {"value": 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    return doc["value"]
+
+
+class CatalogSnapshot:
+    """
+    Read-only view of every course document at one catalog version
+
+    Course documents are read-only mappings; build new dicts for responses.
+    """
+
+    def __init__(self, version, course_docs):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.courses = tuple(MappingProxyType(course) for course in course_docs)
+        self.by_id = {course["_id"]: course for course in self.courses}
+        self.by_code = {
+            course["course_code"]: course
+            for course in self.courses
+            if course.get("course_code")
+        }
+        self.sorted_codes = sorted(self.by_code)
+
+    def __len__(self):
+        return len(self.courses)
+
+    def get(self, course_id):
+        """Course by _id (ObjectId or its string form), None if unknown"""
+        if not isinstance(course_id, ObjectId):
+            if not ObjectId.is_valid(course_id):
+                return None
+            course_id = ObjectId(course_id)
+        return self.by_id.get(course_id)
+
+    def get_by_code(self, course_code):
+        return self.by_code.get(course_code)
+
+    def codes_with_prefix(self, prefix, limit=None):
+        """Course codes starting with prefix, in code order (binary search)"""
+        start = bisect.bisect_left(self.sorted_codes, prefix)
+        end = bisect.bisect_left(self.sorted_codes, prefix + "\uffff")
+        if limit is not None:
+            end = min(end, start + limit)
+        return self.sorted_codes[start:end]
+
+
+class CatalogCache:
+    """
+    Holds the current CatalogSnapshot and swaps in a new one when the
+    version counter changes
+
+    Reads are lock-free; one thread at a time checks the counter or reloads.
+    """
+
+    def __init__(self, check_interval=VERSION_CHECK_SECONDS, max_age=MAX_SNAPSHOT_AGE_SECONDS):
+        self.check_interval = check_interval
+        self.max_age = max_age
+        self.reloads = 0
+        self._snapshot = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def snapshot(self, db=None):
+        """
+        The current snapshot, reloading it if the catalog version moved
+
+        Args:
+            db: pymongo Database (defaults to mongo.db)
+
+        Returns:
+            CatalogSnapshot
+        """
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - self._checked_at < self.check_interval:
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            now = time.monotonic()
+            if snapshot is not None and now - self._checked_at < self.check_interval:
+                return snapshot
+
+            db = db if db is not None else mongo.db
+            version = read_catalog_version(db)
+            if snapshot is None or version != snapshot.version or now - snapshot.loaded_at > self.max_age:
+                # Read the version first: a write landing during the load
+                # bumps it again and triggers another reload
+                snapshot = CatalogSnapshot(version, db.courses.find({}))
+                self._snapshot = snapshot
+                self.reloads += 1
+            self._checked_at = now
+        return snapshot
+
+    def bump(self, db=None):
+        """Bump the version after a course write and re-check on the next read"""
+        version = bump_catalog_version(db if db is not None else mongo.db)
+        self._checked_at = 0.0
+        return version
+
+    def stats(self):
+        snapshot = self._snapshot
+        return {
+            "version": snapshot.version if snapshot is not None else None,
+            "courses": len(snapshot) if snapshot is not None else 0,
+            "reloads": self.reloads
+        }
+
+
+catalog = CatalogCache()
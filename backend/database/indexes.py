@@ -0,0 +1,92 @@
+"""
+Index specifications
+Every index the routes rely on, declared in one place and created by
+apply_indexes() when the app starts (create_app) and by the maintenance
+scripts. Creating an index that already exists with the same options is
+a no-op, so applying the list on every start is cheap.
+
+Unique indexes back the routes' find_one-then-insert duplicate checks:
+two requests can both pass the check, and the second insert then fails
+with DuplicateKeyError, which the route reports as the duplicate. The
+checks stay in place because a unique index can fail to build (existing
+duplicates) and apply_indexes() only reports that. audit_indexes.py
+checks each route's query shapes against these indexes.
+"""
+from pymongo.errors import ConnectionFailure, PyMongoError
+
+INDEXES = [
+    # Registration / login; one account per email and matric number
+    # (staff accounts have no matric number)
+    {"collection": "users", "keys": [("email", 1)], "name": "email_unique", "unique": True},
+    {
+        "collection": "users",
+        "keys": [("matric_number", 1)],
+        "name": "matric_number_unique",
+        "unique": True,
+        "partialFilterExpression": {"matric_number": {"$type": "string"}}
+    },
+    # Lecturer lists and student counts
+    {"collection": "users", "keys": [("role", 1)], "name": "role"},
+
+    {"collection": "courses", "keys": [("course_code", 1)], "name": "course_code_unique", "unique": True},
+
+    # One review per student and course; also serves a student's feedback list
+    {
+        "collection": "feedback",
+        "keys": [("user_id", 1), ("course_code", 1)],
+        "name": "user_course_unique",
+        "unique": True
+    },
+    # A course's reviews, newest first
+    {"collection": "feedback", "keys": [("course_code", 1), ("created_at", -1)], "name": "course_created"},
+
+    {"collection": "enrollments", "keys": [("user_id", 1), ("status", 1)], "name": "user_status"},
+    {"collection": "enrollments", "keys": [("course_id", 1), ("status", 1)], "name": "course_status"},
+    # One active enrollment per student and course; a raced duplicate
+    # enrollment fails and POST /enroll rolls its seat claims back
+    {
+        "collection": "enrollments",
+        "keys": [("user_id", 1), ("course_id", 1)],
+        "name": "user_course_enrolled_unique",
+        "unique": True,
+        "partialFilterExpression": {"status": "enrolled"}
+    },
+
+    # Latest preferences of a student
+    {"collection": "preferences", "keys": [("user_id", 1), ("created_at", -1)], "name": "user_created"},
+
+    {"collection": "academic_data", "keys": [("user_id", 1)], "name": "user_unique", "unique": True},
+
+    # Staff queue filtered by status and a student's own requests, newest first
+    {"collection": "advising_requests", "keys": [("status", 1), ("created_at", -1)], "name": "status_created"},
+    {"collection": "advising_requests", "keys": [("student_id", 1), ("created_at", -1)], "name": "student_created"}
+]
+
+
+def apply_indexes(db, specs=INDEXES):
+    """
+    Create every index in specs
+
+    A failing index (e.g. existing duplicates block a unique index, or an
+    index with the same keys and other options exists) is reported and
+    skipped; the rest are still created. An unreachable server stops at
+    the first index instead of timing out on each.
+
+    Args:
+        db: pymongo Database
+        specs: Index specifications (default INDEXES)
+
+    Returns:
+        list of (collection, index name, error message) for failed indexes
+    """
+    failures = []
+    for spec in specs:
+        options = {key: value for key, value in spec.items() if key not in ("collection", "keys")}
+        try:
+            db[spec["collection"]].create_index(spec["keys"], **options)
+        except ConnectionFailure as e:
+            failures.append((spec["collection"], spec["name"], str(e)))
+            break
+        except PyMongoError as e:
+            failures.append((spec["collection"], spec["name"], str(e)))
+    return failures
@@ -0,0 +1,83 @@
+"""
+Batched data-access helpers
+Each helper answers its question in one MongoDB round-trip (a $lookup
+aggregation from enrollments into courses), however many courses a
+student holds, instead of one find_one per enrollment. Single-course
+reads go through the catalog snapshot (database/catalog.py).
+check_query_counts.py verifies the per-request command counts.
+"""
+from bson import ObjectId
+
+# Course fields returned with a student's enrollments
+ENROLLED_COURSE_FIELDS = ("course_code", "course_name", "level", "credit_hours")
+
+# Credit hours assumed for courses that don't set them
+DEFAULT_CREDIT_HOURS = 3
+
+
+def user_id_filter(user_id):
+    """
+    Match a user id stored either as an ObjectId or as its string form
+
+    Enrollments are written with ObjectId user ids while other collections
+    (feedback, preferences, academic_data) use the JWT identity string.
+    """
+    if ObjectId.is_valid(user_id):
+        return {"$in": [str(user_id), ObjectId(user_id)]}
+    return user_id
+
+
+def _enrollment_lookup(user_id, status):
+    """Pipeline stages: a user's enrollments joined with their courses"""
+    match = {"user_id": user_id_filter(user_id)}
+    if status is not None:
+        match["status"] = status
+
+    return [
+        {"$match": match},
+        {
+            "$lookup": {
+                "from": "courses",
+                "localField": "course_id",
+                "foreignField": "_id",
+                "as": "course"
+            }
+        },
+        # Enrollments of deleted courses have nothing to join and drop out
+        {"$unwind": "$course"}
+    ]
+
+
+def enrolled_courses(db, user_id, status="enrolled", fields=ENROLLED_COURSE_FIELDS):
+    """
+    A user's enrollments with their course details ($lookup, one round-trip)
+
+    Args:
+        db: pymongo Database
+        user_id: User id (string or ObjectId)
+        status: Enrollment status to match (None for any)
+        fields: Course fields to return
+
+    Returns:
+        list of {"course_id", "enrolled_at", "course": {field: value}}
+    """
+    pipeline = _enrollment_lookup(user_id, status) + [
+        {
+            "$project": {
+                "_id": 0,
+                "course_id": 1,
+                "enrolled_at": 1,
+                **{f"course.{field}": 1 for field in fields}
+            }
+        }
+    ]
+    return list(db.enrollments.aggregate(pipeline))
+
+
+def enrolled_course_codes(db, user_id, status=None):
+    """Course codes a user is enrolled in ($lookup, one round-trip)"""
+    pipeline = _enrollment_lookup(user_id, status) + [
+        {"$project": {"_id": 0, "course_code": "$course.course_code"}}
+    ]
+    return {doc["course_code"] for doc in db.enrollments.aggregate(pipeline) if doc.get("course_code")}
+
@@ -0,0 +1,199 @@
+"""
+Seat and credit hour counters
+Each course document keeps an `enrolled_count` and each user document an
+`enrolled_credit_hours` total. Enrolling claims both with conditional
+find_one_and_update calls (the condition and the increment are applied
+atomically by the server), so concurrent requests cannot overbook a
+course or take a student past the credit hour limit, and no request has
+to count or scan enrollments.
+
+A unique partial index on enrollments (database/indexes.py) turns a
+raced duplicate enrollment into a DuplicateKeyError, which rolls the
+claims back.
+
+A course or user without a counter (created before the counters existed,
+or inserted by a script) is never claimed against as if it were 0: the
+first claim initializes the counter from its enrollments, then retries.
+Scripts that write enrollments for documents that already have counters
+must run recount_enrollment_counters() afterwards
+(python sync_enrollment_counters.py).
+"""
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+
+from .queries import DEFAULT_CREDIT_HOURS, user_id_filter
+
+SEAT_FIELD = "enrolled_count"
+CREDIT_FIELD = "enrolled_credit_hours"
+
+MAX_CREDIT_HOURS = 20
+
+
+def _object_id(value):
+    return value if isinstance(value, ObjectId) else ObjectId(value)
+
+
+def _initialize_seat_count(db, course_id):
+    """
+    Set a course's missing seat counter from its enrollments
+
+    Returns:
+        bool: True if the counter was missing and is now set
+    """
+    count = db.enrollments.count_documents({
+        "course_id": {"$in": [course_id, str(course_id)]},
+        "status": "enrolled"
+    })
+    result = db.courses.update_one(
+        {"_id": course_id, SEAT_FIELD: {"$exists": False}},
+        {"$set": {SEAT_FIELD: count}}
+    )
+    return result.modified_count == 1
+
+
+def claim_seat(db, course_id):
+    """
+    Take one seat in a course if one is free
+
+    Returns:
+        int or None: Seats taken after the claim, None if the course is
+        full (a course without a capacity has no seats)
+    """
+    course_id = _object_id(course_id)
+    while True:
+        course = db.courses.find_one_and_update(
+            {
+                "_id": course_id,
+                SEAT_FIELD: {"$exists": True},
+                "$expr": {"$lt": [f"${SEAT_FIELD}", {"$ifNull": ["$capacity", 0]}]}
+            },
+            {"$inc": {SEAT_FIELD: 1}},
+            projection={SEAT_FIELD: 1},
+            return_document=ReturnDocument.AFTER
+        )
+        if course:
+            return course[SEAT_FIELD]
+        if not _initialize_seat_count(db, course_id):
+            return None
+
+
+def release_seat(db, course_id):
+    db.courses.update_one(
+        {"_id": _object_id(course_id), SEAT_FIELD: {"$gt": 0}},
+        {"$inc": {SEAT_FIELD: -1}}
+    )
+
+
+def _initialize_credit_hours(db, user_id):
+    """
+    Set a user's missing credit hour total from their enrollments
+
+    Returns:
+        bool: True if the total was missing and is now set
+    """
+    enrollments = list(db.enrollments.find(
+        {"user_id": user_id_filter(user_id), "status": "enrolled"},
+        {"course_id": 1, "credit_hours": 1}
+    ))
+    unknown = [e["course_id"] for e in enrollments if e.get("credit_hours") is None]
+    course_hours = {
+        course["_id"]: course.get("credit_hours", DEFAULT_CREDIT_HOURS)
+        for course in db.courses.find({"_id": {"$in": unknown}}, {"credit_hours": 1})
+    } if unknown else {}
+
+    total = sum(
+        e["credit_hours"] if e.get("credit_hours") is not None
+        else course_hours.get(e["course_id"], DEFAULT_CREDIT_HOURS)
+        for e in enrollments
+    )
+    result = db.users.update_one(
+        {"_id": user_id, CREDIT_FIELD: {"$exists": False}},
+        {"$set": {CREDIT_FIELD: total}}
+    )
+    return result.modified_count == 1
+
+
+def claim_credit_hours(db, user_id, credit_hours, limit=MAX_CREDIT_HOURS):
+    """
+    Add a course's credit hours to a student's total if it stays within limit
+
+    Returns:
+        int or None: The new total, None if it would exceed the limit
+    """
+    user_id = _object_id(user_id)
+    while True:
+        user = db.users.find_one_and_update(
+            {
+                "_id": user_id,
+                CREDIT_FIELD: {"$exists": True},
+                "$expr": {"$lte": [{"$add": [f"${CREDIT_FIELD}", credit_hours]}, limit]}
+            },
+            {"$inc": {CREDIT_FIELD: credit_hours}},
+            projection={CREDIT_FIELD: 1},
+            return_document=ReturnDocument.AFTER
+        )
+        if user:
+            return user[CREDIT_FIELD]
+        if not _initialize_credit_hours(db, user_id):
+            return None
+
+
+def release_credit_hours(db, user_id, credit_hours):
+    # A missing total is left missing; the next claim counts it afresh
+    db.users.update_one(
+        {"_id": _object_id(user_id), CREDIT_FIELD: {"$exists": True}},
+        {"$inc": {CREDIT_FIELD: -credit_hours}}
+    )
+
+
+def credit_hours_total(db, user_id):
+    """A student's current credit hour total"""
+    user = db.users.find_one({"_id": _object_id(user_id)}, {CREDIT_FIELD: 1})
+    return user.get(CREDIT_FIELD, 0) if user else 0
+
+
+def recount_enrollment_counters(db):
+    """
+    Rebuild every seat and credit hour counter from the enrollments
+
+    Enrollments with string ids (written by older scripts) are counted
+    against the matching ObjectId. Run while enrollment is closed: requests
+    landing during the recount can be counted twice or not at all.
+
+    Returns:
+        tuple: (courses updated, users updated)
+    """
+    credit_hours = {
+        course["_id"]: course.get("credit_hours", DEFAULT_CREDIT_HOURS)
+        for course in db.courses.find({}, {"credit_hours": 1})
+    }
+
+    seats = {course_id: 0 for course_id in credit_hours}
+    totals = {}
+    enrollments = db.enrollments.find({"status": "enrolled"}, {"user_id": 1, "course_id": 1, "credit_hours": 1})
+    for enrollment in enrollments:
+        course_id = enrollment.get("course_id")
+        user_id = enrollment.get("user_id")
+        if not ObjectId.is_valid(course_id) or not ObjectId.is_valid(user_id):
+            continue
+        course_id, user_id = ObjectId(course_id), ObjectId(user_id)
+        if course_id not in seats:
+            continue
+        seats[course_id] += 1
+        hours = enrollment.get("credit_hours", credit_hours[course_id])
+        totals[user_id] = totals.get(user_id, 0) + hours
+
+    if seats:
+        db.courses.bulk_write([
+            UpdateOne({"_id": course_id}, {"$set": {SEAT_FIELD: count}})
+            for course_id, count in seats.items()
+        ], ordered=False)
+
+    user_updates = [
+        UpdateOne({"_id": user["_id"]}, {"$set": {CREDIT_FIELD: totals.get(user["_id"], 0)}})
+        for user in db.users.find({}, {"_id": 1})
+    ]
+    if user_updates:
+        db.users.bulk_write(user_updates, ordered=False)
+
+    return len(seats), len(user_updates)
@@ -7,6 +7,8 @@ from werkzeug.security import generate_password_hash
 from datetime import datetime, timedelta
 import random
 
+from database.seats import recount_enrollment_counters
+
 client = MongoClient('mongodb://localhost:27017/')
 db = client['fyp2']
 
@@ -137,6 +139,10 @@ db.enrollments.delete_many({})
 result = db.enrollments.insert_many(enrollments_data)
 print(f"✓ Created {len(result.inserted_ids)} enrollments")
 
+# Seat and credit hour counters used by POST /enroll
+recount_enrollment_counters(db)
+print("✓ Recounted seat and credit hour counters")
+
 # ============= FEEDBACK =============
 print("\n⭐ Creating Feedback...")
 feedback_data = []
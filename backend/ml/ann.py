@@ -0,0 +1,160 @@
+"""
+Approximate nearest-neighbour search over course embeddings
+An IVF (inverted file) index in pure NumPy: course embeddings are
+clustered with spherical k-means; a query is compared with the centroids
+and only the courses in the nprobe closest clusters are scored exactly.
+nprobe trades recall for latency (nprobe = number of lists scans everything).
+"""
+import numpy as np
+from scipy import sparse
+
+from .scoring import SCORING_DTYPE, top_k
+
+# Clusters probed per query unless the caller asks otherwise
+DEFAULT_NPROBE = 8
+
+# Rows scored per chunk while assigning courses to clusters
+ASSIGN_CHUNK_ROWS = 65536
+
+
+def default_num_lists(num_rows):
+    """About 4 * sqrt(N) clusters, at least 1"""
+    return max(1, min(num_rows, int(4 * np.sqrt(num_rows))))
+
+
+def _normalize(vectors):
+    lengths = np.linalg.norm(vectors, axis=1, keepdims=True)
+    lengths[lengths == 0] = 1.0
+    return vectors / lengths
+
+
+def _assign(vectors, centroids):
+    """Index of the most similar centroid for every row"""
+    labels = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), ASSIGN_CHUNK_ROWS):
+        chunk = vectors[start:start + ASSIGN_CHUNK_ROWS]
+        labels[start:start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+    return labels
+
+
+def spherical_kmeans(vectors, num_lists, iterations=10, rng=None):
+    """
+    k-means on unit vectors (cosine similarity), centroids kept unit-length
+
+    Args:
+        vectors: rows x dimensions float32 array, unit-length rows
+        num_lists: Number of clusters
+        iterations: Lloyd iterations
+        rng: numpy Generator
+
+    Returns:
+        float32 array (num_lists x dimensions)
+    """
+    rng = rng if rng is not None else np.random.default_rng(42)
+    centroids = vectors[rng.choice(len(vectors), num_lists, replace=False)].astype(SCORING_DTYPE)
+
+    for _ in range(iterations):
+        labels = _assign(vectors, centroids)
+        membership = sparse.csr_matrix(
+            (np.ones(len(vectors), dtype=SCORING_DTYPE), (labels, np.arange(len(vectors)))),
+            shape=(num_lists, len(vectors))
+        )
+        sums = np.asarray(membership @ vectors, dtype=SCORING_DTYPE)
+
+        # Re-seed empty clusters from random rows
+        empty = np.flatnonzero(np.bincount(labels, minlength=num_lists) == 0)
+        if len(empty):
+            sums[empty] = vectors[rng.choice(len(vectors), len(empty), replace=False)]
+
+        centroids = _normalize(sums).astype(SCORING_DTYPE)
+
+    return centroids
+
+
+class IVFIndex:
+    """
+    Inverted-file index: cluster centroids plus, per cluster, its rows
+
+    Rows are stored grouped by cluster (order, offsets), so a probed list
+    is a contiguous slice. The index does not copy the embeddings; they
+    are passed to search(). Rows appended after the index was built
+    (row >= num_indexed) are always scored exactly.
+    """
+
+    def __init__(self, centroids, order, offsets):
+        """
+        Args:
+            centroids: num_lists x dimensions float32 array
+            order: int32 row ids grouped by cluster
+            offsets: int64 array (num_lists + 1); cluster i owns
+                order[offsets[i]:offsets[i + 1]]
+        """
+        self.centroids = centroids
+        self.order = order
+        self.offsets = offsets
+        self.num_lists = len(centroids)
+        self.num_indexed = len(order)
+
+    @classmethod
+    def build(cls, embeddings, num_lists=None, iterations=10, train_size=None, rng=None):
+        """
+        Cluster course embeddings into an IVF index
+
+        Args:
+            embeddings: courses x dimensions array, unit-length rows
+            num_lists: Number of clusters (default: default_num_lists(N))
+            iterations: k-means iterations
+            train_size: Rows sampled to fit the centroids
+                (default: 64 per cluster, at most all rows)
+            rng: numpy Generator
+
+        Returns:
+            IVFIndex
+        """
+        rng = rng if rng is not None else np.random.default_rng(42)
+        num_rows = len(embeddings)
+        num_lists = min(num_lists or default_num_lists(num_rows), num_rows)
+        train_size = min(train_size or 64 * num_lists, num_rows)
+
+        sample = embeddings
+        if train_size < num_rows:
+            sample = embeddings[np.sort(rng.choice(num_rows, train_size, replace=False))]
+        sample = np.asarray(sample, dtype=SCORING_DTYPE)
+
+        centroids = spherical_kmeans(sample, num_lists, iterations=iterations, rng=rng)
+        labels = _assign(embeddings, centroids)
+
+        order = np.argsort(labels, kind="stable").astype(np.int32)
+        counts = np.bincount(labels, minlength=num_lists)
+        offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        return cls(centroids, order, offsets)
+
+    def search(self, embeddings, query_embedding, k, nprobe=DEFAULT_NPROBE, mask=None):
+        """
+        Approximate top-k by cosine similarity
+
+        Args:
+            embeddings: courses x dimensions array the index was built over
+                (may have extra rows appended since)
+            query_embedding: Unit-length query vector (dimensions,)
+            k: Number of results
+            nprobe: Clusters to scan; higher is slower but more accurate
+            mask: Optional boolean array over rows; False rows are skipped
+
+        Returns:
+            tuple: (rows, scores), best first
+        """
+        nprobe = max(1, min(nprobe, self.num_lists))
+        probed, _ = top_k(self.centroids @ query_embedding, nprobe)
+
+        rows = [self.order[self.offsets[i]:self.offsets[i + 1]] for i in probed]
+        if len(embeddings) > self.num_indexed:
+            rows.append(np.arange(self.num_indexed, len(embeddings), dtype=np.int32))
+        rows = np.concatenate(rows)
+
+        if mask is not None:
+            rows = rows[mask[rows]]
+
+        scores = embeddings[rows] @ query_embedding
+        selected, values = top_k(scores, k)
+        return rows[selected].astype(np.int64), values
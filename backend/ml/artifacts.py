@@ -0,0 +1,658 @@
+"""
+Model artifact helpers
+- Manifest that pins TF-IDF matrix rows to course codes
+- Pickle-free, memory-mappable .npy artifact format
+- Versioned artifact directories published through a CURRENT pointer
+"""
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from .ann import IVFIndex
+from .fields import FieldedVectorizer
+from .hashing import HashingTfidfVectorizer
+from .inverted_index import term_max_weights
+from .scoring import normalize_rows
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_FORMAT = 1
+
+# Versioned layout: <root>/versions/<name>/..., <root>/CURRENT holds <name>.
+# A root without CURRENT is read as a flat (pre-versioning) artifact set.
+CURRENT_FILE = "CURRENT"
+VERSIONS_DIR = "versions"
+KEEP_VERSIONS = 3
+
+# Compact (.npy) artifact files
+VECTORIZER_CONFIG_FILE = "vectorizer.json"
+VOCABULARY_FILE = "vocabulary.npy"
+IDF_FILE = "idf.npy"
+MATRIX_DATA_FILE = "tfidf_data.npy"
+MATRIX_INDICES_FILE = "tfidf_indices.npy"
+MATRIX_INDPTR_FILE = "tfidf_indptr.npy"
+
+# L2-normalized float32 CSC copy used by the scoring kernel
+SCORING_DATA_FILE = "scoring_data.npy"
+SCORING_INDICES_FILE = "scoring_indices.npy"
+SCORING_INDPTR_FILE = "scoring_indptr.npy"
+
+# Largest scoring weight per term (inverted-index upper bounds)
+TERM_BOUNDS_FILE = "scoring_term_bounds.npy"
+
+# Optional LSA stage (see manifest "lsa_dimensions")
+LSA_PROJECTION_FILE = "lsa_projection.npy"
+LSA_EMBEDDINGS_FILE = "lsa_embeddings.npy"
+
+# Optional IVF index over the LSA embeddings (see manifest "ann_lists")
+ANN_CENTROIDS_FILE = "ann_centroids.npy"
+ANN_ORDER_FILE = "ann_order.npy"
+ANN_OFFSETS_FILE = "ann_offsets.npy"
+
+# Precomputed top-N similar courses per row (see manifest "neighbours")
+NEIGHBOUR_ROWS_FILE = "neighbour_rows.npy"
+NEIGHBOUR_SCORES_FILE = "neighbour_scores.npy"
+
+# TfidfVectorizer parameters needed to rebuild the analyzer and weighting
+ANALYZER_PARAMS = [
+    "input", "encoding", "decode_error", "strip_accents", "lowercase",
+    "analyzer", "stop_words", "token_pattern", "ngram_range"
+]
+WEIGHTING_PARAMS = ["binary", "norm", "use_idf", "sublinear_tf"]
+
+
+class ArtifactMismatchError(Exception):
+    """Raised when model artifacts don't match their manifest"""
+
+
+# =============== VERSIONED DIRECTORIES ===============
+
+def resolve_artifacts_path(artifacts_root):
+    """
+    Directory of the published artifact set
+
+    Args:
+        artifacts_root: Artifacts root (e.g. ml/artifacts)
+
+    Returns:
+        The version directory named by CURRENT, or the root itself for a
+        flat artifact set
+    """
+    pointer = os.path.join(artifacts_root, CURRENT_FILE)
+    if not os.path.exists(pointer):
+        return artifacts_root
+    with open(pointer, encoding="utf-8") as f:
+        return os.path.join(artifacts_root, VERSIONS_DIR, f.read().strip())
+
+
+def create_version_dir(artifacts_root):
+    """
+    Create an empty staging directory for a new artifact set
+
+    Returns:
+        tuple: (name, staging_path); pass both to publish_version()
+    """
+    name = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f") + f"-{os.getpid()}"
+    staging_path = os.path.join(artifacts_root, VERSIONS_DIR, f".{name}.partial")
+    os.makedirs(staging_path)
+    return name, staging_path
+
+
+def publish_version(artifacts_root, name, staging_path, keep=KEEP_VERSIONS):
+    """
+    Make a fully written staging directory the current artifact set
+
+    The directory is renamed into place, then CURRENT is replaced
+    atomically, so readers see either the old set or the complete new
+    one. Older versions beyond `keep` are removed.
+
+    Returns:
+        Path of the published version directory
+    """
+    version_path = os.path.join(artifacts_root, VERSIONS_DIR, name)
+    os.rename(staging_path, version_path)
+
+    pointer = os.path.join(artifacts_root, CURRENT_FILE)
+    with open(pointer + ".tmp", "w", encoding="utf-8") as f:
+        f.write(name)
+    os.replace(pointer + ".tmp", pointer)
+
+    prune_versions(artifacts_root, keep)
+    return version_path
+
+
+def prune_versions(artifacts_root, keep=KEEP_VERSIONS):
+    """Delete all but the newest `keep` versions (never the current one)"""
+    versions_path = os.path.join(artifacts_root, VERSIONS_DIR)
+    current = os.path.basename(resolve_artifacts_path(artifacts_root))
+    names = sorted(
+        (name for name in os.listdir(versions_path) if not name.startswith(".")),
+        reverse=True
+    )
+    for name in names[keep:]:
+        if name != current:
+            # A process may still have the old files mapped (fails on Windows)
+            shutil.rmtree(os.path.join(versions_path, name), ignore_errors=True)
+
+
+def compute_checksum(matrix, course_codes):
+    """
+    Compute a checksum over the TF-IDF matrix and its row order
+
+    Args:
+        matrix: scipy sparse matrix (rows = courses)
+        course_codes: List of course codes, one per matrix row
+
+    Returns:
+        Hex digest string
+    """
+    csr = matrix.tocsr()
+    if not csr.has_sorted_indices:
+        # Hash a canonical layout so equal matrices always match
+        csr = csr.sorted_indices()
+    digest = hashlib.sha256()
+    digest.update(np.asarray(csr.shape, dtype=np.int64).tobytes())
+    digest.update(np.ascontiguousarray(csr.indptr, dtype=np.int64).tobytes())
+    digest.update(np.ascontiguousarray(csr.indices, dtype=np.int64).tobytes())
+    digest.update(np.ascontiguousarray(csr.data, dtype=np.float64).tobytes())
+    digest.update("\n".join(course_codes).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def compute_catalog_version(course_codes, corpus):
+    """
+    Fingerprint the catalog text the model was fitted on
+
+    Args:
+        course_codes: List of course codes
+        corpus: List of raw course texts (same order as course_codes)
+
+    Returns:
+        Short hex digest identifying the catalog contents
+    """
+    digest = hashlib.sha256()
+    for code, text in zip(course_codes, corpus):
+        digest.update(f"{code}\t{text}\n".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def build_manifest(course_codes, matrix, catalog_version):
+    """
+    Build the manifest describing a freshly fitted TF-IDF matrix
+
+    Args:
+        course_codes: List of course codes, one per matrix row
+        matrix: Course TF-IDF matrix
+        catalog_version: Catalog fingerprint (see compute_catalog_version)
+
+    Returns:
+        Manifest dictionary
+    """
+    return {
+        "format": MANIFEST_FORMAT,
+        "course_codes": list(course_codes),
+        "num_courses": matrix.shape[0],
+        "num_features": matrix.shape[1],
+        "catalog_version": catalog_version,
+        "built_at": datetime.utcnow().isoformat(),
+        "checksum": compute_checksum(matrix, course_codes)
+    }
+
+
+def write_manifest(artifacts_path, manifest):
+    """Write manifest atomically so a reader never sees a partial file"""
+    path = os.path.join(artifacts_path, MANIFEST_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_manifest(artifacts_path):
+    """Read manifest from the artifacts directory (None if missing)"""
+    path = os.path.join(artifacts_path, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def validate_manifest(manifest, matrix, num_features, verify_checksum=True):
+    """
+    Check that loaded artifacts match their manifest
+
+    Args:
+        manifest: Manifest dictionary
+        matrix: Loaded TF-IDF matrix
+        num_features: Vocabulary size of the loaded vectorizer
+        verify_checksum: Hash the full matrix (reads every page of it)
+
+    Raises:
+        ArtifactMismatchError: If the matrix is stale or misaligned
+    """
+    course_codes = manifest.get("course_codes", [])
+
+    if len(course_codes) != matrix.shape[0]:
+        raise ArtifactMismatchError(
+            f"Manifest lists {len(course_codes)} courses but matrix has {matrix.shape[0]} rows"
+        )
+
+    if len(set(course_codes)) != len(course_codes):
+        raise ArtifactMismatchError("Manifest contains duplicate course codes")
+
+    if num_features != matrix.shape[1]:
+        raise ArtifactMismatchError(
+            f"Vectorizer has {num_features} features but matrix has {matrix.shape[1]} columns"
+        )
+
+    if verify_checksum and compute_checksum(matrix, course_codes) != manifest.get("checksum"):
+        raise ArtifactMismatchError("Matrix checksum does not match manifest (stale artifact?)")
+
+
+# =============== COMPACT (.npy) FORMAT ===============
+
+class CompactVectorizer:
+    """
+    Read-only stand-in for a fitted TfidfVectorizer
+    
+    Holds only a sorted vocabulary array and the IDF weights, both of which
+    can be memory-mapped, so every worker shares one page-cache copy.
+    TfidfVectorizer numbers its features in sorted term order, so the
+    column of a term is simply its position in the sorted vocabulary.
+    """
+    
+    def __init__(self, vocabulary, idf, params):
+        self.vocabulary = vocabulary
+        self.idf_ = idf
+        self.params = params
+        self._analyzer = TfidfVectorizer(
+            **{key: params[key] for key in ANALYZER_PARAMS if key in params}
+        ).build_analyzer()
+    
+    def get_feature_names_out(self):
+        return np.char.decode(self.vocabulary, "utf-8")
+    
+    def build_analyzer(self):
+        return self._analyzer
+    
+    def lookup(self, terms):
+        """Map terms to feature columns (-1 for out-of-vocabulary terms)"""
+        if not terms:
+            return np.empty(0, dtype=np.int64)
+        
+        keys = np.array([t.encode("utf-8") for t in terms])
+        cols = np.searchsorted(self.vocabulary, keys)
+        cols[cols >= len(self.vocabulary)] = 0
+        found = self.vocabulary[cols] == keys
+        return np.where(found, cols, -1)
+    
+    def transform(self, raw_documents):
+        """
+        Vectorize documents exactly like TfidfVectorizer.transform
+        
+        Args:
+            raw_documents: Iterable of strings
+            
+        Returns:
+            scipy CSR matrix (documents x features)
+        """
+        data, indices, indptr = [], [], [0]
+        
+        for doc in raw_documents:
+            cols = self.lookup(self._analyzer(doc))
+            cols, counts = np.unique(cols[cols >= 0], return_counts=True)
+            
+            tf = counts.astype(np.float64)
+            if self.params.get("binary"):
+                tf[:] = 1.0
+            elif self.params.get("sublinear_tf"):
+                tf = np.log(tf) + 1.0
+            
+            if self.params.get("use_idf", True):
+                tf *= self.idf_[cols]
+            
+            norm = self.params.get("norm", "l2")
+            if norm == "l2":
+                length = np.sqrt(np.dot(tf, tf))
+            elif norm == "l1":
+                length = np.abs(tf).sum()
+            else:
+                length = 0.0
+            if length > 0:
+                tf /= length
+            
+            data.append(tf)
+            indices.append(cols)
+            indptr.append(indptr[-1] + len(cols))
+        
+        return sparse.csr_matrix(
+            (
+                np.concatenate(data) if data else np.empty(0),
+                np.concatenate(indices) if indices else np.empty(0, dtype=np.int64),
+                np.array(indptr)
+            ),
+            shape=(len(indptr) - 1, len(self.vocabulary))
+        )
+
+
+def _vectorizer_params(vectorizer):
+    """Extract JSON-serializable parameters from a fitted TfidfVectorizer"""
+    if isinstance(vectorizer, HashingTfidfVectorizer):
+        vectorizer = vectorizer.template
+    if vectorizer.tokenizer is not None or vectorizer.preprocessor is not None:
+        raise ValueError("Vectorizers with custom tokenizer/preprocessor can't be converted")
+    if callable(vectorizer.analyzer):
+        raise ValueError("Vectorizers with a callable analyzer can't be converted")
+    
+    params = {}
+    for key in ANALYZER_PARAMS + WEIGHTING_PARAMS:
+        value = getattr(vectorizer, key)
+        if isinstance(value, (set, frozenset)):
+            value = sorted(value)
+        elif isinstance(value, tuple):
+            value = list(value)
+        params[key] = value
+    return params
+
+
+def _save_array(path, array):
+    """Write a .npy file atomically"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+def _vocabulary_array(vectorizer):
+    """Sorted vocabulary as bytes (empty for hashed columns, which have no terms)"""
+    if isinstance(vectorizer, HashingTfidfVectorizer):
+        return np.empty(0, dtype="S1")
+    terms = vectorizer.get_feature_names_out()
+    return np.array([t.encode("utf-8") for t in terms], dtype=np.bytes_)
+
+
+def save_compact_artifacts(artifacts_path, vectorizer, matrix):
+    """
+    Save a fitted vectorizer and TF-IDF matrix as raw .npy arrays
+    
+    A FieldedVectorizer is stored as its per-field vocabularies and IDF
+    weights concatenated in column order, with the field sizes in the
+    config.
+    
+    Args:
+        artifacts_path: Directory to write into
+        vectorizer: Fitted TfidfVectorizer, HashingTfidfVectorizer or
+            FieldedVectorizer
+        matrix: Course TF-IDF matrix
+        
+    Returns:
+        List of written file paths
+    """
+    os.makedirs(artifacts_path, exist_ok=True)
+    
+    fielded = isinstance(vectorizer, FieldedVectorizer)
+    field_vectorizers = vectorizer.vectorizers if fielded else [vectorizer]
+    vocabularies = [_vocabulary_array(v) for v in field_vectorizers]
+    vocabulary = np.concatenate(vocabularies) if fielded else vocabularies[0]
+    hashing = isinstance(field_vectorizers[0], HashingTfidfVectorizer)
+    csr = sparse.csr_matrix(matrix).sorted_indices()
+    scoring = normalize_rows(csr).tocsc().sorted_indices()
+    
+    arrays = {
+        VOCABULARY_FILE: vocabulary,
+        IDF_FILE: np.asarray(vectorizer.idf_, dtype=np.float64),
+        MATRIX_DATA_FILE: csr.data,
+        MATRIX_INDICES_FILE: csr.indices,
+        MATRIX_INDPTR_FILE: csr.indptr,
+        SCORING_DATA_FILE: scoring.data,
+        SCORING_INDICES_FILE: scoring.indices,
+        SCORING_INDPTR_FILE: scoring.indptr,
+        TERM_BOUNDS_FILE: term_max_weights(scoring)
+    }
+    
+    written = []
+    for name, array in arrays.items():
+        path = os.path.join(artifacts_path, name)
+        _save_array(path, array)
+        written.append(path)
+    
+    # Config goes last: its presence marks a complete compact artifact set
+    config = {
+        "params": _vectorizer_params(field_vectorizers[0]),
+        "shape": list(csr.shape)
+    }
+    if hashing:
+        config["hashing_features"] = field_vectorizers[0].n_features
+    if fielded:
+        config["fields"] = [
+            {
+                "name": field,
+                "features": len(v.idf_),
+                "vocabulary_size": len(field_vocabulary),
+                "params": _vectorizer_params(v)
+            }
+            for field, v, field_vocabulary in zip(vectorizer.fields, field_vectorizers, vocabularies)
+        ]
+    config_path = os.path.join(artifacts_path, VECTORIZER_CONFIG_FILE)
+    with open(config_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+    os.replace(config_path + ".tmp", config_path)
+    written.append(config_path)
+    
+    return written
+
+
+def has_compact_artifacts(artifacts_path):
+    """Check whether a compact artifact set exists in the directory"""
+    return os.path.exists(os.path.join(artifacts_path, VECTORIZER_CONFIG_FILE))
+
+
+def load_compact_artifacts(artifacts_path, mmap_mode="r"):
+    """
+    Load compact artifacts, memory-mapping the arrays by default
+    
+    Args:
+        artifacts_path: Directory containing the .npy files
+        mmap_mode: Passed to np.load (None loads into private memory)
+        
+    Returns:
+        tuple: (CompactVectorizer, HashingTfidfVectorizer or
+        FieldedVectorizer, CSR matrix)
+    """
+    with open(os.path.join(artifacts_path, VECTORIZER_CONFIG_FILE), encoding="utf-8") as f:
+        config = json.load(f)
+    
+    def load(name):
+        return np.load(os.path.join(artifacts_path, name), mmap_mode=mmap_mode)
+    
+    def make(vocabulary, idf, params):
+        if config.get("hashing_features"):
+            return HashingTfidfVectorizer(TfidfVectorizer(**params), config["hashing_features"], idf)
+        return CompactVectorizer(vocabulary, idf, params)
+    
+    vocabulary, idf = load(VOCABULARY_FILE), load(IDF_FILE)
+    if config.get("fields"):
+        # Slices of the memory-mapped arrays, one per field
+        field_vectorizers = []
+        feature_start = vocabulary_start = 0
+        for field in config["fields"]:
+            field_vectorizers.append(make(
+                vocabulary[vocabulary_start:vocabulary_start + field["vocabulary_size"]],
+                idf[feature_start:feature_start + field["features"]],
+                field["params"]
+            ))
+            feature_start += field["features"]
+            vocabulary_start += field["vocabulary_size"]
+        vectorizer = FieldedVectorizer(field_vectorizers, [field["name"] for field in config["fields"]])
+    else:
+        vectorizer = make(vocabulary, idf, config["params"])
+    matrix = sparse.csr_matrix(
+        (load(MATRIX_DATA_FILE), load(MATRIX_INDICES_FILE), load(MATRIX_INDPTR_FILE)),
+        shape=tuple(config["shape"]),
+        copy=False
+    )
+    
+    return vectorizer, matrix
+
+
+def load_scoring_matrix(artifacts_path, mmap_mode="r"):
+    """
+    Load the pre-normalized CSC scoring matrix, if the artifact set has one
+    
+    Args:
+        artifacts_path: Directory containing the .npy files
+        mmap_mode: Passed to np.load
+        
+    Returns:
+        CSC matrix, or None for artifact sets written before it existed
+    """
+    paths = [
+        os.path.join(artifacts_path, name)
+        for name in (SCORING_DATA_FILE, SCORING_INDICES_FILE, SCORING_INDPTR_FILE)
+    ]
+    if not all(os.path.exists(path) for path in paths):
+        return None
+    
+    with open(os.path.join(artifacts_path, VECTORIZER_CONFIG_FILE), encoding="utf-8") as f:
+        shape = tuple(json.load(f)["shape"])
+    
+    data, indices, indptr = (np.load(path, mmap_mode=mmap_mode) for path in paths)
+    return sparse.csc_matrix((data, indices, indptr), shape=shape, copy=False)
+
+
+def load_term_bounds(artifacts_path, mmap_mode="r"):
+    """
+    Load the per-term upper bounds of the scoring matrix
+    
+    Returns:
+        float32 array, or None for artifact sets written before it existed
+    """
+    path = os.path.join(artifacts_path, TERM_BOUNDS_FILE)
+    if not os.path.exists(path):
+        return None
+    return np.load(path, mmap_mode=mmap_mode)
+
+
+def save_lsa_artifacts(artifacts_path, projection, embeddings):
+    """
+    Save the LSA projection and course embeddings, or remove stale ones
+    
+    Args:
+        artifacts_path: Directory to write into
+        projection: features x dimensions float32 array, or None to drop LSA
+        embeddings: courses x dimensions float32 array (unit-length rows)
+    """
+    paths = [os.path.join(artifacts_path, name) for name in (LSA_PROJECTION_FILE, LSA_EMBEDDINGS_FILE)]
+    
+    if projection is None:
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+        return
+    
+    _save_array(paths[0], np.ascontiguousarray(projection, dtype=np.float32))
+    _save_array(paths[1], np.ascontiguousarray(embeddings, dtype=np.float32))
+
+
+def load_lsa_artifacts(artifacts_path, mmap_mode="r"):
+    """
+    Load the LSA projection and course embeddings
+    
+    Returns:
+        tuple: (projection, embeddings), or None if the artifact set has no LSA stage
+    """
+    paths = [os.path.join(artifacts_path, name) for name in (LSA_PROJECTION_FILE, LSA_EMBEDDINGS_FILE)]
+    if not all(os.path.exists(path) for path in paths):
+        return None
+    return tuple(np.load(path, mmap_mode=mmap_mode) for path in paths)
+
+
+def save_ann_artifacts(artifacts_path, index):
+    """
+    Save an IVF index, or remove stale index files when index is None
+    
+    Args:
+        artifacts_path: Directory to write into
+        index: IVFIndex or None
+    """
+    arrays = {
+        ANN_CENTROIDS_FILE: index.centroids if index is not None else None,
+        ANN_ORDER_FILE: index.order if index is not None else None,
+        ANN_OFFSETS_FILE: index.offsets if index is not None else None
+    }
+    for name, array in arrays.items():
+        path = os.path.join(artifacts_path, name)
+        if array is not None:
+            _save_array(path, array)
+        elif os.path.exists(path):
+            os.remove(path)
+
+
+def load_ann_artifacts(artifacts_path, mmap_mode="r"):
+    """
+    Load the IVF index
+    
+    Returns:
+        IVFIndex, or None if the artifact set has no ANN index
+    """
+    paths = [
+        os.path.join(artifacts_path, name)
+        for name in (ANN_CENTROIDS_FILE, ANN_ORDER_FILE, ANN_OFFSETS_FILE)
+    ]
+    if not all(os.path.exists(path) for path in paths):
+        return None
+    return IVFIndex(*(np.load(path, mmap_mode=mmap_mode) for path in paths))
+
+
+def save_neighbour_artifacts(artifacts_path, rows, scores):
+    """
+    Save the course neighbour lists from ml.neighbours.course_neighbours()
+    
+    Args:
+        artifacts_path: Directory to write into
+        rows: courses x N int32 array of neighbour rows (-1 padded)
+        scores: courses x N float32 array of their similarities
+    """
+    _save_array(os.path.join(artifacts_path, NEIGHBOUR_ROWS_FILE), np.ascontiguousarray(rows, dtype=np.int32))
+    _save_array(os.path.join(artifacts_path, NEIGHBOUR_SCORES_FILE), np.ascontiguousarray(scores, dtype=np.float32))
+
+
+def load_neighbour_artifacts(artifacts_path, mmap_mode="r"):
+    """
+    Load the course neighbour lists
+    
+    Returns:
+        tuple: (rows, scores), or None if the artifact set predates them
+    """
+    paths = [os.path.join(artifacts_path, name) for name in (NEIGHBOUR_ROWS_FILE, NEIGHBOUR_SCORES_FILE)]
+    if not all(os.path.exists(path) for path in paths):
+        return None
+    return tuple(np.load(path, mmap_mode=mmap_mode) for path in paths)
+
+
+def convert_pickles(artifacts_path):
+    """
+    Convert tfidf_vectorizer.pkl / course_tfidf_matrix.pkl to the compact format
+    
+    Args:
+        artifacts_path: Directory containing the pickles (and manifest)
+        
+    Returns:
+        List of written file paths
+    """
+    import joblib
+    
+    vectorizer = joblib.load(os.path.join(artifacts_path, "tfidf_vectorizer.pkl"))
+    matrix = joblib.load(os.path.join(artifacts_path, "course_tfidf_matrix.pkl"))
+    
+    manifest = read_manifest(artifacts_path)
+    if manifest is not None:
+        validate_manifest(manifest, matrix, len(vectorizer.idf_))
+    
+    return save_compact_artifacts(artifacts_path, vectorizer, matrix)
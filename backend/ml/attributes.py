@@ -0,0 +1,182 @@
+"""
+Per-course attribute arrays aligned to the model row index
+Lets candidate masking (taken / unavailable / deleted courses) and the
+kulliyyah boost run as whole-array NumPy operations.
+"""
+import threading
+import time
+
+import numpy as np
+
+# Fields read from the courses collection
+ATTRIBUTE_PROJECTION = {
+    "course_code": 1,
+    "kulliyyah": 1,
+    "level": 1,
+    "is_available_this_semester": 1
+}
+
+
+class AttributeArrays:
+    """
+    One version of the per-row attribute arrays
+
+    Filled while private to a writer, then published by CourseAttributes
+    and never written again; writers copy() instead.
+    """
+
+    __slots__ = ("exists", "available", "kulliyyah_ids", "levels", "kulliyyah_lookup")
+
+    def __init__(self, size):
+        self.exists = np.zeros(size, dtype=bool)
+        self.available = np.zeros(size, dtype=bool)
+        self.kulliyyah_ids = np.full(size, -1, dtype=np.int32)
+        self.levels = np.zeros(size, dtype=np.int16)
+        self.kulliyyah_lookup = {}
+
+    def copy(self, size=None):
+        """Writable copy, grown to size rows (rows are only appended)"""
+        arrays = AttributeArrays(len(self.exists) if size is None else size)
+        rows = len(self.exists)
+        arrays.exists[:rows] = self.exists
+        arrays.available[:rows] = self.available
+        arrays.kulliyyah_ids[:rows] = self.kulliyyah_ids
+        arrays.levels[:rows] = self.levels
+        arrays.kulliyyah_lookup = dict(self.kulliyyah_lookup)
+        return arrays
+
+    def set_row(self, row, course):
+        self.exists[row] = True
+        self.available[row] = bool(course.get("is_available_this_semester", False))
+        self.kulliyyah_ids[row] = _kulliyyah_id(self.kulliyyah_lookup, course.get("kulliyyah"))
+        level = course.get("level", 0)
+        self.levels[row] = level if isinstance(level, int) else 0
+
+
+def _kulliyyah_id(lookup, name):
+    if not name:
+        return -1
+    if name not in lookup:
+        lookup[name] = len(lookup)
+    return lookup[name]
+
+
+class CourseAttributes:
+    """
+    Catalog attributes per TF-IDF matrix row
+
+    - exists: row has a live course document (False once deleted)
+    - available: is_available_this_semester
+    - kulliyyah_ids: small integer id per kulliyyah (-1 if unknown)
+    - levels: course level (0 if unknown)
+
+    Loaded from a projected query on the courses collection and kept
+    current by the course admin routes. Writers build new arrays and
+    publish them with one reference swap (copy-on-write), so readers never
+    see a half-refilled array; read `arrays` once to use several of them
+    from the same version.
+    """
+
+    def __init__(self, course_index):
+        """
+        Args:
+            course_index: Dict of course_code -> matrix row
+        """
+        self.course_index = course_index
+        self.arrays = AttributeArrays(len(course_index))
+        self.is_loaded = False
+        self.loaded_at = None
+        # Catalog snapshot version the arrays were loaded from, if any
+        self.catalog_version = None
+        self._lock = threading.Lock()
+
+    @property
+    def exists(self):
+        return self.arrays.exists
+
+    @property
+    def available(self):
+        return self.arrays.available
+
+    @property
+    def kulliyyah_ids(self):
+        return self.arrays.kulliyyah_ids
+
+    @property
+    def levels(self):
+        return self.arrays.levels
+
+    @property
+    def kulliyyah_lookup(self):
+        return self.arrays.kulliyyah_lookup
+
+    def load(self, course_docs, catalog_version=None):
+        """
+        Replace all attributes from course documents
+
+        Args:
+            course_docs: Iterable of course documents (ATTRIBUTE_PROJECTION is enough)
+            catalog_version: Version of the catalog snapshot they came from
+        """
+        arrays = AttributeArrays(len(self.course_index))
+        # Keep kulliyyah ids stable across loads
+        arrays.kulliyyah_lookup = dict(self.arrays.kulliyyah_lookup)
+
+        for course in course_docs:
+            row = self.course_index.get(course.get("course_code"))
+            if row is not None:
+                arrays.set_row(row, course)
+
+        with self._lock:
+            self.arrays = arrays
+            self.is_loaded = True
+            self.loaded_at = time.time()
+            self.catalog_version = catalog_version
+
+    def resized(self, course_index):
+        """
+        Copy of these attributes for the same or a grown row index (rows are
+        only appended)
+
+        Args:
+            course_index: New dict of course_code -> matrix row
+        """
+        attributes = CourseAttributes(course_index)
+        with self._lock:
+            attributes.arrays = self.arrays.copy(len(course_index))
+            attributes.is_loaded = self.is_loaded
+            attributes.loaded_at = self.loaded_at
+            attributes.catalog_version = self.catalog_version
+        return attributes
+
+    def needs_refresh(self, max_age):
+        """True if never loaded or loaded more than max_age seconds ago"""
+        return not self.is_loaded or time.time() - self.loaded_at > max_age
+
+    def update(self, course):
+        """Apply a created or edited course document"""
+        row = self.course_index.get(course.get("course_code"))
+        if row is None or not self.is_loaded:
+            return
+        with self._lock:
+            arrays = self.arrays.copy()
+            arrays.set_row(row, course)
+            self.arrays = arrays
+
+    def remove(self, course_code):
+        """Mark a deleted course"""
+        row = self.course_index.get(course_code)
+        if row is None or not self.is_loaded:
+            return
+        with self._lock:
+            arrays = self.arrays.copy()
+            arrays.exists[row] = False
+            self.arrays = arrays
+
+    def kulliyyah_mask(self, kulliyyah):
+        """Boolean array, True for courses in the given kulliyyah"""
+        arrays = self.arrays
+        kulliyyah_id = arrays.kulliyyah_lookup.get(kulliyyah)
+        if kulliyyah_id is None:
+            return np.zeros(len(arrays.kulliyyah_ids), dtype=bool)
+        return arrays.kulliyyah_ids == kulliyyah_id
@@ -0,0 +1,74 @@
+"""
+Drift tracking for incremental model edits
+Incremental edits reuse the fitted vocabulary and IDF weights. These
+counters measure how far the catalog has moved since that fit, so a full
+refit can be scheduled once the fitted statistics no longer describe it.
+"""
+
+# Share of indexed terms (since the fit) missing from the vocabulary
+VOCABULARY_DRIFT_THRESHOLD = 0.10
+# Share of fitted rows added, replaced or deleted since the fit
+IDF_STALENESS_THRESHOLD = 0.10
+# Don't judge vocabulary drift on fewer indexed terms than this
+MIN_DRIFT_TERMS = 200
+
+
+class IndexDrift:
+    """
+    Immutable counters of incremental edits since the last full fit
+
+    record() returns a new instance, so each ModelBundle carries its own.
+    """
+
+    __slots__ = ("base_version", "fitted_rows", "changes", "changed_rows", "terms", "oov_terms")
+
+    def __init__(self, base_version, fitted_rows, changes=0, changed_rows=frozenset(),
+                 terms=0, oov_terms=0):
+        """
+        Args:
+            base_version: Version of the fully fitted bundle the edits build on
+            fitted_rows: Number of rows in that fit
+        """
+        self.base_version = base_version
+        self.fitted_rows = fitted_rows
+        self.changes = changes
+        self.changed_rows = changed_rows
+        self.terms = terms
+        self.oov_terms = oov_terms
+
+    def record(self, row, terms=0, oov_terms=0):
+        """Counters after one more edit of the given row"""
+        return IndexDrift(
+            self.base_version,
+            self.fitted_rows,
+            changes=self.changes + 1,
+            changed_rows=self.changed_rows | {row},
+            terms=self.terms + terms,
+            oov_terms=self.oov_terms + oov_terms
+        )
+
+    @property
+    def vocabulary_drift(self):
+        """Share of indexed terms that were out of vocabulary"""
+        return self.oov_terms / self.terms if self.terms else 0.0
+
+    @property
+    def idf_staleness(self):
+        """Share of fitted rows touched since the fit"""
+        return len(self.changed_rows) / max(self.fitted_rows, 1)
+
+    def needs_refit(self):
+        """True once either threshold is exceeded"""
+        if self.idf_staleness > IDF_STALENESS_THRESHOLD:
+            return True
+        return self.terms >= MIN_DRIFT_TERMS and self.vocabulary_drift > VOCABULARY_DRIFT_THRESHOLD
+
+    def as_dict(self):
+        return {
+            "base_version": self.base_version,
+            "changes": self.changes,
+            "rows_changed": len(self.changed_rows),
+            "vocabulary_drift": round(self.vocabulary_drift, 4),
+            "idf_staleness": round(self.idf_staleness, 4),
+            "needs_refit": self.needs_refit()
+        }
@@ -0,0 +1,185 @@
+"""
+Multi-field (block) TF-IDF
+Each course field gets its own TF-IDF vectorizer and a course row is the
+horizontal stack of its per-field rows, so every field owns a contiguous
+block of columns: name | description | skills | kulliyyah + program.
+
+Field weights are applied to queries only: each block of the query
+vector is scaled by its field's weight (a diagonal scaling) before the
+usual cosine against the catalog. Changing the weights therefore needs
+no refit. Built with `rebuild_models.py --fields`.
+"""
+import numpy as np
+from scipy import sparse
+
+FIELDS = ("name", "description", "skills", "organisation")
+
+DEFAULT_FIELD_WEIGHTS = {
+    "name": 1.0,
+    "description": 1.0,
+    "skills": 1.0,
+    "organisation": 0.5
+}
+
+# Per-field overrides of VECTORIZER_OPTIONS; kulliyyah / program terms
+# repeat across a large share of the catalog, so max_df must not drop them
+FIELD_OPTIONS = {
+    "organisation": {"max_df": 1.0}
+}
+
+
+def course_fields(course):
+    """Raw text of each field in FIELDS for a course document"""
+    return (
+        course.get("course_name") or "",
+        course.get("description") or "",
+        " ".join(course.get("skills") or []),
+        " ".join(part for part in (course.get("kulliyyah"), course.get("program")) if part)
+    )
+
+
+def validate_field_weights(weights, fields=FIELDS):
+    """
+    Check a field -> weight mapping
+
+    Raises:
+        ValueError: Unknown field, negative or non-numeric weight, or all
+            weights zero
+    """
+    unknown = set(weights) - set(fields)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    for field, weight in weights.items():
+        if isinstance(weight, bool) or not isinstance(weight, (int, float)) or weight < 0:
+            raise ValueError(f"Weight of {field} must be a non-negative number")
+    if not any(weights.values()):
+        raise ValueError("At least one field weight must be positive")
+
+
+def _lookup(vectorizer, terms):
+    """Columns of terms in one field's vectorizer (-1 if unseen)"""
+    if hasattr(vectorizer, "lookup"):
+        return vectorizer.lookup(terms)
+    vocabulary = vectorizer.vocabulary_
+    return np.array([vocabulary.get(term, -1) for term in terms], dtype=np.int64)
+
+
+class FieldedVectorizer:
+    """
+    One vectorizer per field, presented as a single vectorizer
+
+    Course documents are tuples of cleaned field texts (in `fields`
+    order); a plain string (a query) is vectorized by every field.
+    Analyzed terms are "field:term" strings, which lookup() accepts.
+    """
+
+    def __init__(self, vectorizers, fields=FIELDS):
+        """
+        Args:
+            vectorizers: Per-field TfidfVectorizer, CompactVectorizer or
+                HashingTfidfVectorizer (fitted or not), aligned with fields
+            fields: Field names
+        """
+        if len(vectorizers) != len(fields):
+            raise ValueError("Need one vectorizer per field")
+        self.fields = tuple(fields)
+        self.vectorizers = list(vectorizers)
+        self.offsets = None
+        self._idf = None
+        if all(getattr(vectorizer, "idf_", None) is not None for vectorizer in self.vectorizers):
+            self._set_offsets()
+
+    def _set_offsets(self):
+        sizes = [len(vectorizer.idf_) for vectorizer in self.vectorizers]
+        self.offsets = np.concatenate([[0], np.cumsum(sizes)]).astype(np.int64)
+        self._idf = None
+
+    @property
+    def idf_(self):
+        if self._idf is None and self.offsets is not None:
+            self._idf = np.concatenate([np.asarray(vectorizer.idf_) for vectorizer in self.vectorizers])
+        return self._idf
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["_idf"] = None
+        return state
+
+    def _field_texts(self, documents):
+        """Per-field lists of texts (a string feeds every field)"""
+        columns = [[] for _ in self.fields]
+        for document in documents:
+            parts = (document,) * len(self.fields) if isinstance(document, str) else document
+            for column, text in zip(columns, parts):
+                column.append(text)
+        return columns
+
+    def fit_transform(self, documents):
+        """
+        Fit every field's vectorizer and stack the blocks
+
+        Args:
+            documents: Iterable of field-text tuples (read once; the
+                cleaned texts are held in memory while fitting)
+
+        Returns:
+            CSR matrix (documents x total features)
+        """
+        blocks = []
+        for field, vectorizer, texts in zip(self.fields, self.vectorizers, self._field_texts(documents)):
+            try:
+                blocks.append(vectorizer.fit_transform(texts))
+            except ValueError as e:
+                raise ValueError(f"Field '{field}': {e}") from e
+        self._set_offsets()
+        return sparse.hstack(blocks, format="csr")
+
+    def transform(self, documents):
+        """Vectorize field-text tuples or query strings (unweighted)"""
+        columns = self._field_texts(documents)
+        return sparse.hstack(
+            [vectorizer.transform(texts) for vectorizer, texts in zip(self.vectorizers, columns)],
+            format="csr"
+        )
+
+    def build_analyzer(self):
+        analyzers = [vectorizer.build_analyzer() for vectorizer in self.vectorizers]
+
+        def analyze(document):
+            parts = (document,) * len(self.fields) if isinstance(document, str) else document
+            return [
+                f"{field}:{term}"
+                for field, analyzer, text in zip(self.fields, analyzers, parts)
+                for term in analyzer(text)
+            ]
+
+        return analyze
+
+    def lookup(self, terms):
+        """Map "field:term" strings to columns (-1 if unseen)"""
+        cols = np.full(len(terms), -1, dtype=np.int64)
+        for i, (field, vectorizer) in enumerate(zip(self.fields, self.vectorizers)):
+            positions = [j for j, term in enumerate(terms) if term.partition(":")[0] == field]
+            if not positions:
+                continue
+            found = _lookup(vectorizer, [terms[j].partition(":")[2] for j in positions])
+            cols[positions] = np.where(found >= 0, found + self.offsets[i], -1)
+        return cols
+
+    def weigh(self, matrix, weights):
+        """
+        Scale each field block of query rows by its weight
+
+        Args:
+            matrix: CSR query matrix from transform()
+            weights: Field -> weight mapping (missing fields weigh 1.0)
+
+        Returns:
+            CSR matrix (a scaled copy)
+        """
+        per_field = np.array([weights.get(field, 1.0) for field in self.fields], dtype=np.float64)
+        matrix = sparse.csr_matrix(matrix, dtype=np.float64, copy=True)
+        blocks = np.searchsorted(self.offsets, matrix.indices, side="right") - 1
+        matrix.data *= per_field[blocks]
+        matrix.eliminate_zeros()
+        return matrix
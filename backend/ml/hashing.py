@@ -0,0 +1,128 @@
+"""
+Hashing TF-IDF vectorizer
+Maps terms to columns with a hash instead of a fitted vocabulary, so
+building the model never holds a term -> column dictionary (which for
+unigrams + bigrams grows with the catalog). IDF weights are fitted in the
+same single pass over the corpus. Used by `rebuild_models.py --hashing`.
+
+Weighting matches TfidfVectorizer (smooth IDF, sublinear TF, max_df,
+L2 norm); the differences are hash collisions and columns that never
+map back to a term.
+"""
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction import FeatureHasher
+from sklearn.preprocessing import normalize
+
+# Hash space; 2^20 columns keeps collisions rare for course-sized vocabularies
+DEFAULT_HASHING_FEATURES = 1 << 20
+
+# Documents hashed per chunk while fitting
+FIT_CHUNK_DOCS = 10000
+
+
+def _chunks(documents, size):
+    chunk = []
+    for document in documents:
+        chunk.append(document)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class HashingTfidfVectorizer:
+    """
+    TF-IDF over hashed features
+
+    Wraps an unfitted TfidfVectorizer as a template: its analyzer and
+    weighting options are reused, its vocabulary never is. Columns with no
+    document frequency (or above max_df) get IDF 0 and drop out of
+    transform(), like out-of-vocabulary terms do with TfidfVectorizer.
+    """
+
+    def __init__(self, template, n_features=DEFAULT_HASHING_FEATURES, idf=None):
+        """
+        Args:
+            template: Unfitted TfidfVectorizer holding the analyzer and
+                weighting options
+            n_features: Number of hash columns
+            idf: Fitted IDF weights (n_features), or None before fitting
+        """
+        self.template = template
+        self.n_features = n_features
+        self.idf_ = idf
+        self._analyzer = template.build_analyzer()
+        self._hasher = FeatureHasher(n_features, input_type="string", alternate_sign=False)
+
+    def build_analyzer(self):
+        return self._analyzer
+
+    def _counts(self, documents):
+        """Raw term counts (documents x n_features CSR)"""
+        return self._hasher.transform(self._analyzer(document) for document in documents)
+
+    def _weight(self, counts):
+        template = self.template
+        tf = sparse.csr_matrix(counts, dtype=np.float64)
+
+        if template.binary:
+            tf.data[:] = 1.0
+        elif template.sublinear_tf:
+            tf.data = np.log(tf.data) + 1.0
+
+        if template.use_idf:
+            tf.data *= self.idf_[tf.indices]
+            tf.eliminate_zeros()
+
+        if template.norm:
+            tf = normalize(tf, norm=template.norm, copy=False)
+        return tf
+
+    def fit_transform(self, documents):
+        """
+        Fit IDF weights and vectorize, reading the documents once
+
+        Args:
+            documents: Iterable of strings (may be a generator)
+
+        Returns:
+            CSR matrix (documents x n_features)
+        """
+        blocks = []
+        document_frequency = np.zeros(self.n_features, dtype=np.int64)
+
+        for chunk in _chunks(documents, FIT_CHUNK_DOCS):
+            counts = self._counts(chunk)
+            document_frequency += np.bincount(counts.indices, minlength=self.n_features)
+            blocks.append(counts)
+
+        if blocks:
+            counts = sparse.vstack(blocks, format="csr")
+        else:
+            counts = sparse.csr_matrix((0, self.n_features))
+        num_documents = counts.shape[0]
+
+        # Smooth IDF, as TfidfVectorizer computes it
+        idf = np.log((1.0 + num_documents) / (1.0 + document_frequency)) + 1.0
+
+        max_df = self.template.max_df
+        max_count = max_df if isinstance(max_df, int) else max_df * num_documents
+        idf[(document_frequency == 0) | (document_frequency > max_count)] = 0.0
+        self.idf_ = idf
+
+        return self._weight(counts)
+
+    def transform(self, documents):
+        """Vectorize documents with the fitted IDF weights"""
+        return self._weight(self._counts(documents))
+
+    def lookup(self, terms):
+        """Map terms to feature columns (-1 for terms unseen at fit time)"""
+        if not terms:
+            return np.empty(0, dtype=np.int64)
+
+        hashed = self._hasher.transform([term] for term in terms)
+        cols = hashed.indices.astype(np.int64)
+        return np.where(self.idf_[cols] > 0, cols, -1)
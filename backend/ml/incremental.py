@@ -0,0 +1,271 @@
+"""
+Incremental model edits
+Apply a single course create / update / delete to a loaded model without
+refitting: the course text is vectorized with the fitted vocabulary and
+IDF, and its matrix row is appended, replaced or tombstoned. Each edit
+returns a new ModelBundle; the input bundle (including its side tables)
+is never modified.
+
+Rows are patched into the existing arrays: only the edited row is
+normalized, its entries are spliced into the TF-IDF (CSR) and scoring
+(CSC) arrays, and only the term bounds of its columns are recomputed.
+The matrix is never re-normalized, re-converted or re-indexed per edit.
+"""
+import numpy as np
+from scipy import sparse
+
+from .fields import FieldedVectorizer, course_fields
+from .model_builder import course_text
+from .model_bundle import ModelBundle
+from .preprocessing import preprocess_many, preprocess_text
+from .inverted_index import InvertedIndex
+from .scoring import CosineScorer, DenseScorer, normalize_rows
+
+
+def _count_oov(vectorizer, terms):
+    """Number of analyzed terms missing from the fitted vocabulary"""
+    if not terms:
+        return 0
+    if hasattr(vectorizer, "lookup"):
+        return int((vectorizer.lookup(terms) < 0).sum())
+    vocabulary = vectorizer.vocabulary_
+    return sum(1 for term in terms if term not in vocabulary)
+
+
+def _csr_set_row(matrix, row, row_vector):
+    """
+    CSR copy of matrix with one row replaced (appended when row == num_rows)
+
+    Other rows' entries are copied as whole array slices.
+    """
+    matrix = sparse.csr_matrix(matrix)
+    row_vector = sparse.csr_matrix(row_vector, dtype=matrix.dtype)
+    row_vector.sort_indices()
+    num_rows = matrix.shape[0]
+    indptr = matrix.indptr
+
+    start = indptr[row] if row < num_rows else indptr[-1]
+    end = indptr[row + 1] if row < num_rows else start
+    data = np.concatenate([matrix.data[:start], row_vector.data, matrix.data[end:]])
+    indices = np.concatenate([
+        matrix.indices[:start], row_vector.indices.astype(matrix.indices.dtype), matrix.indices[end:]
+    ])
+
+    shift = row_vector.nnz - (end - start)
+    if row < num_rows:
+        indptr = np.concatenate([indptr[:row + 1], indptr[row + 1:] + shift])
+    else:
+        indptr = np.append(indptr, indptr[-1] + shift)
+
+    patched = sparse.csr_matrix(
+        (data, indices, indptr.astype(matrix.indptr.dtype, copy=False)),
+        shape=(max(num_rows, row + 1), matrix.shape[1])
+    )
+    patched.has_sorted_indices = matrix.has_sorted_indices
+    return patched
+
+
+def _csc_set_row(matrix, row, old_cols, row_vector):
+    """
+    CSC copy of matrix with one row replaced (appended when row == num_rows)
+
+    The row's old entries are located by binary search in old_cols (the
+    columns it had) and the new ones inserted in row order, so row indices
+    stay sorted within every column.
+    """
+    matrix = sparse.csc_matrix(matrix)
+    if not matrix.has_sorted_indices:
+        matrix = matrix.sorted_indices()
+    row_vector = sparse.csr_matrix(row_vector, dtype=matrix.dtype)
+    row_vector.sort_indices()
+    indptr, indices, data = matrix.indptr, matrix.indices, matrix.data
+    counts = np.diff(indptr)
+
+    removed = []
+    for col in old_cols:
+        start, end = indptr[col], indptr[col + 1]
+        position = start + np.searchsorted(indices[start:end], row)
+        if position < end and indices[position] == row:
+            removed.append(position)
+            counts[col] -= 1
+    indices = np.delete(indices, removed)
+    data = np.delete(data, removed)
+    indptr = np.concatenate([[0], np.cumsum(counts)])
+
+    inserted = [
+        indptr[col] + np.searchsorted(indices[indptr[col]:indptr[col + 1]], row)
+        for col in row_vector.indices
+    ]
+    indices = np.insert(indices, inserted, row)
+    data = np.insert(data, inserted, row_vector.data)
+    counts[row_vector.indices] += 1
+
+    patched = sparse.csc_matrix(
+        (data, indices, np.concatenate([[0], np.cumsum(counts)]).astype(matrix.indptr.dtype)),
+        shape=(max(matrix.shape[0], row + 1), matrix.shape[1])
+    )
+    patched.has_sorted_indices = True
+    return patched
+
+
+def _patch_row(bundle, row, row_vector):
+    """
+    TF-IDF matrix, scorer and inverted index of `bundle` with one row set
+    (appended when row == num_rows)
+
+    Returns:
+        tuple: (tfidf_matrix, scorer, index); index is None for a CSR
+        scorer (ModelBundle then builds one)
+    """
+    tfidf_matrix = sparse.csr_matrix(bundle.tfidf_matrix)
+    if row < tfidf_matrix.shape[0]:
+        old_cols = tfidf_matrix.indices[tfidf_matrix.indptr[row]:tfidf_matrix.indptr[row + 1]]
+    else:
+        old_cols = np.empty(0, dtype=tfidf_matrix.indices.dtype)
+    tfidf_matrix = _csr_set_row(tfidf_matrix, row, row_vector)
+
+    # Only the edited row needs normalizing
+    scoring_row = normalize_rows(row_vector)
+    if bundle.scorer.layout == "csr":
+        scoring = _csr_set_row(bundle.scorer.matrix, row, scoring_row)
+        return tfidf_matrix, CosineScorer(scoring, layout="csr", normalized=True), None
+
+    scoring = _csc_set_row(bundle.scorer.matrix, row, old_cols, scoring_row)
+
+    # Only the columns the row left or joined can change their maximum
+    term_bounds = np.array(bundle.index.term_bounds, copy=True)
+    for col in np.union1d(old_cols, scoring_row.indices):
+        start, end = scoring.indptr[col], scoring.indptr[col + 1]
+        term_bounds[col] = scoring.data[start:end].max() if end > start else 0.0
+
+    return tfidf_matrix, CosineScorer(scoring, normalized=True), InvertedIndex(scoring, term_bounds)
+
+
+def _edit_embeddings(bundle, row, row_vector):
+    """LSA scorer with one row appended or replaced (None if no LSA stage)"""
+    dense = bundle.dense
+    if dense is None:
+        return None
+
+    if row_vector is not None:
+        embedding = dense.embed(row_vector)
+    else:
+        embedding = np.zeros((1, dense.dimensions), dtype=np.float32)
+
+    if row == dense.num_rows:
+        embeddings = np.vstack([dense.embeddings, embedding])
+    else:
+        embeddings = np.array(dense.embeddings)
+        embeddings[row] = embedding[0]
+    return DenseScorer(embeddings, dense.projection)
+
+
+def _derive(bundle, patched, course_codes, course_index, ratings, attributes, tombstones, drift,
+            dense):
+    """New bundle sharing the vectorizer of `bundle` with a patched row (see _patch_row)"""
+    matrix, scorer, index = patched
+    manifest = dict(bundle.manifest)
+    manifest["course_codes"] = list(course_codes)
+    manifest["num_courses"] = len(course_codes)
+
+    return ModelBundle(
+        version=f"{drift.base_version}+{drift.changes}",
+        vectorizer=bundle.vectorizer,
+        tfidf_matrix=matrix,
+        scorer=scorer,
+        manifest=manifest,
+        artifact_format=bundle.artifact_format,
+        course_index=course_index,
+        ratings=ratings,
+        attributes=attributes,
+        tombstones=tombstones,
+        drift=drift,
+        index=index,
+        dense=dense,
+        # New rows sit past the IVF's indexed range and are always scanned;
+        # replaced rows stay in their old cluster until the next refit
+        ann=bundle.ann if dense is not None else None,
+        # Lists of new or edited rows are recomputed on lookup
+        neighbours=bundle.neighbours
+    )
+
+
+def upsert_course(bundle, course):
+    """
+    Add a course, or replace the row of an existing one
+
+    Args:
+        bundle: Current ModelBundle
+        course: Full course document
+
+    Returns:
+        ModelBundle with the course's row (re)vectorized
+    """
+    course_code = course.get("course_code")
+    if not course_code:
+        raise ValueError("Course has no course_code")
+
+    vectorizer = bundle.vectorizer
+    if isinstance(vectorizer, FieldedVectorizer):
+        document = tuple(preprocess_many(course_fields(course)))
+    else:
+        document = preprocess_text(course_text(course))
+    terms = vectorizer.build_analyzer()(document)
+    row_vector = vectorizer.transform([document])
+
+    row = bundle.course_index.get(course_code)
+
+    if row is None:
+        # New course: append a row; side tables grow with the row index
+        row = bundle.tfidf_matrix.shape[0]
+        course_codes = bundle.course_codes + (course_code,)
+        course_index = dict(bundle.course_index)
+        course_index[course_code] = row
+        ratings = bundle.ratings.resized(course_index)
+        attributes = bundle.attributes.resized(course_index)
+        tombstones = np.append(bundle.tombstones, False)
+    else:
+        course_codes = bundle.course_codes
+        course_index = bundle.course_index
+        ratings = bundle.ratings
+        # Copied, so requests still holding `bundle` keep its attributes
+        attributes = bundle.attributes.resized(course_index)
+        tombstones = bundle.tombstones.copy()
+        tombstones[row] = False
+
+    attributes.update(course)
+    drift = bundle.drift.record(row, len(terms), _count_oov(vectorizer, terms))
+
+    dense = _edit_embeddings(bundle, row, row_vector)
+
+    return _derive(
+        bundle, _patch_row(bundle, row, row_vector), course_codes, course_index,
+        ratings, attributes, tombstones, drift, dense
+    )
+
+
+def remove_course(bundle, course_code):
+    """
+    Tombstone a deleted course: its row is emptied and excluded from
+    candidates, but keeps its position until the next full refit
+
+    Returns:
+        ModelBundle, or None if the course is not in the model
+    """
+    row = bundle.course_index.get(course_code)
+    if row is None or bundle.tombstones[row]:
+        return None
+
+    patched = _patch_row(bundle, row, sparse.csr_matrix((1, bundle.tfidf_matrix.shape[1])))
+    tombstones = bundle.tombstones.copy()
+    tombstones[row] = True
+
+    attributes = bundle.attributes.resized(bundle.course_index)
+    attributes.remove(course_code)
+    drift = bundle.drift.record(row)
+
+    return _derive(
+        bundle, patched, bundle.course_codes, bundle.course_index,
+        bundle.ratings, attributes, tombstones, drift,
+        _edit_embeddings(bundle, row, None)
+    )
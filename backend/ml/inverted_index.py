@@ -0,0 +1,221 @@
+"""
+Inverted index over the scoring matrix
+The pre-normalized CSC scoring matrix already stores, per term, the rows
+(courses) containing it and their weights - i.e. posting lists. This
+module adds per-term maximum weights and scores a query by touching only
+the postings of its terms:
+
+- candidates(): exhaustive, but accumulates only over courses sharing at
+  least one term with the query (no catalog-sized work)
+- search(): top-k with MaxScore early termination; once the remaining
+  terms' upper bounds can no longer lift an unseen course into the top-k,
+  those terms only update courses already in contention; partial scores
+  go into per-thread buffers that are reset only at the rows a query
+  touched, so no catalog-sized array is allocated or cleared per query
+"""
+import threading
+
+import numpy as np
+from scipy import sparse
+
+from .scoring import SCORING_DTYPE, top_k
+
+# Sum per distinct course (instead of into a catalog-sized buffer) while
+# postings x this ratio stays below the number of courses
+SPARSE_ACCUMULATION_RATIO = 16
+
+
+def term_max_weights(matrix):
+    """
+    Largest weight in each column of a CSC matrix (0 for empty columns)
+
+    Args:
+        matrix: CSC matrix (courses x features)
+
+    Returns:
+        float32 array of length num_features
+    """
+    matrix = sparse.csc_matrix(matrix)
+    bounds = np.zeros(matrix.shape[1], dtype=SCORING_DTYPE)
+    lengths = np.diff(matrix.indptr)
+    nonempty = np.flatnonzero(lengths)
+    if len(nonempty):
+        bounds[nonempty] = np.maximum.reduceat(matrix.data, matrix.indptr[nonempty])
+    return bounds
+
+
+class InvertedIndex:
+    """
+    Term -> postings index backed by a normalized CSC scoring matrix
+
+    Shares the matrix arrays (which may be memory-mapped); only the
+    per-term upper bounds are extra.
+    """
+
+    def __init__(self, matrix, term_bounds=None):
+        """
+        Args:
+            matrix: L2-normalized CSC matrix (courses x features)
+            term_bounds: Optional precomputed term_max_weights(matrix)
+        """
+        self.matrix = sparse.csc_matrix(matrix)
+        if not self.matrix.has_sorted_indices:
+            self.matrix = self.matrix.sorted_indices()
+        self.num_rows, self.num_features = self.matrix.shape
+        self.term_bounds = term_bounds if term_bounds is not None else term_max_weights(self.matrix)
+        self._local = threading.local()
+
+    def _buffers(self):
+        """
+        This thread's (accumulator, seen) buffers over all rows
+
+        Allocated once per thread; search() leaves them zeroed / False.
+        """
+        buffers = getattr(self._local, "buffers", None)
+        if buffers is None:
+            buffers = (np.zeros(self.num_rows), np.zeros(self.num_rows, dtype=bool))
+            self._local.buffers = buffers
+        return buffers
+
+    def _query_terms(self, query_vector):
+        """(columns, unit-length weights) of a 1 x features query"""
+        query = sparse.csr_matrix(query_vector)
+        cols = query.indices
+        weights = query.data.astype(np.float64)
+        length = np.sqrt(np.dot(weights, weights))
+        if length > 0:
+            weights = weights / length
+        return cols, weights
+
+    def postings(self, col):
+        """(rows, weights) of one term; rows are sorted"""
+        start, end = self.matrix.indptr[col], self.matrix.indptr[col + 1]
+        return self.matrix.indices[start:end], self.matrix.data[start:end]
+
+    def candidates(self, query_vector):
+        """
+        Cosine scores of every course sharing a term with the query
+
+        The postings of the query terms are gathered in one pass. When they
+        are few relative to the catalog, scores are summed per distinct
+        course (sort-based, no catalog-sized buffer); when they cover a
+        large share of it, a dense bincount is cheaper.
+
+        Args:
+            query_vector: 1 x features sparse query
+
+        Returns:
+            tuple: (rows, scores) with rows sorted ascending; courses not
+            listed score 0
+        """
+        cols, weights = self._query_terms(query_vector)
+        if len(cols) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        indptr = self.matrix.indptr
+        starts, ends = indptr[cols], indptr[cols + 1]
+        lengths = ends - starts
+        positions = np.repeat(ends - lengths.cumsum(), lengths) + np.arange(lengths.sum())
+        rows = self.matrix.indices[positions]
+        contributions = self.matrix.data[positions] * np.repeat(weights, lengths)
+
+        if len(rows) * SPARSE_ACCUMULATION_RATIO < self.num_rows:
+            candidate_rows, inverse = np.unique(rows, return_inverse=True)
+            return candidate_rows, np.bincount(inverse, weights=contributions, minlength=len(candidate_rows))
+
+        # TF-IDF weights are positive, so every touched course scores > 0
+        scores = np.bincount(rows, weights=contributions, minlength=self.num_rows)
+        candidate_rows = np.flatnonzero(scores)
+        return candidate_rows, scores[candidate_rows]
+
+    def search(self, query_vector, k, mask=None):
+        """
+        Top-k cosine scores with MaxScore early termination
+
+        Terms are processed in decreasing order of their upper bound
+        (query weight x largest posting weight). After each term the k-th
+        best partial score is a lower bound on the final threshold; when
+        the bounds of the remaining terms add up to less than it, unseen
+        courses can no longer qualify, so the remaining terms only update
+        courses already in contention (a binary search into each posting
+        list instead of a full scan). Queries whose postings cover a large
+        share of the catalog skip the pruning and take one vectorized pass.
+
+        Args:
+            query_vector: 1 x features sparse query
+            k: Number of results
+            mask: Optional boolean array over rows; False rows are skipped
+
+        Returns:
+            tuple: (rows, scores), best first (same contract as
+            ml.scoring.top_k on the full score vector, minus zero scores)
+        """
+        cols, weights = self._query_terms(query_vector)
+        if len(cols) == 0 or k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        num_postings = int((self.matrix.indptr[cols + 1] - self.matrix.indptr[cols]).sum())
+        if num_postings * SPARSE_ACCUMULATION_RATIO >= self.num_rows:
+            # Long posting lists: one vectorized pass beats term-at-a-time pruning
+            rows, scores = self.candidates(query_vector)
+            selected, values = top_k(scores, k, None if mask is None else mask[rows])
+            return rows[selected], values
+
+        bounds = weights * self.term_bounds[cols]
+        order = np.argsort(-bounds, kind="stable")
+        # remaining[i]: upper bound of all terms after position i
+        remaining = np.append(np.cumsum(bounds[order][::-1])[::-1][1:], 0.0)
+
+        accumulator, seen = self._buffers()
+        touched = []
+        candidates = None
+
+        try:
+            for position, term in enumerate(order):
+                rows, values = self.postings(cols[term])
+                contributions = values * weights[term]
+
+                if candidates is None:
+                    if mask is not None:
+                        allowed = mask[rows]
+                        rows, contributions = rows[allowed], contributions[allowed]
+                    accumulator[rows] += contributions
+                    touched.append(rows[~seen[rows]])
+                    seen[rows] = True
+
+                    if remaining[position] == 0.0:
+                        continue
+                    candidates = np.concatenate(touched)
+                    touched = [candidates]
+                    if len(candidates) < k:
+                        candidates = None
+                        continue
+
+                    threshold = np.partition(accumulator[candidates], len(candidates) - k)[len(candidates) - k]
+                    if remaining[position] >= threshold:
+                        candidates = None
+                        continue
+                    # Unseen courses are out; keep those that can still make it
+                    candidates = candidates[accumulator[candidates] + remaining[position] >= threshold]
+                elif len(rows):
+                    found = np.searchsorted(rows, candidates)
+                    found[found >= len(rows)] = 0
+                    hits = rows[found] == candidates
+                    accumulator[candidates[hits]] += contributions[found[hits]]
+
+            if candidates is None:
+                candidates = np.concatenate(touched)
+
+            selected, scores = top_k(accumulator[candidates], k)
+        finally:
+            # Every row written above was marked seen in touched
+            if touched:
+                reset = np.concatenate(touched)
+                accumulator[reset] = 0.0
+                seen[reset] = False
+
+        selected_rows = candidates[selected]
+
+        # top_k breaks ties by position; re-break them by row
+        order = np.lexsort((selected_rows, -scores))
+        return selected_rows[order], scores[order]
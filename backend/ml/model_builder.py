@@ -0,0 +1,460 @@
+"""
+TF-IDF model building
+Turns course documents into a fitted vectorizer + matrix (and optionally
+LSA embeddings with an IVF index over them) and writes the artifacts
+(pickles, memory-mappable .npy copy, manifest) into a new versioned
+directory. Shared by rebuild_models.py and the engine's background refit.
+
+The build streams: courses arrive in batches (e.g. from a MongoDB
+cursor), their text is cleaned in a process pool, and the vectorizer
+consumes the cleaned documents in a single pass, so the raw catalog is
+never held in memory. With hashing_features set, the vectorizer has no
+vocabulary either (see ml/hashing.py). Given a CleanedTextCache, only
+courses whose text changed since they were last cleaned are preprocessed.
+With fields set, each course field gets its own column block (see
+ml/fields.py) so field weights can change at query time.
+"""
+import hashlib
+import itertools
+import os
+import shutil
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+
+import joblib
+import numpy as np
+from sklearn.decomposition import TruncatedSVD
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from .ann import IVFIndex
+from .artifacts import (
+    build_manifest,
+    create_version_dir,
+    publish_version,
+    save_ann_artifacts,
+    save_compact_artifacts,
+    save_lsa_artifacts,
+    save_neighbour_artifacts,
+    write_manifest
+)
+from .fields import FIELD_OPTIONS, FIELDS, FieldedVectorizer, course_fields
+from .hashing import HashingTfidfVectorizer
+from .neighbours import DEFAULT_NEIGHBOURS, course_neighbours
+from .preprocessing import preprocess_many, preprocessing_fingerprint
+
+# Fields the build reads from each course document
+COURSE_FIELDS = {
+    "_id": 0, "course_code": 1, "course_name": 1, "description": 1, "skills": 1,
+    "kulliyyah": 1, "program": 1
+}
+
+# Courses per batch (cursor batch size and unit of work for the pool)
+DEFAULT_BATCH_SIZE = 1000
+
+# Batches queued per pool worker before the reader waits
+BATCHES_IN_FLIGHT_PER_WORKER = 2
+
+VECTORIZER_OPTIONS = {
+    "ngram_range": (1, 2),        # Unigrams + Bigrams
+    "max_df": 0.85,
+    "min_df": 1,                  # Lower for small dataset
+    "sublinear_tf": True,
+    "stop_words": "english"
+}
+
+
+def course_text(course):
+    """Combine the text fields of a course document that feed the model"""
+    text_parts = []
+
+    if course.get('course_name'):
+        text_parts.append(course['course_name'])
+
+    if course.get('description'):
+        text_parts.append(course['description'])
+
+    if course.get('skills'):
+        text_parts.extend(course['skills'])
+
+    return " ".join(text_parts)
+
+
+def iter_batches(courses, batch_size=DEFAULT_BATCH_SIZE):
+    """Group an iterable of course documents (e.g. a cursor) into lists"""
+    iterator = iter(courses)
+    while True:
+        batch = list(itertools.islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+class BuildProgress:
+    """Periodic progress and throughput lines for a build"""
+
+    def __init__(self, interval=2.0, stream=None):
+        """
+        Args:
+            interval: Seconds between progress lines
+            stream: File to print to (default stdout; see quiet())
+        """
+        self.interval = interval
+        self.stream = stream or sys.stdout
+        self.timings = {}
+        self._phase = None
+
+    @classmethod
+    def quiet(cls):
+        """Progress that only records phase timings"""
+        progress = cls()
+        progress.stream = None
+        return progress
+
+    def _print(self, message):
+        if self.stream is not None:
+            print(message, file=self.stream, flush=True)
+
+    def start(self, phase):
+        self.finish()
+        self._phase = phase
+        self._started = self._last = time.perf_counter()
+        self.count = 0
+
+    def advance(self, count):
+        self.count += count
+        now = time.perf_counter()
+        if now - self._last >= self.interval:
+            self._last = now
+            rate = self.count / (now - self._started)
+            self._print(f"  {self._phase}: {self.count:,} courses ({rate:,.0f}/s)")
+
+    def finish(self):
+        if self._phase is None:
+            return
+        elapsed = time.perf_counter() - self._started
+        self.timings[self._phase] = elapsed
+        rate = f", {self.count / elapsed:,.0f} courses/s" if self.count and elapsed > 0 else ""
+        self._print(f"  {self._phase}: {elapsed:.2f} s{rate}")
+        self._phase = None
+
+
+class CorpusStream:
+    """
+    Cleaned course documents, in catalog order, from batches of courses
+
+    Iterate once. Courses without a course_code, and repeats of a code
+    already seen, are skipped so every matrix row maps to exactly one
+    course. course_codes and catalog_version are complete once iteration
+    ends. With workers > 1 the text cleaning runs in a process pool with
+    a bounded number of batches in flight. With a text_cache, cached
+    courses skip cleaning and newly cleaned text is stored. With fields,
+    each document is a tuple of cleaned field texts (see ml/fields.py).
+    """
+
+    def __init__(self, batches, workers=1, progress=None, text_cache=None, fields=False):
+        self.batches = batches
+        self.workers = workers
+        self.progress = progress or BuildProgress.quiet()
+        self.text_cache = text_cache
+        self.fields = fields
+        self._pool = None
+        self.course_codes = []
+        self.skipped = 0
+        self._seen = set()
+        # Same fingerprint as artifacts.compute_catalog_version
+        self._digest = hashlib.sha256()
+
+    @property
+    def catalog_version(self):
+        return self._digest.hexdigest()[:16]
+
+    def _accept(self, batch):
+        """Raw texts of the batch's usable courses (records their codes)"""
+        texts = []
+        for course in batch:
+            code = course.get('course_code')
+            if not code or code in self._seen:
+                self.skipped += 1
+                continue
+
+            if self.fields:
+                parts = course_fields(course)
+                text = "\t".join(parts)
+                texts.extend(parts)
+            else:
+                text = course_text(course)
+                texts.append(text)
+            self._seen.add(code)
+            self.course_codes.append(code)
+            self._digest.update(f"{code}\t{text}\n".encode("utf-8"))
+        return texts
+
+    def _start(self, texts):
+        """Begin cleaning a batch: cache lookup, then the misses go to the pool"""
+        keys = cached = missing = None
+        if self.text_cache is not None:
+            keys, cached = self.text_cache.lookup(texts)
+            missing = [i for i, text in enumerate(cached) if text is None]
+            texts = [texts[i] for i in missing]
+
+        if self.workers > 1 and texts:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(self.workers)
+            return keys, cached, missing, self._pool.submit(preprocess_many, texts)
+        return keys, cached, missing, preprocess_many(texts)
+
+    def _finish(self, job):
+        """Cleaned texts of a started batch, in order"""
+        keys, cached, missing, cleaned = job
+        if isinstance(cleaned, Future):
+            cleaned = cleaned.result()
+
+        if keys is not None:
+            for i, text in zip(missing, cleaned):
+                cached[i] = text
+            self.text_cache.store([keys[i] for i in missing], cleaned)
+            cleaned = cached
+
+        if self.fields:
+            # Field texts were cleaned flat; regroup them per course
+            cleaned = list(zip(*[iter(cleaned)] * len(FIELDS)))
+
+        self.progress.advance(len(cleaned))
+        return cleaned
+
+    def __iter__(self):
+        in_flight = self.workers * BATCHES_IN_FLIGHT_PER_WORKER if self.workers > 1 else 0
+        pending = deque()
+        try:
+            for batch in self.batches:
+                pending.append(self._start(self._accept(batch)))
+                while len(pending) > in_flight:
+                    yield from self._finish(pending.popleft())
+            while pending:
+                yield from self._finish(pending.popleft())
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+                self._pool = None
+
+
+def fit_vectorizer(corpus, hashing_features=0, options=None, fields=False):
+    """
+    Fit the TF-IDF vectorizer
+
+    Args:
+        corpus: Iterable of cleaned documents (read once); field-text
+            tuples when fields is set
+        hashing_features: Hash into this many columns instead of fitting a
+            vocabulary (0 for a regular TfidfVectorizer)
+        options: Overrides of VECTORIZER_OPTIONS (e.g. from a sweep)
+        fields: Fit one vectorizer per field (a FieldedVectorizer)
+
+    Returns:
+        tuple: (vectorizer, tfidf_matrix)
+    """
+    def make(field_options=None):
+        vectorizer = TfidfVectorizer(**{**VECTORIZER_OPTIONS, **(options or {}), **(field_options or {})})
+        if hashing_features:
+            vectorizer = HashingTfidfVectorizer(vectorizer, hashing_features)
+        return vectorizer
+
+    if fields:
+        vectorizer = FieldedVectorizer([make(FIELD_OPTIONS.get(field)) for field in FIELDS])
+    else:
+        vectorizer = make()
+
+    tfidf_matrix = vectorizer.fit_transform(corpus)
+    return vectorizer, tfidf_matrix
+
+
+def fit_lsa(tfidf_matrix, dimensions, random_state=42):
+    """
+    Fit a TruncatedSVD (LSA) projection of the TF-IDF matrix
+
+    Args:
+        tfidf_matrix: Course TF-IDF matrix
+        dimensions: Requested embedding size (64-256 is typical); capped
+            below the matrix rank limits for small catalogs
+        random_state: Seed for the randomized solver
+
+    Returns:
+        tuple: (projection, embeddings) as float32 arrays: the
+        features x dimensions projection (components_ transposed, made
+        contiguous) and course embeddings with unit-length rows
+    """
+    dimensions = min(dimensions, min(tfidf_matrix.shape) - 1)
+    if dimensions < 1:
+        raise ValueError("Catalog too small for an LSA stage")
+
+    svd = TruncatedSVD(n_components=dimensions, random_state=random_state)
+    embeddings = svd.fit_transform(tfidf_matrix).astype(np.float32)
+
+    lengths = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    lengths[lengths == 0] = 1.0
+    embeddings /= lengths
+
+    projection = np.ascontiguousarray(svd.components_.T, dtype=np.float32)
+    return projection, embeddings
+
+
+def _dump_atomic(obj, path):
+    tmp_path = path + ".tmp"
+    joblib.dump(obj, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def save_model(artifacts_path, vectorizer, tfidf_matrix, course_codes, catalog_version, lsa=None,
+               ann=None, neighbours=DEFAULT_NEIGHBOURS):
+    """
+    Write all model artifacts into one directory; the manifest goes last
+
+    Args:
+        catalog_version: Catalog fingerprint (CorpusStream.catalog_version
+            or artifacts.compute_catalog_version)
+        lsa: Optional (projection, embeddings) from fit_lsa()
+        ann: Optional IVFIndex over the LSA embeddings
+        neighbours: Similar courses precomputed per course (0 to skip)
+
+    Returns:
+        dict: The written manifest
+    """
+    os.makedirs(artifacts_path, exist_ok=True)
+    _dump_atomic(vectorizer, os.path.join(artifacts_path, "tfidf_vectorizer.pkl"))
+    _dump_atomic(tfidf_matrix, os.path.join(artifacts_path, "course_tfidf_matrix.pkl"))
+
+    # Pickle-free copy that workers memory-map instead of unpickling
+    save_compact_artifacts(artifacts_path, vectorizer, tfidf_matrix)
+
+    projection, embeddings = lsa if lsa is not None else (None, None)
+    save_lsa_artifacts(artifacts_path, projection, embeddings)
+    save_ann_artifacts(artifacts_path, ann)
+
+    # Similar-course lists, so lookups need no per-request matrix math
+    if neighbours:
+        neighbour_rows, neighbour_scores = course_neighbours(tfidf_matrix, neighbours)
+        save_neighbour_artifacts(artifacts_path, neighbour_rows, neighbour_scores)
+        neighbours = int(neighbour_rows.shape[1])
+
+    # Manifest pins each matrix row to its course code
+    manifest = build_manifest(course_codes, tfidf_matrix, catalog_version)
+    fielded = isinstance(vectorizer, FieldedVectorizer)
+    field_vectorizer = vectorizer.vectorizers[0] if fielded else vectorizer
+    manifest["fields"] = list(vectorizer.fields) if fielded else []
+    manifest["hashing_features"] = (
+        field_vectorizer.n_features if isinstance(field_vectorizer, HashingTfidfVectorizer) else 0
+    )
+    manifest["lsa_dimensions"] = int(projection.shape[1]) if projection is not None else 0
+    manifest["ann_lists"] = ann.num_lists if ann is not None else 0
+    manifest["neighbours"] = neighbours
+    # Loading checks that queries will be cleaned the same way
+    manifest["preprocessing"] = preprocessing_fingerprint()
+    write_manifest(artifacts_path, manifest)
+    return manifest
+
+
+def build_models(batches, artifacts_root, hashing_features=0, lsa_dimensions=0, ann_lists=0,
+                 neighbours=DEFAULT_NEIGHBOURS, workers=1, progress=None, text_cache=None,
+                 fields=False):
+    """
+    Streaming build: clean, fit, and publish a new artifact version
+
+    The artifacts are written into a staging directory that becomes the
+    current version only once complete (see artifacts.publish_version).
+
+    Args:
+        batches: Iterable of lists of course documents in row order
+            (sorted by course_code for a stable order)
+        artifacts_root: Artifacts root directory
+        hashing_features: Use a HashingTfidfVectorizer with this many
+            columns (0 for a vocabulary-based TfidfVectorizer)
+        lsa_dimensions: Also fit an LSA stage of this size (0 to skip)
+        ann_lists: Also build an IVF index over the LSA embeddings (0 to
+            skip, None for the default size; needs lsa_dimensions)
+        neighbours: Similar courses precomputed per course (0 to skip)
+        workers: Processes cleaning text (1 cleans in this process)
+        progress: BuildProgress (default: silent)
+        text_cache: Optional CleanedTextCache; entries no live course used
+            are pruned after a successful build
+        fields: Build one column block per course field (ml/fields.py)
+
+    Returns:
+        dict: The written manifest, or None if there were no usable courses
+    """
+    started_at = time.time()
+    progress = progress or BuildProgress.quiet()
+    stream = CorpusStream(batches, workers, progress, text_cache, fields)
+
+    progress.start("read + clean + fit")
+    documents = iter(stream)
+    first = next(documents, None)
+    if first is None:
+        progress.finish()
+        return None
+    vectorizer, tfidf_matrix = fit_vectorizer(
+        itertools.chain([first], documents), hashing_features, fields=fields
+    )
+
+    lsa = ann = None
+    if lsa_dimensions:
+        progress.start("LSA")
+        lsa = fit_lsa(tfidf_matrix, lsa_dimensions)
+        if ann_lists != 0:
+            progress.start("IVF index")
+            ann = IVFIndex.build(lsa[1], ann_lists)
+
+    progress.start("write artifacts")
+    name, staging_path = create_version_dir(artifacts_root)
+    try:
+        manifest = save_model(
+            staging_path, vectorizer, tfidf_matrix, stream.course_codes, stream.catalog_version,
+            lsa, ann, neighbours
+        )
+        publish_version(artifacts_root, name, staging_path)
+    except BaseException:
+        shutil.rmtree(staging_path, ignore_errors=True)
+        raise
+    progress.finish()
+
+    manifest["artifact_version"] = name
+    manifest["skipped_courses"] = stream.skipped
+    if text_cache is not None:
+        text_cache.prune(started_at)
+        manifest["text_cache"] = text_cache.stats()
+    return manifest
+
+
+def rebuild(courses, artifacts_path, lsa_dimensions=0, ann_lists=0, hashing_features=0,
+            neighbours=DEFAULT_NEIGHBOURS, text_cache=None, fields=False, verbose=False):
+    """
+    Full rebuild from an in-memory course list (used by the engine's refit)
+
+    Args:
+        courses: Iterable of course documents
+        artifacts_path: Artifacts root directory
+        lsa_dimensions: Also fit an LSA stage of this size (0 to skip)
+        ann_lists: Also build an IVF index with this many clusters over the
+            LSA embeddings (0 to skip; needs lsa_dimensions)
+        hashing_features: Hashing vectorizer columns (0 for a vocabulary)
+        neighbours: Similar courses precomputed per course (0 to skip)
+        text_cache: Optional CleanedTextCache
+        fields: Build one column block per course field
+        verbose: Print progress
+
+    Returns:
+        dict: The written manifest, or None if there were no usable courses
+    """
+    courses = sorted(courses, key=lambda course: str(course.get('course_code') or ""))
+    return build_models(
+        iter_batches(courses),
+        artifacts_path,
+        hashing_features=hashing_features,
+        lsa_dimensions=lsa_dimensions,
+        ann_lists=ann_lists,
+        neighbours=neighbours,
+        progress=BuildProgress() if verbose else None,
+        text_cache=text_cache,
+        fields=fields
+    )
@@ -0,0 +1,205 @@
+"""
+Immutable model bundle
+Everything a request needs to score courses (vectorizer, matrices, row
+index, per-row side tables) packaged into one object. The engine swaps
+bundles with a single reference assignment, so a request that grabbed a
+bundle never sees a new vectorizer paired with an old matrix.
+"""
+import os
+import time
+
+import joblib
+import numpy as np
+
+from .artifacts import (
+    ArtifactMismatchError,
+    has_compact_artifacts,
+    load_ann_artifacts,
+    load_compact_artifacts,
+    load_lsa_artifacts,
+    load_neighbour_artifacts,
+    load_scoring_matrix,
+    load_term_bounds,
+    read_manifest,
+    resolve_artifacts_path,
+    validate_manifest
+)
+from .attributes import CourseAttributes
+from .drift import IndexDrift
+from .inverted_index import InvertedIndex
+from .preprocessing import preprocessing_fingerprint, wordnet_installed
+from .ratings import RatingsTable
+from .scoring import CosineScorer, DenseScorer
+
+
+class ModelBundle:
+    """
+    Read-only snapshot of a loaded model
+
+    Attributes are fixed after construction. The ratings table and course
+    attributes are side tables aligned to this bundle's row index; they are
+    updated in place under their own locks and start empty for every freshly
+    loaded bundle (the routes fill them lazily). Bundles derived by an
+    incremental edit (see ml/incremental.py) carry the ratings table over
+    and get an edited copy of the attributes.
+    """
+
+    def __init__(self, version, vectorizer, tfidf_matrix, scorer, manifest, artifact_format,
+                 course_index=None, ratings=None, attributes=None, tombstones=None, drift=None,
+                 index=None, dense=None, ann=None, neighbours=None):
+        course_codes = tuple(manifest["course_codes"])
+        if course_index is None:
+            course_index = {code: row for row, code in enumerate(course_codes)}
+
+        if tombstones is None:
+            tombstones = np.zeros(len(course_codes), dtype=bool)
+        tombstones.flags.writeable = False
+
+        fields = {
+            "version": version,
+            "vectorizer": vectorizer,
+            "tfidf_matrix": tfidf_matrix,
+            "scorer": scorer,
+            # Posting lists over the scorer's CSC matrix (shares its arrays)
+            "index": index if index is not None else InvertedIndex(scorer.matrix),
+            # DenseScorer over LSA embeddings, if the model has that stage
+            "dense": dense,
+            # IVF index over the dense embeddings, if built
+            "ann": ann,
+            # (rows, scores) of the precomputed similar courses per row, if built
+            "neighbours": neighbours,
+            "manifest": manifest,
+            "artifact_format": artifact_format,
+            "course_codes": course_codes,
+            "course_index": course_index,
+            "ratings": ratings if ratings is not None else RatingsTable(course_index),
+            "attributes": attributes if attributes is not None else CourseAttributes(course_index),
+            # Rows of deleted courses, kept until the next full refit
+            "tombstones": tombstones,
+            # Incremental edits applied since the vectorizer was fitted
+            "drift": drift if drift is not None else IndexDrift(version, len(course_codes)),
+            "loaded_at": time.time()
+        }
+        for name, value in fields.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ModelBundle is immutable; build a new bundle instead")
+
+    @property
+    def vocabulary_size(self):
+        return len(self.vectorizer.idf_)
+
+    def rows_for(self, course_codes):
+        """Map course codes to matrix rows (-1 for codes not in the model)"""
+        return np.array(
+            [self.course_index.get(code, -1) for code in course_codes],
+            dtype=np.int64
+        )
+
+
+def load_bundle(artifacts_path, verify_checksum=True):
+    """
+    Load model artifacts into a new ModelBundle
+
+    Prefers the compact .npy format (memory-mapped, shared between
+    workers) and falls back to the joblib pickles.
+
+    Args:
+        artifacts_path: Directory holding the model artifacts
+        verify_checksum: Hash the matrix against the manifest checksum
+
+    Returns:
+        ModelBundle
+
+    Raises:
+        FileNotFoundError: If the manifest or artifacts are missing
+        ArtifactMismatchError: If the artifacts are stale or misaligned
+    """
+    artifacts_path = resolve_artifacts_path(artifacts_path)
+    manifest = read_manifest(artifacts_path)
+    if manifest is None:
+        raise FileNotFoundError(f"Manifest not found in: {artifacts_path}")
+
+    scoring_matrix = None
+    term_bounds = None
+
+    if has_compact_artifacts(artifacts_path):
+        vectorizer, tfidf_matrix = load_compact_artifacts(artifacts_path)
+        scoring_matrix = load_scoring_matrix(artifacts_path)
+        term_bounds = load_term_bounds(artifacts_path)
+        artifact_format = "npy (memory-mapped)"
+    else:
+        vectorizer_path = os.path.join(artifacts_path, "tfidf_vectorizer.pkl")
+        matrix_path = os.path.join(artifacts_path, "course_tfidf_matrix.pkl")
+
+        if not os.path.exists(vectorizer_path):
+            raise FileNotFoundError(f"Vectorizer not found at: {vectorizer_path}")
+
+        if not os.path.exists(matrix_path):
+            raise FileNotFoundError(f"TF-IDF matrix not found at: {matrix_path}")
+
+        vectorizer = joblib.load(vectorizer_path)
+        tfidf_matrix = joblib.load(matrix_path)
+        artifact_format = "pickle"
+
+    validate_manifest(
+        manifest,
+        tfidf_matrix,
+        len(vectorizer.idf_),
+        verify_checksum=verify_checksum
+    )
+
+    # Queries must be cleaned the way the courses were (e.g. a model built
+    # with WordNet lemmas can't be queried without them); manifests written
+    # before the fingerprint was recorded aren't checked
+    built_with = manifest.get("preprocessing")
+    if built_with is not None and built_with != preprocessing_fingerprint():
+        raise ArtifactMismatchError(
+            f"Model was built with preprocessing {built_with} but this process uses "
+            f"{preprocessing_fingerprint()} (WordNet installed: {wordnet_installed()})"
+        )
+
+    dense = None
+    if manifest.get("lsa_dimensions"):
+        lsa = load_lsa_artifacts(artifacts_path)
+        if lsa is None:
+            raise ArtifactMismatchError("Manifest lists an LSA stage but lsa_*.npy are missing")
+        projection, embeddings = lsa
+        if embeddings.shape[0] != tfidf_matrix.shape[0] or projection.shape[0] != tfidf_matrix.shape[1]:
+            raise ArtifactMismatchError(
+                f"LSA arrays {embeddings.shape} / {projection.shape} don't match "
+                f"the TF-IDF matrix {tfidf_matrix.shape}"
+            )
+        dense = DenseScorer(embeddings, projection)
+
+    ann = None
+    if dense is not None and manifest.get("ann_lists"):
+        ann = load_ann_artifacts(artifacts_path)
+        if ann is None or ann.num_indexed != dense.num_rows:
+            raise ArtifactMismatchError("Manifest lists an ANN index but ann_*.npy are missing or stale")
+
+    neighbours = None
+    if manifest.get("neighbours"):
+        neighbours = load_neighbour_artifacts(artifacts_path)
+        if neighbours is None or neighbours[0].shape[0] != tfidf_matrix.shape[0]:
+            raise ArtifactMismatchError("Manifest lists neighbour lists but neighbour_*.npy are missing or stale")
+
+    # Normalize once here (or reuse the persisted copy) instead of per query
+    if scoring_matrix is not None:
+        scorer = CosineScorer(scoring_matrix, normalized=True)
+    else:
+        scorer = CosineScorer(tfidf_matrix)
+
+    return ModelBundle(
+        version=manifest.get("checksum", "")[:16],
+        vectorizer=vectorizer,
+        tfidf_matrix=tfidf_matrix,
+        scorer=scorer,
+        manifest=manifest,
+        artifact_format=artifact_format,
+        index=InvertedIndex(scorer.matrix, term_bounds),
+        dense=dense,
+        ann=ann,
+        neighbours=neighbours
+    )
@@ -0,0 +1,60 @@
+"""
+Precomputed course-to-course neighbour lists
+For every course, the top-N other courses by TF-IDF cosine similarity.
+The self-product of the normalized matrix is computed a block of rows at a
+time, so the full courses x courses similarity matrix never exists; each
+block is reduced to its top-N before the next one starts.
+"""
+import numpy as np
+
+from .scoring import SCORING_DTYPE, normalize_rows
+
+# Neighbours kept per course
+DEFAULT_NEIGHBOURS = 20
+
+# Dense similarity cells held at once (block rows x courses); 16M float32 = 64 MB
+BLOCK_CELLS = 1 << 24
+
+
+def course_neighbours(matrix, top_n=DEFAULT_NEIGHBOURS, block_cells=BLOCK_CELLS):
+    """
+    Top-N most similar courses for every course
+
+    Args:
+        matrix: courses x features TF-IDF matrix
+        top_n: Neighbours per course
+        block_cells: Upper bound on the dense block size (rows x courses)
+
+    Returns:
+        tuple: (rows, scores) - int32 and float32 arrays of shape
+        courses x top_n, best first. Courses with fewer than top_n
+        neighbours sharing a term are padded with row -1 and score 0.
+    """
+    normalized = normalize_rows(matrix)
+    transposed = normalized.T.tocsc()
+    num_rows = normalized.shape[0]
+    top_n = max(0, min(top_n, num_rows - 1))
+
+    rows = np.full((num_rows, top_n), -1, dtype=np.int32)
+    scores = np.zeros((num_rows, top_n), dtype=SCORING_DTYPE)
+    if top_n == 0:
+        return rows, scores
+
+    block_rows = max(1, block_cells // num_rows)
+    for start in range(0, num_rows, block_rows):
+        end = min(start + block_rows, num_rows)
+        block = (normalized[start:end] @ transposed).toarray()
+        # A course is not its own neighbour
+        block[np.arange(end - start), np.arange(start, end)] = 0.0
+
+        best = np.argpartition(-block, top_n - 1, axis=1)[:, :top_n]
+        best_scores = np.take_along_axis(block, best, axis=1)
+        order = np.lexsort((best, -best_scores), axis=1)
+        best = np.take_along_axis(best, order, axis=1)
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+
+        found = best_scores > 0
+        rows[start:end] = np.where(found, best, -1)
+        scores[start:end] = np.where(found, best_scores, 0.0)
+
+    return rows, scores
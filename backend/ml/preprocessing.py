@@ -1,19 +1,188 @@
+"""
+Text preprocessing shared by the model build and query scoring
+Stopwords come from a vendored copy of NLTK's English list
+(ml/resources/stopwords_en.txt). The WordNet lemmatizer is loaded on
+first use from a local nltk_data install; nothing here downloads, so
+importing this module never touches the network. Install WordNet once with:
+
+    python -m nltk.downloader wordnet
+
+Without it tokens are not lemmatized, which changes the vocabulary. The
+model build records preprocessing_fingerprint() in manifest.json and
+loading refuses artifacts built with a different one.
+
+Each distinct token is looked up once: its lemma (or "" for a stopword)
+is memoized, since course and query vocabularies are small and repetitive.
+"""
+import hashlib
+import importlib.util
+import os
 import re
-import nltk
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
+import sys
+import threading
+import warnings
+
+RESOURCES_DIR = os.path.join(os.path.dirname(__file__), "resources")
+STOPWORDS_FILE = os.path.join(RESOURCES_DIR, "stopwords_en.txt")
+
+# Bump whenever a change here alters preprocess_text() output; cached
+# cleaned text (ml/text_cache.py) is keyed on it
+PREPROCESSING_VERSION = 1
+
+# Distinct tokens memoized; later new tokens are lemmatized without being stored
+LEMMA_CACHE_SIZE = 200000
+
+_NON_LETTERS = re.compile(r"[^a-z\s]")
+
+_load_lock = threading.Lock()
+_stop_words = None
+_lemmatize = None
+_lemmatizer_name = None
+_token_memo = None
+
+
+def get_stop_words():
+    """NLTK's English stopword list, read from the vendored copy on first use"""
+    global _stop_words
+    if _stop_words is None:
+        with open(STOPWORDS_FILE, encoding="utf-8") as f:
+            _stop_words = frozenset(line.strip() for line in f if line.strip())
+    return _stop_words
+
+
+def _nltk_data_paths():
+    """The directories nltk.data.path searches by default (same order)"""
+    paths = [d for d in os.environ.get("NLTK_DATA", "").split(os.pathsep) if d]
+    paths.append(os.path.expanduser("~/nltk_data"))
+    paths += [
+        os.path.join(sys.prefix, "nltk_data"),
+        os.path.join(sys.prefix, "share", "nltk_data"),
+        os.path.join(sys.prefix, "lib", "nltk_data")
+    ]
+    if sys.platform.startswith("win"):
+        paths += [os.path.join(os.environ.get("APPDATA", "C:\\"), "nltk_data"),
+                  r"C:\nltk_data", r"D:\nltk_data", r"E:\nltk_data"]
+    else:
+        paths += ["/usr/share/nltk_data", "/usr/local/share/nltk_data", "/usr/lib/nltk_data", "/usr/local/lib/nltk_data"]
+    return paths
+
+
+def wordnet_installed():
+    """
+    Whether NLTK and its WordNet data are installed locally
+
+    Checked on disk, so the answer (and preprocessing_fingerprint()) costs
+    no nltk import.
+    """
+    if importlib.util.find_spec("nltk") is None:
+        return False
+    return any(
+        os.path.isdir(os.path.join(path, "corpora", "wordnet"))
+        or os.path.isfile(os.path.join(path, "corpora", "wordnet.zip"))
+        for path in _nltk_data_paths()
+    )
+
+
+def _load_lemmatizer():
+    """(name, lemmatize function): WordNet, or identity if it isn't installed locally"""
+    if not wordnet_installed():
+        warnings.warn(
+            "NLTK WordNet data not found; preprocessing without lemmatization. "
+            "Install it with: python -m nltk.downloader wordnet",
+            RuntimeWarning
+        )
+        return "identity", lambda token: token
+
+    from nltk.stem import WordNetLemmatizer
+
+    return "wordnet", WordNetLemmatizer().lemmatize
+
 
-nltk.download("stopwords")
-nltk.download("wordnet")
+def get_lemmatizer():
+    """The lemmatize function, loaded on first use"""
+    global _lemmatize, _lemmatizer_name
+    if _lemmatize is None:
+        with _load_lock:
+            if _lemmatize is None:
+                _lemmatizer_name, _lemmatize = _load_lemmatizer()
+    return _lemmatize
+
+
+def preprocessing_fingerprint():
+    """
+    Identifies what preprocess_text() produces in this process
+
+    Combines PREPROCESSING_VERSION, the stopword list and the lemmatizer
+    in use (WordNet, or identity when it isn't installed). Doesn't load
+    the lemmatizer.
+    """
+    lemmatizer = _lemmatizer_name or ("wordnet" if wordnet_installed() else "identity")
+    digest = hashlib.sha256(f"{PREPROCESSING_VERSION}\n{lemmatizer}\n".encode("utf-8"))
+    digest.update("\n".join(sorted(get_stop_words())).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+class _TokenMemo(dict):
+    """
+    token -> lemma, or "" for a stopword
+
+    Lookups that hit stay in C (dict.__getitem__); a miss calls
+    __missing__, which stores the result while the memo has room.
+    """
+
+    def __init__(self, stop_words, lemmatize, max_size=LEMMA_CACHE_SIZE):
+        super().__init__()
+        self.stop_words = stop_words
+        self.lemmatize = lemmatize
+        self.max_size = max_size
+        self.misses = 0
+
+    def __missing__(self, token):
+        self.misses += 1
+        lemma = "" if token in self.stop_words else self.lemmatize(token)
+        if len(self) < self.max_size:
+            self[token] = lemma
+        return lemma
+
+
+def _get_token_memo():
+    global _token_memo
+    if _token_memo is None:
+        _token_memo = _TokenMemo(get_stop_words(), get_lemmatizer())
+    return _token_memo
+
+
+def lemma_cache_info():
+    """Size and miss count of the token memo (None before first use)"""
+    if _token_memo is None:
+        return None
+    return {"size": len(_token_memo), "max_size": _token_memo.max_size, "misses": _token_memo.misses}
 
-stop_words = set(stopwords.words("english"))
-lemmatizer = WordNetLemmatizer()
 
 def preprocess_text(text):
-    text = text.lower()
-    text = re.sub(r"[^a-z\s]", "", text)
+    memo = _get_token_memo()
+
+    text = _NON_LETTERS.sub("", text.lower())
 
     tokens = text.split()
-    tokens = [lemmatizer.lemmatize(t) for t in tokens if t not in stop_words]
+    tokens = filter(None, map(memo.__getitem__, tokens))
 
     return " ".join(tokens)
+
+
+def preprocess_many(texts):
+    """
+    preprocess_text() over many documents
+
+    Resolves the token memo and regex once for the whole batch.
+
+    Args:
+        texts: Iterable of strings
+
+    Returns:
+        list of cleaned strings, in input order
+    """
+    lookup = _get_token_memo().__getitem__
+    sub = _NON_LETTERS.sub
+
+    return [" ".join(filter(None, map(lookup, sub("", text.lower()).split()))) for text in texts]
@@ -0,0 +1,61 @@
+"""
+Bounded LRU cache for vectorized user queries
+Many students share identical preference signatures, so the cleaned and
+vectorized query (and optionally its score vector) is reused instead of
+re-running lemmatization and vectorizer.transform.
+"""
+import threading
+from collections import OrderedDict
+
+
+class QueryCache:
+    """Thread-safe LRU cache with hit/miss counters"""
+
+    def __init__(self, max_size=1024):
+        """
+        Args:
+            max_size: Maximum number of entries (0 disables caching)
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached value for key (None on a miss)"""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Insert or refresh an entry, evicting the least recently used"""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop all entries (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Cache size and hit/miss counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
@@ -0,0 +1,116 @@
+"""
+In-memory course rating aggregates
+Per-course (sum, count) held as NumPy arrays aligned to the model row
+index, so collaborative scores are a single vector division.
+"""
+import threading
+import time
+
+import numpy as np
+
+MAX_RATING = 5.0
+
+
+class RatingsTable:
+    """
+    Rating sums and counts per course, one slot per TF-IDF matrix row
+
+    Loaded once from a MongoDB $group aggregation and then kept current
+    by the feedback routes (add / update / remove). Each worker process
+    holds its own copy, so writes made through other workers only show
+    up after the next refresh (see needs_refresh).
+    """
+
+    def __init__(self, course_index):
+        """
+        Args:
+            course_index: Dict of course_code -> matrix row
+        """
+        self.course_index = course_index
+        self.sums = np.zeros(len(course_index))
+        self.counts = np.zeros(len(course_index), dtype=np.int64)
+        self.is_loaded = False
+        self.loaded_at = None
+        self._scores = None
+        self._lock = threading.Lock()
+
+    def load(self, aggregates):
+        """
+        Replace the table contents with fresh aggregates
+
+        Args:
+            aggregates: Iterable of {"_id": course_code, "sum": total, "count": n}
+                (the output of a $group on course_code)
+        """
+        sums = np.zeros(len(self.course_index))
+        counts = np.zeros(len(self.course_index), dtype=np.int64)
+
+        for aggregate in aggregates:
+            row = self.course_index.get(aggregate.get("_id"))
+            if row is not None:
+                sums[row] = aggregate.get("sum", 0)
+                counts[row] = aggregate.get("count", 0)
+
+        with self._lock:
+            self.sums, self.counts = sums, counts
+            self._scores = None
+            self.is_loaded = True
+            self.loaded_at = time.time()
+
+    def resized(self, course_index):
+        """
+        Copy of this table for a grown row index (rows are only appended)
+
+        Args:
+            course_index: New dict of course_code -> matrix row
+        """
+        table = RatingsTable(course_index)
+        with self._lock:
+            size = len(self.sums)
+            table.sums[:size] = self.sums
+            table.counts[:size] = self.counts
+            table.is_loaded = self.is_loaded
+            table.loaded_at = self.loaded_at
+        return table
+
+    def needs_refresh(self, max_age):
+        """True if never loaded or loaded more than max_age seconds ago"""
+        return not self.is_loaded or time.time() - self.loaded_at > max_age
+
+    def _apply(self, course_code, delta_sum, delta_count):
+        row = self.course_index.get(course_code)
+        if row is None or not self.is_loaded:
+            return
+
+        with self._lock:
+            self.sums[row] += delta_sum
+            self.counts[row] += delta_count
+            self._scores = None
+
+    def add(self, course_code, rating):
+        """Record a new rating"""
+        self._apply(course_code, rating, 1)
+
+    def update(self, course_code, old_rating, new_rating):
+        """Record a changed rating"""
+        self._apply(course_code, new_rating - old_rating, 0)
+
+    def remove(self, course_code, rating):
+        """Record a deleted rating"""
+        self._apply(course_code, -rating, -1)
+
+    def scores(self):
+        """
+        Average rating per course normalized to 0-1 (0 for unrated courses)
+
+        Returns:
+            numpy array aligned with the model row index
+        """
+        scores = self._scores
+        if scores is None:
+            with self._lock:
+                scores = np.zeros(len(self.sums))
+                np.divide(self.sums, self.counts, out=scores, where=self.counts > 0)
+                scores /= MAX_RATING
+                self._scores = scores
+        return scores
@@ -2,11 +2,37 @@
 Unified Recommendation Engine
 Combines content-based, collaborative filtering, and hybrid recommendations
 """
-import joblib
 import os
+import threading
+import time
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
-from .preprocessing import preprocess_text
+from scipy import sparse
+from .preprocessing import preprocess_many, preprocess_text
+from .scoring import top_k as select_top_k
+from .ratings import MAX_RATING, RatingsTable
+from .attributes import CourseAttributes
+from .query_cache import QueryCache
+from .artifacts import ArtifactMismatchError
+from .model_bundle import load_bundle
+from .ann import DEFAULT_NPROBE
+from .fields import DEFAULT_FIELD_WEIGHTS, FieldedVectorizer, validate_field_weights
+from . import incremental, model_builder
+
+# Content scoring modes: sparse TF-IDF cosine, or dense LSA embeddings
+# (falls back to sparse when the loaded model has no LSA stage)
+SCORING_MODES = ("sparse", "lsa")
+
+# Kulliyyah preference boost (scores in percent)
+KULLIYYAH_BOOST = 1.5
+KULLIYYAH_BOOST_FLOOR = 10
+MAX_SCORE = 99
+
+# Content weight (alpha) by the user's feedback count: each (limit, alpha)
+# step applies to users with fewer than `limit` entries, checked in order;
+# users past the last step get MIN_ALPHA. sweep_models.py compares others.
+ALPHA_SCHEDULE = ((1, 0.9), (5, 0.8), (20, 0.6))
+MIN_ALPHA = 0.3
+
 
 class RecommendationEngine:
     """
@@ -16,179 +42,844 @@ class RecommendationEngine:
     - Collaborative filtering
     - Hybrid recommendations
     - Model evaluation
+
+    The loaded model lives in an immutable ModelBundle. Reloading builds a
+    complete new bundle and publishes it with a single reference
+    assignment, so in-flight requests keep scoring against the bundle they
+    started with. Scoring methods take an optional bundle argument; callers
+    that make several calls for one request should read self.bundle once
+    and pass it to each call.
+
+    Catalog edits are applied incrementally (upsert_course / remove_course)
+    by deriving a new bundle from the current one; refit_models() runs the
+    full rebuild once the drift thresholds say the fitted IDF is stale.
+
+    Models built with per-field blocks (`rebuild_models.py --fields`)
+    weigh fields at query time; set_field_weights() takes effect on the
+    next query without a refit.
     """
-    
-    def __init__(self, artifacts_path="ml/artifacts"):
+
+    def __init__(self, artifacts_path="ml/artifacts", query_cache_size=1024, cache_scores=True,
+                 scoring_mode="sparse", ann_nprobe=DEFAULT_NPROBE, alpha_schedule=ALPHA_SCHEDULE,
+                 min_alpha=MIN_ALPHA, field_weights=None):
+        """
+        Args:
+            artifacts_path: Directory holding the model artifacts
+            query_cache_size: Max cached queries (0 disables the cache)
+            cache_scores: Also cache each query's content score vector
+                (one float per course per entry)
+            scoring_mode: "sparse" (TF-IDF cosine) or "lsa" (dense embeddings;
+                needs a model built with `rebuild_models.py --lsa N`)
+            ann_nprobe: IVF clusters probed by content_top_k() in LSA mode
+                when the model has an ANN index (`--ann`); higher is
+                slower but closer to the exact ranking
+            alpha_schedule: (limit, alpha) steps used by adaptive_alpha()
+            min_alpha: adaptive_alpha() for users past the last step
+            field_weights: Field -> weight for multi-field models
+                (defaults to DEFAULT_FIELD_WEIGHTS)
+        """
+        if scoring_mode not in SCORING_MODES:
+            raise ValueError(f"Unknown scoring mode: {scoring_mode}")
+
         self.artifacts_path = artifacts_path
-        self.vectorizer = None
-        self.tfidf_matrix = None
-        self.is_loaded = False
-        
-    def load_models(self):
-        """Load TF-IDF models from disk"""
+        self.scoring_mode = scoring_mode
+        self.ann_nprobe = ann_nprobe
+        self.alpha_schedule = tuple(alpha_schedule)
+        self.min_alpha = min_alpha
+        self._field_weights = tuple(sorted(DEFAULT_FIELD_WEIGHTS.items()))
+        if field_weights:
+            self.set_field_weights(field_weights)
+        self.query_cache = QueryCache(query_cache_size)
+        self.cache_scores = cache_scores
+        self._bundle = None
+        self._reload_lock = threading.Lock()
+        # Serializes publishing: incremental edits are read-modify-write
+        self._publish_lock = threading.Lock()
+        # Edits made while a reload runs, replayed onto the reloaded bundle
+        self._pending_edits = {}
+        self.reload_in_progress = False
+        self.last_reload_at = None
+        self.last_reload_error = None
+        # Placeholders so write-through updates are no-ops before a model loads
+        self._empty_ratings = RatingsTable({})
+        self._empty_attributes = CourseAttributes({})
+
+    # =============== MODEL BUNDLE ===============
+
+    @property
+    def bundle(self):
+        """The currently published ModelBundle (None until models load)"""
+        return self._bundle
+
+    @property
+    def is_loaded(self):
+        return self._bundle is not None
+
+    @property
+    def model_version(self):
+        return self._bundle.version if self._bundle is not None else None
+
+    @property
+    def vectorizer(self):
+        return self._bundle.vectorizer if self._bundle is not None else None
+
+    @property
+    def tfidf_matrix(self):
+        return self._bundle.tfidf_matrix if self._bundle is not None else None
+
+    @property
+    def scorer(self):
+        return self._bundle.scorer if self._bundle is not None else None
+
+    @property
+    def manifest(self):
+        return self._bundle.manifest if self._bundle is not None else None
+
+    @property
+    def course_codes(self):
+        return self._bundle.course_codes if self._bundle is not None else ()
+
+    @property
+    def course_index(self):
+        return self._bundle.course_index if self._bundle is not None else {}
+
+    @property
+    def ratings(self):
+        return self._bundle.ratings if self._bundle is not None else self._empty_ratings
+
+    @property
+    def attributes(self):
+        return self._bundle.attributes if self._bundle is not None else self._empty_attributes
+
+    @property
+    def field_weights(self):
+        """Field -> weight applied to queries against multi-field models"""
+        return dict(self._field_weights)
+
+    def set_field_weights(self, weights):
+        """
+        Change field weights; queries use them from the next call on
+
+        Args:
+            weights: Field -> weight; fields left out keep their weight
+
+        Raises:
+            ValueError: Unknown field or invalid weights
+        """
+        merged = {**self.field_weights, **weights}
+        validate_field_weights(merged)
+        # One reference assignment; cache keys include the weights
+        self._field_weights = tuple(sorted((field, float(weight)) for field, weight in merged.items()))
+
+    def vectorize_queries(self, cleaned_queries, bundle, field_weights=None):
+        """
+        Query TF-IDF rows, field-weighted for multi-field models
+
+        Args:
+            cleaned_queries: Preprocessed query strings
+            bundle: ModelBundle to vectorize against
+            field_weights: (field, weight) pairs (defaults to the current ones)
+
+        Returns:
+            CSR matrix (queries x features)
+        """
+        query_matrix = bundle.vectorizer.transform(cleaned_queries)
+        if isinstance(bundle.vectorizer, FieldedVectorizer):
+            query_matrix = bundle.vectorizer.weigh(query_matrix, dict(field_weights or self._field_weights))
+        return query_matrix
+
+    @property
+    def vocabulary_size(self):
+        """Number of features in the loaded vectorizer"""
+        return self._bundle.vocabulary_size if self._bundle is not None else 0
+
+    def uses_lsa(self, bundle=None):
+        """True if content scores for the bundle come from LSA embeddings"""
+        bundle = bundle if bundle is not None else self._bundle
+        return self.scoring_mode == "lsa" and bundle is not None and bundle.dense is not None
+
+    def _resolve(self, bundle):
+        """Use the given bundle, or the published one"""
+        if bundle is None:
+            bundle = self._bundle
+        if bundle is None:
+            raise RuntimeError("Models not loaded. Call load_models() first.")
+        return bundle
+
+    def load_models(self, verify_checksum=True):
+        """
+        Load TF-IDF models from disk and publish them
+
+        The new bundle is built completely before the swap; if loading
+        fails, the previously published bundle (if any) stays in service.
+
+        Args:
+            verify_checksum: Hash the matrix against the manifest checksum
+        """
         try:
-            vectorizer_path = os.path.join(self.artifacts_path, "tfidf_vectorizer.pkl")
-            matrix_path = os.path.join(self.artifacts_path, "course_tfidf_matrix.pkl")
+            bundle = load_bundle(self.artifacts_path, verify_checksum=verify_checksum)
+
+        except FileNotFoundError as e:
+            print(f"❌ {e}")
+            print("   Run 'python rebuild_models.py' to rebuild models")
+            self.last_reload_error = str(e)
+            return False
+
+        except ArtifactMismatchError as e:
+            print(f"❌ Model artifacts are stale or misaligned: {e}")
+            print("   Run 'python rebuild_models.py' to rebuild models")
+            self.last_reload_error = str(e)
+            return False
+
+        except Exception as e:
+            print(f"❌ Error loading models: {e}")
+            self.last_reload_error = str(e)
+            return False
+
+        with self._publish_lock:
+            # The reload may have read the catalog before these edits landed
+            for course_code, course in self._pending_edits.items():
+                bundle = self._apply_edit(bundle, course_code, course)
+            self._pending_edits.clear()
             
-            if not os.path.exists(vectorizer_path):
-                print(f"❌ Vectorizer not found at: {vectorizer_path}")
+            # Publish: a single reference assignment, atomic for readers.
+            # Later edits apply to this bundle only, so stop queueing them
+            self._bundle = bundle
+            self.reload_in_progress = False
+        # Entries are keyed by bundle version, so this only frees memory
+        self.query_cache.clear()
+        self.last_reload_at = time.time()
+        self.last_reload_error = None
+
+        manifest = bundle.manifest
+        print(f"✅ Loaded TF-IDF models ({bundle.artifact_format}), version {bundle.version}")
+        if self.scoring_mode == "lsa" and bundle.dense is None:
+            print("⚠️  LSA scoring requested but the model has no LSA stage; using sparse scoring")
+            print("   Run 'python rebuild_models.py --lsa 128' to add one")
+        print(f"   Vocabulary size: {bundle.vocabulary_size}")
+        print(f"   Matrix shape: {bundle.tfidf_matrix.shape}")
+        print(f"   Catalog version: {manifest.get('catalog_version')} (built {manifest.get('built_at')})")
+        return True
+
+    def _run_exclusive(self, task, background):
+        """Run a reload-type task, at most one at a time"""
+        if not self._reload_lock.acquire(blocking=not background):
+            return False
+
+        with self._publish_lock:
+            self.reload_in_progress = True
+
+        def run():
+            try:
+                return task()
+            finally:
+                # After a failed reload the queued edits are already in the
+                # live bundle; replaying them on a later reload could
+                # overwrite newer edits of the same course
+                with self._publish_lock:
+                    self._pending_edits.clear()
+                    self.reload_in_progress = False
+                self._reload_lock.release()
+
+        if background:
+            threading.Thread(target=run, name="model-reload", daemon=True).start()
+            return True
+        return run()
+
+    def reload_models(self, background=False):
+        """
+        Reload models (useful after rebuilding)
+
+        Args:
+            background: Load in a daemon thread and return immediately;
+                requests keep using the current bundle until the swap
+
+        Returns:
+            bool: Load result when synchronous; when background, whether a
+            reload was started (False if one is already running)
+        """
+        return self._run_exclusive(self.load_models, background)
+
+    def refit_models(self, load_courses, background=False):
+        """
+        Full rebuild from the catalog, then reload
+
+        Args:
+            load_courses: Callable returning an iterable of course documents
+                (called on the worker thread when background is True)
+            background: Run in a daemon thread and return immediately
+
+        Returns:
+            bool: Same convention as reload_models()
+        """
+        def task():
+            try:
+                current = self._bundle
+                manifest = current.manifest if current is not None else {}
+                manifest = model_builder.rebuild(
+                    load_courses(), self.artifacts_path,
+                    lsa_dimensions=manifest.get("lsa_dimensions", 0),
+                    ann_lists=manifest.get("ann_lists", 0),
+                    hashing_features=manifest.get("hashing_features", 0),
+                    neighbours=manifest.get("neighbours", model_builder.DEFAULT_NEIGHBOURS),
+                    fields=bool(manifest.get("fields"))
+                )
+            except Exception as e:
+                print(f"❌ Error rebuilding models: {e}")
+                self.last_reload_error = str(e)
+                return False
+
+            if manifest is None:
+                self.last_reload_error = "No courses found to build models from"
                 return False
-                
-            if not os.path.exists(matrix_path):
-                print(f"❌ TF-IDF matrix not found at: {matrix_path}")
+            return self.load_models()
+
+        return self._run_exclusive(task, background)
+
+    # =============== INCREMENTAL EDITS ===============
+
+    def _apply_edit(self, bundle, course_code, course):
+        """Bundle with one edit applied (course None means deleted)"""
+        if course is None:
+            return incremental.remove_course(bundle, course_code) or bundle
+        return incremental.upsert_course(bundle, course)
+
+    def _publish_edit(self, course_code, course):
+        with self._publish_lock:
+            if self.reload_in_progress:
+                self._pending_edits[course_code] = course
+
+            bundle = self._bundle
+            if bundle is None:
+                return False
+
+            try:
+                self._bundle = self._apply_edit(bundle, course_code, course)
+            except Exception as e:
+                print(f"❌ Error applying incremental edit for {course_code}: {e}")
                 return False
-            
-            self.vectorizer = joblib.load(vectorizer_path)
-            self.tfidf_matrix = joblib.load(matrix_path)
-            self.is_loaded = True
-            
-            print(f"✅ Loaded TF-IDF models")
-            print(f"   Vocabulary size: {len(self.vectorizer.vocabulary_)}")
-            print(f"   Matrix shape: {self.tfidf_matrix.shape}")
             return True
-            
-        except Exception as e:
-            print(f"❌ Error loading models: {e}")
-            self.is_loaded = False
-            return False
-    
-    def reload_models(self):
-        """Reload models (useful after rebuilding)"""
-        return self.load_models()
-    
-    def compute_content_similarity(self, user_query):
+
+    def upsert_course(self, course):
+        """
+        Index a created or edited course into the live model
+
+        Uses the fitted vocabulary and IDF; see needs_refit().
+
+        Args:
+            course: Full course document
+
+        Returns:
+            bool: True if applied (False when no model is loaded)
+        """
+        return self._publish_edit(course.get("course_code"), course)
+
+    def remove_course(self, course_code):
+        """
+        Tombstone a deleted course in the live model
+
+        Returns:
+            bool: True if applied (False when no model is loaded)
+        """
+        return self._publish_edit(course_code, None)
+
+    def needs_refit(self):
+        """True once incremental edits have drifted past the refit thresholds"""
+        bundle = self._bundle
+        return bundle is not None and bundle.drift.needs_refit()
+
+    def rows_for(self, course_codes, bundle=None):
+        """
+        Map course codes to TF-IDF matrix rows
+
+        Args:
+            course_codes: List of course codes
+            bundle: Optional ModelBundle (defaults to the published one)
+
+        Returns:
+            numpy array of row indices (-1 for codes not in the model)
+        """
+        return self._resolve(bundle).rows_for(course_codes)
+
+    def compute_content_similarity(self, user_query, course_codes=None, bundle=None):
         """
         Compute content-based similarity scores using TF-IDF
-        
+
         Args:
             user_query: String containing user interests/preferences
-            
+            course_codes: Optional subset of course codes to score
+                (defaults to every course in the model, in row order)
+            bundle: Optional ModelBundle (defaults to the published one)
+
         Returns:
-            numpy array of similarity scores for all courses
+            numpy array of similarity scores, aligned with course_codes
         """
-        if not self.is_loaded:
-            raise RuntimeError("Models not loaded. Call load_models() first.")
-        
-        # Preprocess and vectorize user query
-        cleaned_query = preprocess_text(user_query)
-        query_vector = self.vectorizer.transform([cleaned_query])
-        
-        # Compute cosine similarity
-        similarity_scores = cosine_similarity(query_vector, self.tfidf_matrix).flatten()
-        
-        return similarity_scores
-    
-    def compute_collaborative_scores(self, course_codes, feedback_docs):
+        bundle = self._resolve(bundle)
+
+        # Identical queries against the same model reuse the cached work
+        field_weights = self._field_weights
+        cache_key = (user_query, bundle.version, field_weights)
+        cached = self.query_cache.get(cache_key)
+
+        if cached is not None and cached.get("scores") is not None:
+            similarity_scores = cached["scores"]
+        else:
+            if cached is not None:
+                query_vector = cached["vector"]
+            else:
+                # Preprocess and vectorize user query
+                cleaned_query = preprocess_text(user_query)
+                query_vector = self.vectorize_queries([cleaned_query], bundle, field_weights)
+
+            if self.uses_lsa(bundle):
+                # Dense LSA cosine (one BLAS mat-vec); negatives count as no match
+                similarity_scores = np.maximum(bundle.dense.score(query_vector), 0.0)
+            else:
+                # Cosine similarity, accumulated only over courses that share
+                # a term with the query; every other course scores 0
+                rows, values = bundle.index.candidates(query_vector)
+                similarity_scores = np.zeros(len(bundle.course_codes))
+                similarity_scores[rows] = values
+            similarity_scores.flags.writeable = False
+
+            self.query_cache.put(cache_key, {
+                "vector": query_vector,
+                "scores": similarity_scores if self.cache_scores else None
+            })
+
+        if course_codes is None:
+            return similarity_scores
+
+        # Pick out the requested rows; codes unknown to the model get 0
+        rows = bundle.rows_for(course_codes)
+        return np.where(rows >= 0, similarity_scores[rows], 0.0)
+
+    def _query_vector(self, user_query, bundle):
+        """Query TF-IDF row, from the query cache when possible"""
+        field_weights = self._field_weights
+        cache_key = (user_query, bundle.version, field_weights)
+        cached = self.query_cache.get(cache_key)
+
+        if cached is not None:
+            return cached["vector"]
+
+        query_vector = self.vectorize_queries([preprocess_text(user_query)], bundle, field_weights)
+        self.query_cache.put(cache_key, {"vector": query_vector, "scores": None})
+        return query_vector
+
+    def content_top_k(self, user_query, top_k=10, mask=None, bundle=None):
+        """
+        Top-K courses by content similarity alone
+
+        Sparse mode uses the inverted index with MaxScore early termination
+        instead of scoring the whole catalog; LSA mode searches the IVF
+        index (approximate, ann_nprobe clusters) when the model has one,
+        otherwise takes one dense mat-vec plus a partial sort.
+
+        Args:
+            user_query: String containing user interests/preferences
+            top_k: Number of courses to return
+            mask: Optional boolean array over model rows; False rows are skipped
+            bundle: Optional ModelBundle (defaults to the published one)
+
+        Returns:
+            List of tuples: [(course_code, score), ...], best first
+        """
+        bundle = self._resolve(bundle)
+        query_vector = self._query_vector(user_query, bundle)
+
+        if mask is None:
+            mask = ~bundle.tombstones
+        else:
+            mask = mask & ~bundle.tombstones
+
+        if self.uses_lsa(bundle):
+            rows, scores = self.search(query_vector, top_k, self.ann_nprobe, mask, bundle)
+        else:
+            rows, scores = bundle.index.search(query_vector, top_k, mask)
+        return [(bundle.course_codes[row], float(score)) for row, score in zip(rows, scores)]
+
+    def keyword_search(self, query, top_k=10, bundle=None):
+        """
+        Courses ranked by TF-IDF relevance to a search query
+
+        Always scores through the sparse inverted index, whatever the
+        scoring mode, so only courses sharing a term with the query are
+        returned and the cost follows the query terms' posting lists
+        rather than the catalog size.
+
+        Args:
+            query: Search string
+            top_k: Number of courses to return
+            bundle: Optional ModelBundle (defaults to the published one)
+
+        Returns:
+            List of tuples: [(course_code, score), ...], best first
+        """
+        bundle = self._resolve(bundle)
+        query_vector = self._query_vector(query, bundle)
+        rows, scores = bundle.index.search(query_vector, top_k, ~bundle.tombstones)
+        return [(bundle.course_codes[row], float(score)) for row, score in zip(rows, scores)]
+
+    def search(self, query_vec, k=10, nprobe=DEFAULT_NPROBE, mask=None, bundle=None):
+        """
+        Nearest courses to a query vector in the LSA embedding space
+
+        Uses the IVF index when the model has one: only the nprobe closest
+        clusters are scored, so larger nprobe means higher recall and
+        higher latency. Without an index every course is scored exactly.
+
+        Args:
+            query_vec: 1 x features TF-IDF query (sparse), or an embedding
+                of the model's LSA dimensions
+            k: Number of results
+            nprobe: IVF clusters to scan
+            mask: Optional boolean array over model rows; False rows are skipped
+            bundle: Optional ModelBundle (defaults to the published one)
+
+        Returns:
+            tuple: (rows, scores) as arrays, best first; negative
+            similarities are clipped to 0
+        """
+        bundle = self._resolve(bundle)
+        if bundle.dense is None:
+            raise RuntimeError("Model has no LSA stage (rebuild with --lsa N)")
+
+        if sparse.issparse(query_vec):
+            query_embedding = bundle.dense.embed(query_vec)[0]
+        else:
+            query_embedding = np.asarray(query_vec, dtype=bundle.dense.embeddings.dtype).ravel()
+
+        tombstones = ~bundle.tombstones
+        mask = tombstones if mask is None else mask & tombstones
+
+        if bundle.ann is not None:
+            rows, scores = bundle.ann.search(bundle.dense.embeddings, query_embedding, k, nprobe, mask)
+        else:
+            rows, scores = select_top_k(bundle.dense.embeddings @ query_embedding, k, mask)
+        return rows, np.maximum(scores, 0.0)
+
+    def similar_courses(self, course_code, top_k=10, bundle=None):
+        """
+        Courses most similar to a given course by content
+
+        Served from the neighbour lists precomputed by the model build (a
+        row lookup). Courses added or edited since the build, and requests
+        for more neighbours than were stored, are scored live through the
+        inverted index instead.
+
+        Args:
+            course_code: Course to find neighbours for
+            top_k: Number of courses to return
+            bundle: Optional ModelBundle (defaults to the published one)
+
+        Returns:
+            List of tuples: [(course_code, score), ...], best first, or
+            None if the course is not in the model
+        """
+        bundle = self._resolve(bundle)
+        row = bundle.course_index.get(course_code)
+        if row is None or bundle.tombstones[row]:
+            return None
+
+        if (bundle.neighbours is not None and row < len(bundle.neighbours[0])
+                and row not in bundle.drift.changed_rows and top_k <= bundle.neighbours[0].shape[1]):
+            rows, scores = bundle.neighbours[0][row], bundle.neighbours[1][row]
+            keep = rows >= 0
+            rows, scores = rows[keep], scores[keep]
+            keep = ~bundle.tombstones[rows]
+            rows, scores = rows[keep][:top_k], scores[keep][:top_k]
+        else:
+            mask = ~bundle.tombstones
+            mask[row] = False
+            rows, scores = bundle.index.search(bundle.scorer.matrix[row], top_k, mask)
+
+        return [(bundle.course_codes[r], float(score)) for r, score in zip(rows, scores)]
+
+    def compute_collaborative_scores(self, course_codes=None, feedback_docs=None, bundle=None):
         """
         Compute collaborative filtering scores based on user feedback
-        
+
         Args:
-            course_codes: List of course codes in order (matching courses)
-            feedback_docs: List of feedback documents from MongoDB
-            
+            course_codes: Optional list of course codes to score
+                (defaults to every course in the model, in row order)
+            feedback_docs: Optional list of feedback documents to aggregate;
+                if None, uses the bundle's in-memory ratings table
+            bundle: Optional ModelBundle (defaults to the published one)
+
         Returns:
             numpy array of collaborative scores (normalized 0-1)
         """
-        # Initialize scores for all courses
-        scores = {code: 0.0 for code in course_codes}
-        counts = {code: 0 for code in course_codes}
-        
-        # Aggregate ratings from feedback
-        for feedback in feedback_docs:
-            course_code = feedback.get("course_code")
-            rating = feedback.get("rating", 0)
-            
-            if course_code in scores:
-                scores[course_code] += rating
-                counts[course_code] += 1
-        
-        # Calculate average ratings and normalize to 0-1 range
-        for code in scores:
-            if counts[code] > 0:
-                avg_rating = scores[code] / counts[code]
-                scores[code] = avg_rating / 5.0  # Normalize (assuming 5-star scale)
-        
-        # Return as numpy array in the same order as course_codes
-        return np.array([scores[code] for code in course_codes])
-    
-    def adaptive_alpha(self, num_feedback, min_alpha=0.3, max_alpha=0.9):
+        bundle = self._resolve(bundle)
+
+        if feedback_docs is None:
+            scores = bundle.ratings.scores()
+        else:
+            # Aggregate the given feedback per model row
+            rows = bundle.rows_for([feedback.get("course_code") for feedback in feedback_docs])
+            ratings = np.array([feedback.get("rating", 0) for feedback in feedback_docs], dtype=np.float64)
+            known = rows >= 0
+            num_courses = len(bundle.course_codes)
+            sums = np.bincount(rows[known], weights=ratings[known], minlength=num_courses)
+            counts = np.bincount(rows[known], minlength=num_courses)
+            scores = np.zeros(num_courses)
+            np.divide(sums, counts, out=scores, where=counts > 0)
+            scores /= MAX_RATING  # Normalize (assuming 5-star scale)
+
+        if course_codes is None:
+            return scores
+
+        rows = bundle.rows_for(course_codes)
+        return np.where(rows >= 0, scores[rows], 0.0)
+
+    def adaptive_alpha(self, num_feedback, schedule=None, min_alpha=None):
         """
         Calculate adaptive weight for content-based vs collaborative filtering
-        
+
+        With the default schedule: 0.9 without feedback (mostly content),
+        0.8 below 5 entries, 0.6 below 20, then 0.3 (more collaborative).
+
         Args:
             num_feedback: Number of feedback entries available
-            min_alpha: Minimum weight for content (when lots of feedback)
-            max_alpha: Maximum weight for content (when no feedback)
-            
+            schedule: (limit, alpha) steps (defaults to the engine's)
+            min_alpha: Weight past the last step (defaults to the engine's)
+
         Returns:
-            alpha value between min_alpha and max_alpha
-        """
-        if num_feedback == 0:
-            return max_alpha  # Pure content-based
-        elif num_feedback < 5:
-            return 0.8  # Mostly content
-        elif num_feedback < 20:
-            return 0.6  # Balanced
-        else:
-            return min_alpha  # More collaborative
-    
-    def hybrid_recommend(self, user_query, course_codes, feedback_docs, alpha=None):
+            alpha value (content weight)
+        """
+        if schedule is None:
+            schedule = self.alpha_schedule
+        if min_alpha is None:
+            min_alpha = self.min_alpha
+
+        for limit, alpha in schedule:
+            if num_feedback < limit:
+                return alpha
+        return min_alpha
+
+    def hybrid_recommend(self, user_query, course_codes=None, feedback_docs=None, alpha=None,
+                         num_feedback=None, bundle=None):
         """
         Generate hybrid recommendations combining content and collaborative filtering
-        
+
         Args:
             user_query: User interests as text
-            course_codes: List of course codes (in order matching TF-IDF matrix)
-            feedback_docs: List of feedback documents
+            course_codes: Optional list of course codes to score
+                (defaults to the bundle's course codes, i.e. TF-IDF row order)
+            feedback_docs: Optional list of feedback documents to aggregate;
+                if None, collaborative scores come from the ratings table
             alpha: Optional fixed weight for content (if None, uses adaptive)
-            
+            num_feedback: User's feedback count for adaptive alpha
+                (defaults to len(feedback_docs))
+            bundle: Optional ModelBundle (defaults to the published one)
+
         Returns:
             tuple: (final_scores, alpha_used, content_scores, collab_scores)
         """
-        if not self.is_loaded:
-            raise RuntimeError("Models not loaded. Call load_models() first.")
-        
+        bundle = self._resolve(bundle)
+
         # Compute content-based scores
-        content_scores = self.compute_content_similarity(user_query)
-        
+        content_scores = self.compute_content_similarity(user_query, course_codes, bundle=bundle)
+
         # Compute collaborative filtering scores
-        collab_scores = self.compute_collaborative_scores(course_codes, feedback_docs)
-        
+        collab_scores = self.compute_collaborative_scores(course_codes, feedback_docs, bundle=bundle)
+
         # Determine alpha (content weight)
+        if num_feedback is None:
+            num_feedback = len(feedback_docs) if feedback_docs is not None else 0
         if alpha is None:
-            alpha = self.adaptive_alpha(len(feedback_docs))
-        
+            alpha = self.adaptive_alpha(num_feedback)
+
         # Normalize scores to 0-1 range for fair combination
         content_scores_norm = content_scores  # Already 0-1 from cosine similarity
-        
+
         # Combine scores
         final_scores = alpha * content_scores_norm + (1 - alpha) * collab_scores
-        
+
         return final_scores, alpha, content_scores, collab_scores
-    
-    def get_top_recommendations(self, final_scores, course_codes, top_k=10):
+
+    def hybrid_recommend_batch(self, queries, feedback_by_user, alpha=None, top_k=10,
+                               exclude_by_user=None, block_size=1024, bundle=None):
         """
-        Get top K course recommendations based on scores
+        Generate hybrid recommendations for many users at once
+
+        All queries are vectorized into one sparse matrix and scored against
+        the catalog with a single sparse-matrix product, giving a
+        users x courses score matrix; top-K is then extracted per row in
+        dense blocks of block_size users.
+
+        Args:
+            queries: Dict of user_id -> interests text
+            feedback_by_user: Dict of user_id -> list of feedback documents
+            alpha: Optional fixed weight for content (if None, uses adaptive per user)
+            top_k: Number of recommendations per user
+            exclude_by_user: Optional dict of user_id -> course codes to leave out
+            block_size: Users per dense block during top-K extraction
+            bundle: Optional ModelBundle (defaults to the published one)
+
+        Returns:
+            Dict of user_id -> {"recommendations": [(course_code, score), ...], "alpha": alpha}
+        """
+        bundle = self._resolve(bundle)
+
+        user_ids = list(queries)
+        num_users, num_courses = len(user_ids), len(bundle.course_codes)
+        if num_users == 0:
+            return {}
+
+        exclude_by_user = exclude_by_user or {}
+
+        query_matrix = self.vectorize_queries(
+            preprocess_many(queries[user_id] for user_id in user_ids), bundle
+        )
+        if self.uses_lsa(bundle):
+            # LSA: embed once, score each block with a dense matrix product
+            query_embeddings = bundle.dense.embed(query_matrix)
+            content_scores = None
+        else:
+            # Content scores: one users x courses sparse product
+            content_scores = bundle.scorer.score_many(query_matrix)
+
+        # Collaborative scores: mean rating per (user, course), normalized to 0-1
+        rows, cols, ratings = [], [], []
+        alphas = np.empty(num_users)
+
+        for i, user_id in enumerate(user_ids):
+            feedback_docs = feedback_by_user.get(user_id, [])
+            alphas[i] = alpha if alpha is not None else self.adaptive_alpha(len(feedback_docs))
+
+            for feedback in feedback_docs:
+                col = bundle.course_index.get(feedback.get("course_code"))
+                if col is not None:
+                    rows.append(i)
+                    cols.append(col)
+                    ratings.append(feedback.get("rating", 0))
+
+        shape = (num_users, num_courses)
+        rating_sums = sparse.csr_matrix((ratings, (rows, cols)), shape=shape, dtype=np.float64)
+        rating_counts = sparse.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=shape)
+        collab_scores = sparse.csr_matrix(rating_sums.multiply(rating_counts.power(-1)) / MAX_RATING)
+
+        results = {}
+
+        for start in range(0, num_users, block_size):
+            block_slice = slice(start, start + block_size)
+            block_users = user_ids[block_slice]
+
+            if content_scores is None:
+                content = np.maximum(query_embeddings[block_slice] @ bundle.dense.embeddings.T, 0.0)
+            else:
+                content = content_scores[block_slice].toarray()
+
+            # Per-user alpha, broadcast down the rows
+            block_alphas = alphas[block_slice, np.newaxis]
+            block = block_alphas * content + (1 - block_alphas) * collab_scores[block_slice].toarray()
+
+            mask = np.repeat(~bundle.tombstones[np.newaxis], len(block_users), axis=0)
+            for i, user_id in enumerate(block_users):
+                excluded = bundle.rows_for(exclude_by_user.get(user_id, ()))
+                mask[i, excluded[excluded >= 0]] = False
+
+            top_rows, top_scores = select_top_k(block, top_k, mask)
+
+            for i, user_id in enumerate(block_users):
+                results[user_id] = {
+                    "recommendations": [
+                        (bundle.course_codes[row], float(score))
+                        for row, score in zip(top_rows[i], top_scores[i])
+                        if np.isfinite(score)
+                    ],
+                    "alpha": float(alphas[start + i])
+                }
+
+        return results
+
+    def candidate_mask(self, exclude_codes=(), available_only=False, bundle=None):
+        """
+        Boolean mask over model rows, False for courses to leave out
+
+        Courses deleted from the catalog are always excluded (tombstoned
+        rows immediately, others once the bundle's attributes are loaded).
+
+        Args:
+            exclude_codes: Course codes to exclude (e.g. already taken)
+            available_only: Also exclude courses not offered this semester
+            bundle: Optional ModelBundle (defaults to the published one)
+
+        Returns:
+            numpy bool array aligned with the bundle's course codes
+        """
+        bundle = self._resolve(bundle)
+        attributes = bundle.attributes
+
+        if attributes.is_loaded:
+            # One published version of the arrays (see CourseAttributes)
+            arrays = attributes.arrays
+            mask = arrays.exists.copy()
+            if available_only:
+                mask &= arrays.available
+        else:
+            mask = np.ones(len(bundle.course_codes), dtype=bool)
         
+        mask &= ~bundle.tombstones
+
+        rows = bundle.rows_for(exclude_codes)
+        mask[rows[rows >= 0]] = False
+        return mask
+
+    def apply_kulliyyah_boost(self, scores, kulliyyah, bundle=None):
+        """
+        Boost scores (in percent) of courses in the preferred kulliyyah
+
+        Matching courses get a 50% boost on a minimum base of 10%, and
+        every score is capped at 99%.
+
+        Args:
+            scores: numpy array of percentage scores in model row order
+            kulliyyah: Preferred kulliyyah (None for no boost)
+            bundle: Optional ModelBundle (defaults to the published one)
+
+        Returns:
+            tuple: (boosted_scores, matches) where matches is a bool array
+        """
+        bundle = self._resolve(bundle)
+        matches = (
+            bundle.attributes.kulliyyah_mask(kulliyyah)
+            if kulliyyah else np.zeros(len(scores), dtype=bool)
+        )
+        boosted = np.minimum(np.maximum(scores, KULLIYYAH_BOOST_FLOOR) * KULLIYYAH_BOOST, MAX_SCORE)
+        scores = np.where(matches, boosted, scores)
+        return np.minimum(scores, MAX_SCORE), matches
+
+    def get_top_recommendations(self, final_scores, course_codes=None, top_k=10, mask=None,
+                                bundle=None):
+        """
+        Get top K course recommendations based on scores
+
         Args:
             final_scores: Array of recommendation scores
-            course_codes: List of course codes
+            course_codes: List of course codes (defaults to the bundle's course codes)
             top_k: Number of recommendations to return
-            
+            mask: Optional boolean array; False entries are never selected
+            bundle: Optional ModelBundle (defaults to the published one)
+
         Returns:
             List of tuples: [(course_code, score), ...]
         """
-        # Get indices of top scores
-        top_indices = np.argsort(final_scores)[::-1][:top_k]
-        
+        if course_codes is None:
+            course_codes = self._resolve(bundle).course_codes
+
+        # Partial selection of the top scores
+        top_indices, top_scores = select_top_k(final_scores, top_k, mask)
+
         # Create list of (course_code, score) tuples
         recommendations = [
-            (course_codes[idx], float(final_scores[idx]))
-            for idx in top_indices
+            (course_codes[idx], float(score))
+            for idx, score in zip(top_indices, top_scores)
         ]
-        
+
         return recommendations
-    
+
     # =============== EVALUATION FUNCTIONS ===============
     
     def precision_at_k(self, recommended_ids, relevant_ids, k):
@@ -281,7 +972,7 @@ class RecommendationEngine:
 
 # =============== GLOBAL INSTANCE ===============
 # Create a single global instance to be used across the application
-recommendation_engine = RecommendationEngine()
+recommendation_engine = RecommendationEngine(scoring_mode=os.getenv("SCORING_MODE", "sparse"))
 
 # Auto-load models on import (optional, can be called explicitly)
 def initialize_engine():
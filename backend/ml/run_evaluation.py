@@ -5,7 +5,6 @@ Tests Precision@K, Recall@K, and Hit Rate@K
 from app import create_app
 from database.mongo import mongo
 from ml.recommendation_engine import recommendation_engine
-from ml.preprocessing import preprocess_text
 import numpy as np
 
 # Configuration
@@ -34,11 +33,15 @@ def run_evaluation():
         
         # Store evaluation results
         all_results = {k: {"precision": [], "recall": [], "hit_rate": []} for k in K_VALUES}
-        evaluated_users = 0
+        
+        # Collect queries and ground truth for every evaluable user
+        queries = {}
+        feedback_by_user = {}
+        relevant_by_user = {}
+        user_names = {}
         
         for user in users:
             user_id = str(user["_id"])
-            user_name = user.get("name", "Unknown")
             
             # Get user's feedback
             feedback = list(mongo.db.feedback.find({"user_id": user_id}))
@@ -56,50 +59,50 @@ def run_evaluation():
             if not relevant_course_codes:
                 continue  # Skip users with no relevant courses
             
-            evaluated_users += 1
-            
             # Build user query from feedback comments
             query_text = " ".join([fb.get("comment", "") for fb in feedback])
             if not query_text.strip():
                 query_text = "computer science programming"  # Fallback
             
-            # Get all courses
-            all_courses = list(mongo.db.courses.find({}))
-            course_codes = [c["course_code"] for c in all_courses]
+            queries[user_id] = query_text
+            feedback_by_user[user_id] = feedback
+            relevant_by_user[user_id] = relevant_course_codes
+            user_names[user_id] = user.get("name", "Unknown")
+        
+        # Score every user in one batched call
+        try:
+            batch_results = recommendation_engine.hybrid_recommend_batch(
+                queries,
+                feedback_by_user,
+                top_k=max(K_VALUES)
+            )
+        except Exception as e:
+            print(f"✗ Error generating recommendations: {e}")
+            return
+        
+        evaluated_users = len(batch_results)
+        
+        for user_id, result in batch_results.items():
+            recommended_codes = [code for code, _ in result["recommendations"]]
+            relevant_course_codes = relevant_by_user[user_id]
             
-            # Generate recommendations
-            try:
-                final_scores, alpha, _, _ = recommendation_engine.hybrid_recommend(
-                    user_query=query_text,
-                    course_codes=course_codes,
-                    feedback_docs=feedback
+            # Evaluate for each K
+            for k in K_VALUES:
+                precision = recommendation_engine.precision_at_k(
+                    recommended_codes, relevant_course_codes, k
+                )
+                recall = recommendation_engine.recall_at_k(
+                    recommended_codes, relevant_course_codes, k
+                )
+                hit_rate = recommendation_engine.hit_rate_at_k(
+                    recommended_codes, relevant_course_codes, k
                 )
                 
-                # Get ranked course codes
-                ranked_indices = np.argsort(final_scores)[::-1]
-                recommended_codes = [course_codes[i] for i in ranked_indices]
-                
-                # Evaluate for each K
-                for k in K_VALUES:
-                    precision = recommendation_engine.precision_at_k(
-                        recommended_codes, relevant_course_codes, k
-                    )
-                    recall = recommendation_engine.recall_at_k(
-                        recommended_codes, relevant_course_codes, k
-                    )
-                    hit_rate = recommendation_engine.hit_rate_at_k(
-                        recommended_codes, relevant_course_codes, k
-                    )
-                    
-                    all_results[k]["precision"].append(precision)
-                    all_results[k]["recall"].append(recall)
-                    all_results[k]["hit_rate"].append(hit_rate)
-                
-                print(f"✓ Evaluated {user_name}: {len(relevant_course_codes)} relevant courses")
-                
-            except Exception as e:
-                print(f"✗ Error evaluating {user_name}: {e}")
-                continue
+                all_results[k]["precision"].append(precision)
+                all_results[k]["recall"].append(recall)
+                all_results[k]["hit_rate"].append(hit_rate)
+            
+            print(f"✓ Evaluated {user_names[user_id]}: {len(relevant_course_codes)} relevant courses")
         
         # Calculate and display results
         print("\n" + "="*60)
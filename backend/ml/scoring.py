@@ -0,0 +1,216 @@
+"""
+Sparse cosine scoring kernel
+Course vectors are L2-normalized once (at build or load time) so a query
+is scored with a single sparse dot product instead of cosine_similarity
+re-normalizing the whole matrix on every request.
+"""
+import numpy as np
+from scipy import sparse
+
+SCORING_DTYPE = np.float32
+
+
+def top_k(scores, k, mask=None):
+    """
+    Select the k highest scores with a partial sort
+
+    np.argpartition finds the k winners in O(n); only those k are then
+    sorted, instead of sorting the whole score vector.
+
+    Args:
+        scores: 1-D array, or 2-D array (one row per query)
+        k: Number of entries to select
+        mask: Optional boolean array (same shape, or broadcastable);
+            False entries are excluded before selection
+
+    Returns:
+        tuple: (indices, values), best first, along the last axis.
+        For 1-D input, excluded entries never appear (fewer than k may be
+        returned). For 2-D input, rows with fewer than k candidates are
+        padded with -inf values.
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    if mask is not None:
+        scores = np.where(mask, scores, -np.inf)
+
+    k = min(k, scores.shape[-1])
+    if k <= 0:
+        empty_shape = scores.shape[:-1] + (0,)
+        return np.empty(empty_shape, dtype=np.int64), np.empty(empty_shape)
+
+    if k < scores.shape[-1]:
+        indices = np.argpartition(-scores, k - 1, axis=-1)[..., :k]
+    else:
+        indices = np.broadcast_to(np.arange(k), scores.shape[:-1] + (k,))
+    values = np.take_along_axis(scores, indices, axis=-1)
+
+    # Best score first; ties broken by index so results are deterministic
+    order = np.lexsort((indices, -values), axis=-1)
+    indices = np.take_along_axis(indices, order, axis=-1)
+    values = np.take_along_axis(values, order, axis=-1)
+
+    if scores.ndim == 1:
+        keep = np.isfinite(values)
+        return indices[keep], values[keep]
+    return indices, values
+
+
+def normalize_rows(matrix, dtype=SCORING_DTYPE):
+    """
+    L2-normalize the rows of a sparse matrix
+
+    Args:
+        matrix: scipy sparse matrix
+        dtype: Output dtype
+
+    Returns:
+        CSR matrix with unit-length rows (all-zero rows stay zero)
+    """
+    csr = sparse.csr_matrix(matrix, dtype=dtype, copy=True)
+    squared = np.asarray(csr.multiply(csr).sum(axis=1), dtype=np.float64).ravel()
+    lengths = np.sqrt(squared)
+    lengths[lengths == 0] = 1.0
+    row_lengths = np.repeat(lengths, np.diff(csr.indptr))
+    csr.data = (csr.data / row_lengths).astype(dtype, copy=False)
+    return csr
+
+
+class CosineScorer:
+    """
+    Scores queries against pre-normalized course vectors
+
+    Two layouts are supported:
+    - "csc": column-major (term -> postings). A query only touches the
+      postings of its own terms, so cost is proportional to those postings
+      rather than to the catalog size. This is the default.
+    - "csr": row-major. Every stored value is visited once per query.
+    """
+
+    def __init__(self, matrix, layout="csc", normalized=False):
+        """
+        Args:
+            matrix: Course x feature sparse matrix
+            layout: "csc" or "csr"
+            normalized: True if rows are already unit-length float32
+        """
+        if layout not in ("csc", "csr"):
+            raise ValueError(f"Unknown layout: {layout}")
+
+        if not normalized:
+            matrix = normalize_rows(matrix)
+
+        self.layout = layout
+        self.matrix = matrix.tocsc() if layout == "csc" else matrix.tocsr()
+        self.num_rows, self.num_features = self.matrix.shape
+
+    def _query_terms(self, query_vector):
+        """Extract (columns, unit-length weights) from a 1 x features query"""
+        query = sparse.csr_matrix(query_vector)
+        cols = query.indices
+        weights = query.data.astype(SCORING_DTYPE)
+        length = np.sqrt(np.dot(weights, weights))
+        if length > 0:
+            weights = weights / length
+        return cols, weights
+
+    def score(self, query_vector):
+        """
+        Cosine similarity between a query and every course
+
+        Args:
+            query_vector: 1 x features sparse query (e.g. vectorizer output)
+
+        Returns:
+            numpy array of length num_rows
+        """
+        cols, weights = self._query_terms(query_vector)
+
+        if len(cols) == 0:
+            return np.zeros(self.num_rows, dtype=SCORING_DTYPE)
+
+        if self.layout == "csr":
+            dense_query = np.zeros(self.num_features, dtype=SCORING_DTYPE)
+            dense_query[cols] = weights
+            return self.matrix @ dense_query
+
+        # Gather the postings of the query terms and accumulate per course
+        indptr = self.matrix.indptr
+        starts, ends = indptr[cols], indptr[cols + 1]
+        lengths = ends - starts
+        positions = np.repeat(ends - lengths.cumsum(), lengths) + np.arange(lengths.sum())
+        rows = self.matrix.indices[positions]
+        contributions = self.matrix.data[positions] * np.repeat(weights, lengths)
+
+        return np.bincount(rows, weights=contributions, minlength=self.num_rows)
+
+    def score_many(self, query_matrix):
+        """
+        Cosine similarity between many queries and every course
+
+        Args:
+            query_matrix: queries x features sparse matrix
+
+        Returns:
+            CSR matrix (queries x courses), one sparse-matrix product
+        """
+        queries = normalize_rows(query_matrix)
+        return (queries @ self.matrix.T).tocsr()
+
+
+class DenseScorer:
+    """
+    Scores queries in a dense embedding space (LSA / truncated SVD)
+
+    Course embeddings are unit-length float32 rows, so a query is scored
+    with one BLAS matrix-vector product over contiguous memory.
+    """
+
+    def __init__(self, embeddings, projection):
+        """
+        Args:
+            embeddings: courses x dimensions array, rows L2-normalized
+            projection: features x dimensions array, C-contiguous
+                (TruncatedSVD.components_ transposed), so a sparse query
+                reads only the rows of its own terms
+        """
+        self.embeddings = embeddings
+        self.projection = projection
+        self.num_rows, self.dimensions = embeddings.shape
+
+    def embed(self, query_matrix):
+        """
+        Project TF-IDF rows into the embedding space
+
+        Args:
+            query_matrix: queries x features sparse matrix
+
+        Returns:
+            float32 array (queries x dimensions) with unit-length rows
+        """
+        # Match the projection's dtype, or scipy upcasts (copies) the whole projection
+        queries = sparse.csr_matrix(query_matrix, dtype=self.projection.dtype)
+        projected = np.asarray(queries @ self.projection, dtype=SCORING_DTYPE)
+        lengths = np.linalg.norm(projected, axis=1, keepdims=True)
+        lengths[lengths == 0] = 1.0
+        return projected / lengths
+
+    def score(self, query_vector):
+        """
+        Cosine similarity between a query and every course
+
+        Args:
+            query_vector: 1 x features sparse query
+
+        Returns:
+            float32 array of length num_rows
+        """
+        return self.embeddings @ self.embed(query_vector)[0]
+
+    def score_many(self, query_matrix):
+        """
+        Cosine similarity between many queries and every course
+
+        Returns:
+            Dense float32 array (queries x courses)
+        """
+        return self.embed(query_matrix) @ self.embeddings.T
@@ -0,0 +1,157 @@
+"""
+Cleaned course text cache
+Maps a hash of (preprocessing fingerprint, raw course text) to the
+cleaned text, in a SQLite file next to the artifacts. Builds given a
+cache (rebuild_models.py --text-cache) only run preprocessing for course
+text that changed since it was last cleaned. Changing the preprocessing
+(PREPROCESSING_VERSION, stopwords, lemmatizer) changes every key, so
+stale entries are never served.
+
+A lookup costs roughly as much as cleaning a short text with the memoized
+preprocessing (see benchmark_preprocessing.py), so the cache pays off for
+long descriptions or slower preprocessing, not for every catalog.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from .preprocessing import preprocess_many, preprocessing_fingerprint
+
+TEXT_CACHE_FILE = "text_cache.sqlite"
+
+# Keys per SQL statement (SQLite caps bound parameters)
+QUERY_CHUNK = 500
+
+
+class CleanedTextCache:
+    """
+    Persistent raw text -> cleaned text cache
+
+    Safe to share between threads; one process should own the file at a
+    time (rebuilds run in the process that holds the cache, pool workers
+    never touch it).
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path: SQLite file (created if missing)
+        """
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._fingerprint = None
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS cleaned_text "
+            "(key BLOB PRIMARY KEY, cleaned TEXT NOT NULL, used_at REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    @property
+    def fingerprint(self):
+        if self._fingerprint is None:
+            self._fingerprint = preprocessing_fingerprint().encode("utf-8")
+        return self._fingerprint
+
+    def key(self, text):
+        return hashlib.blake2b(self.fingerprint + b"\0" + text.encode("utf-8"), digest_size=16).digest()
+
+    def lookup(self, texts):
+        """
+        Cached cleaned text for each raw text
+
+        Returns:
+            tuple: (keys, cleaned) lists aligned with texts; cleaned holds
+            None for misses
+        """
+        keys = [self.key(text) for text in texts]
+        found = {}
+        now = time.time()
+
+        with self._lock:
+            for start in range(0, len(keys), QUERY_CHUNK):
+                chunk = keys[start:start + QUERY_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                found.update(self._db.execute(
+                    f"SELECT key, cleaned FROM cleaned_text WHERE key IN ({placeholders})", chunk
+                ))
+                self._db.execute(
+                    f"UPDATE cleaned_text SET used_at = ? WHERE key IN ({placeholders})", [now, *chunk]
+                )
+            self._db.commit()
+
+        cleaned = [found.get(key) for key in keys]
+        hits = len(keys) - cleaned.count(None)
+        self.hits += hits
+        self.misses += len(keys) - hits
+        return keys, cleaned
+
+    def store(self, keys, cleaned):
+        """Add cleaned texts under their keys (from lookup())"""
+        now = time.time()
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO cleaned_text (key, cleaned, used_at) VALUES (?, ?, ?)",
+                [(key, text, now) for key, text in zip(keys, cleaned)]
+            )
+            self._db.commit()
+
+    def clean(self, texts, clean_many=preprocess_many):
+        """
+        Cleaned text for each raw text, running clean_many on misses only
+
+        Args:
+            texts: List of raw texts
+            clean_many: Batch cleaning function
+
+        Returns:
+            list of cleaned texts, in input order
+        """
+        keys, cleaned = self.lookup(texts)
+        missing = [i for i, text in enumerate(cleaned) if text is None]
+        if missing:
+            fresh = clean_many([texts[i] for i in missing])
+            for i, text in zip(missing, fresh):
+                cleaned[i] = text
+            self.store([keys[i] for i in missing], fresh)
+        return cleaned
+
+    def prune(self, unused_since):
+        """
+        Drop entries not looked up or stored since a time.time() value
+
+        A full build touches every live course, so pruning to its start
+        time removes deleted and superseded course text.
+
+        Returns:
+            int: Number of entries removed
+        """
+        with self._lock:
+            removed = self._db.execute("DELETE FROM cleaned_text WHERE used_at < ?", (unused_since,)).rowcount
+            self._db.commit()
+        return removed
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM cleaned_text").fetchone()[0]
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0
+        }
+
+    def close(self):
+        with self._lock:
+            self._db.close()
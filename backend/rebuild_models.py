@@ -1,71 +1,117 @@
 """
 Rebuild TF-IDF models from MongoDB courses
+
+Streams courses with a projected cursor, cleans their text across a
+process pool, and publishes the artifacts as a new version under
+ml/artifacts/versions/ (ml/artifacts/CURRENT names the live one).
+
+Usage:
+    python rebuild_models.py
+    python rebuild_models.py --lsa 128    # also fit 128-d LSA embeddings
+    python rebuild_models.py --lsa 128 --ann 0    # ... plus an IVF index (0 = auto size)
+    python rebuild_models.py --hashing    # hashed features, bounded memory for huge catalogs
+    python rebuild_models.py --fields    # per-field blocks, weighted at query time
+    python rebuild_models.py --workers 8 --batch-size 5000
+    python rebuild_models.py --text-cache    # reuse cleaned text of unchanged courses
 """
-from pymongo import MongoClient
-from sklearn.feature_extraction.text import TfidfVectorizer
-from ml.preprocessing import preprocess_text
-import joblib
+import argparse
 import os
+import sys
 
-# Connect to MongoDB
-client = MongoClient('mongodb://localhost:27017/')
-db = client['fyp2']
-
-# Get all courses
-courses = list(db.courses.find({}))
-
-if not courses:
-    print("❌ No courses found in database!")
-    exit(1)
-
-print(f"Found {len(courses)} courses")
-
-# Prepare corpus (course descriptions)
-corpus = []
-course_codes = []
-
-for course in courses:
-    # Combine relevant text fields
-    text_parts = []
-    
-    if course.get('course_name'):
-        text_parts.append(course['course_name'])
-    
-    if course.get('description'):
-        text_parts.append(course['description'])
-    
-    if course.get('skills'):
-        text_parts.extend(course['skills'])
-    
-    # Join and preprocess
-    full_text = " ".join(text_parts)
-    cleaned_text = preprocess_text(full_text)
-    
-    corpus.append(cleaned_text)
-    course_codes.append(course.get('course_code'))
-    
-    print(f"  {course.get('course_code')}: {full_text[:50]}...")
-
-# Build TF-IDF
-print("\nBuilding TF-IDF model...")
-vectorizer = TfidfVectorizer(
-    ngram_range=(1, 2),        # Unigrams + Bigrams
-    max_df=0.85,               
-    min_df=1,                  # Lower for small dataset
-    sublinear_tf=True,         
-    stop_words="english"
+from pymongo import MongoClient
+
+from ml.hashing import DEFAULT_HASHING_FEATURES
+from ml.model_builder import (
+    COURSE_FIELDS,
+    DEFAULT_BATCH_SIZE,
+    BuildProgress,
+    build_models,
+    iter_batches
 )
+from ml.neighbours import DEFAULT_NEIGHBOURS
+from ml.text_cache import TEXT_CACHE_FILE, CleanedTextCache
+
+ARTIFACTS_ROOT = "ml/artifacts"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild TF-IDF models")
+    parser.add_argument("--lsa", type=int, default=0, metavar="DIMS",
+                        help="Fit a TruncatedSVD (LSA) stage with this many dimensions (64-256)")
+    parser.add_argument("--ann", type=int, default=None, metavar="LISTS",
+                        help="Build an IVF (ANN) index over the LSA embeddings; 0 picks ~4*sqrt(courses) lists")
+    parser.add_argument("--hashing", type=int, nargs="?", const=DEFAULT_HASHING_FEATURES, default=0,
+                        metavar="FEATURES",
+                        help=f"Use a hashing vectorizer + IDF (default {DEFAULT_HASHING_FEATURES} columns)")
+    parser.add_argument("--neighbours", type=int, default=DEFAULT_NEIGHBOURS,
+                        help="Similar courses to precompute per course (0 to skip; O(N^2) on large catalogs)")
+    parser.add_argument("--fields", action="store_true",
+                        help="One TF-IDF block per field (name, description, skills, kulliyyah/program) "
+                             "so field weights can change without a rebuild")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Processes for text cleaning")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--text-cache", action="store_true",
+                        help="Reuse cleaned text of unchanged courses from ml/artifacts/text_cache.sqlite "
+                             "(pays off when preprocessing is slower than a SQLite lookup)")
+    args = parser.parse_args()
+
+    if args.ann is not None and not args.lsa:
+        parser.error("--ann needs --lsa")
+
+    # Connect to MongoDB
+    client = MongoClient('mongodb://localhost:27017/')
+    db = client['fyp2']
+
+    # Sorted so matrix rows have a stable order; only the text fields are read
+    cursor = (
+        db.courses.find({}, COURSE_FIELDS)
+        .sort("course_code", 1)
+        .batch_size(args.batch_size)
+    )
+
+    text_cache = None if not args.text_cache else CleanedTextCache(os.path.join(ARTIFACTS_ROOT, TEXT_CACHE_FILE))
+
+    print(f"Building TF-IDF model ({args.workers} workers, batches of {args.batch_size})...")
+    progress = BuildProgress()
+    manifest = build_models(
+        iter_batches(cursor, args.batch_size),
+        ARTIFACTS_ROOT,
+        hashing_features=args.hashing,
+        lsa_dimensions=args.lsa,
+        ann_lists=(args.ann or None) if args.ann is not None else 0,
+        neighbours=args.neighbours,
+        workers=args.workers,
+        progress=progress,
+        text_cache=text_cache,
+        fields=args.fields
+    )
+
+    if manifest is None:
+        print("❌ No courses found in database!")
+        sys.exit(1)
 
-tfidf_matrix = vectorizer.fit_transform(corpus)
+    total = sum(progress.timings.values())
+    print(f"\nCourses: {manifest['num_courses']} ({manifest['skipped_courses']} skipped)")
+    print(f"TF-IDF matrix shape: ({manifest['num_courses']}, {manifest['num_features']})")
+    if manifest["fields"]:
+        print(f"Field blocks: {', '.join(manifest['fields'])}")
+    if manifest["hashing_features"]:
+        print(f"Hashing vectorizer: {manifest['hashing_features']} columns")
+    if manifest["lsa_dimensions"]:
+        print(f"LSA dimensions: {manifest['lsa_dimensions']}")
+    if manifest["ann_lists"]:
+        print(f"IVF index: {manifest['ann_lists']} lists")
+    if text_cache is not None:
+        stats = manifest["text_cache"]
+        print(f"Cleaned-text cache: {stats['hits']} reused, {stats['misses']} cleaned ({stats['entries']} entries)")
+    print(f"Total build time: {total:.2f} s ({manifest['num_courses'] / total:,.0f} courses/s)")
 
-print(f"TF-IDF matrix shape: {tfidf_matrix.shape}")
-print(f"Vocabulary size: {len(vectorizer.vocabulary_)}")
+    version_dir = os.path.join(ARTIFACTS_ROOT, "versions", manifest["artifact_version"])
+    print(f"\n✓ TF-IDF models saved to {version_dir}")
+    print(f"  - catalog version {manifest['catalog_version']}")
+    print(f"  - {ARTIFACTS_ROOT}/CURRENT now points at {manifest['artifact_version']}")
 
-# Save models
-os.makedirs("ml/artifacts", exist_ok=True)
-joblib.dump(vectorizer, "ml/artifacts/tfidf_vectorizer.pkl")
-joblib.dump(tfidf_matrix, "ml/artifacts/course_tfidf_matrix.pkl")
 
-print("\n✓ TF-IDF models saved successfully!")
-print("  - ml/artifacts/tfidf_vectorizer.pkl")
-print("  - ml/artifacts/course_tfidf_matrix.pkl")
+if __name__ == "__main__":
+    main()
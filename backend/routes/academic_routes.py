@@ -31,9 +31,6 @@ def save_academic_data():
     user_id = get_jwt_identity()
     data = request.json
 
-    # Check if academic data already exists
-    existing = mongo.db.academic_data.find_one({"user_id": user_id})
-
     academic_doc = {
         "user_id": user_id,
         "kulliyyah": data.get("kulliyyah"),
@@ -44,18 +41,17 @@ def save_academic_data():
         "updated_at": datetime.utcnow()
     }
 
-    if existing:
-        # Update existing document
-        mongo.db.academic_data.update_one(
-            {"user_id": user_id},
-            {"$set": academic_doc}
-        )
+    # Update the student's document or create it in one atomic upsert
+    # (academic_data.user_id is unique, database/indexes.py)
+    result = mongo.db.academic_data.update_one(
+        {"user_id": user_id},
+        {"$set": academic_doc, "$setOnInsert": {"created_at": datetime.utcnow()}},
+        upsert=True
+    )
+
+    if result.upserted_id is None:
         return jsonify({"msg": "Academic data updated successfully"}), 200
-    else:
-        # Create new document
-        academic_doc["created_at"] = datetime.utcnow()
-        mongo.db.academic_data.insert_one(academic_doc)
-        return jsonify({"msg": "Academic data saved successfully"}), 201
+    return jsonify({"msg": "Academic data saved successfully"}), 201
 
 
 @academic_bp.route("/", methods=["GET"])
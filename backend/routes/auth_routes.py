@@ -3,6 +3,7 @@ from werkzeug.security import generate_password_hash, check_password_hash
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 from database.mongo import mongo
 from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
 from datetime import datetime
 
 auth_bp = Blueprint("auth", __name__, url_prefix="/auth")
@@ -70,8 +71,15 @@ def register():
         "created_at": datetime.utcnow()
     }
 
-    # Insert user
-    result = mongo.db.users.insert_one(user_doc)
+    # Insert user; the unique email / matric number indexes reject a
+    # concurrent registration that got past the checks above
+    # (database/indexes.py)
+    try:
+        result = mongo.db.users.insert_one(user_doc)
+    except DuplicateKeyError as e:
+        if "matric_number_unique" in str(e):
+            return jsonify({"msg": "Matric number already registered"}), 409
+        return jsonify({"msg": "Email already registered"}), 409
     user_id = str(result.inserted_id)
 
     # Generate token for auto-login
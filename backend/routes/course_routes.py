@@ -1,11 +1,45 @@
+import re
+
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from database.mongo import mongo
+from database.catalog import catalog
+from ml.recommendation_engine import recommendation_engine
 from bson import ObjectId
 from datetime import datetime
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 
 course_bp = Blueprint("courses", __name__, url_prefix="/courses")
 
+# /courses/search page size
+SEARCH_PER_PAGE = 20
+MAX_SEARCH_PER_PAGE = 100
+
+
+def _load_catalog():
+    return mongo.db.courses.find({})
+
+
+def _sync_course_model(course=None, deleted_code=None):
+    """
+    Apply a catalog edit to the catalog snapshot and the live recommendation model
+
+    Bumps the catalog version so every worker reloads its snapshot. The
+    course row is (re)indexed with the fitted vocabulary right away; once
+    edits drift past the refit thresholds a full rebuild is started in the
+    background.
+    """
+    catalog.bump()
+
+    if course is not None:
+        recommendation_engine.upsert_course(course)
+    else:
+        recommendation_engine.remove_course(deleted_code)
+
+    if recommendation_engine.needs_refit():
+        recommendation_engine.refit_models(_load_catalog, background=True)
+
 @course_bp.route("/", methods=["GET"])
 @jwt_required()
 def get_courses():
@@ -14,7 +48,7 @@ def get_courses():
     Returns courses sorted by: available first, then by level, then by code
     """
     try:
-        courses = list(mongo.db.courses.find())
+        courses = catalog.snapshot().courses
         result = []
 
         for course in courses:
@@ -53,7 +87,10 @@ def get_courses():
 def get_available_courses():
     """Get only courses available this semester"""
     try:
-        courses = list(mongo.db.courses.find({"is_available_this_semester": True}))
+        courses = [
+            course for course in catalog.snapshot().courses
+            if course.get("is_available_this_semester") is True
+        ]
         result = []
 
         for course in courses:
@@ -84,7 +121,7 @@ def get_available_courses():
 def get_course(course_id):
     """Get detailed information about a specific course"""
     try:
-        course = mongo.db.courses.find_one({"_id": ObjectId(course_id)})
+        course = catalog.snapshot().get(course_id)
 
         if not course:
             return jsonify({"msg": "Course not found"}), 404
@@ -110,12 +147,64 @@ def get_course(course_id):
         return jsonify({"msg": f"Error fetching course: {str(e)}"}), 500
 
 
+@course_bp.route("/<course_id>/similar", methods=["GET"])
+@jwt_required()
+def get_similar_courses(course_id):
+    """
+    Courses most similar in content to a given course
+    course_id may be the course's id or its course code; ?limit= caps the list
+    """
+    limit = max(1, min(request.args.get("limit", 10, type=int), 50))
+
+    bundle = recommendation_engine.bundle
+    if bundle is None:
+        return jsonify({"msg": "AI models not loaded"}), 503
+
+    try:
+        snapshot = catalog.snapshot()
+        course_code = course_id
+        if ObjectId.is_valid(course_id):
+            course = snapshot.get(course_id)
+            if not course:
+                return jsonify({"msg": "Course not found"}), 404
+            course_code = course.get("course_code")
+
+        similar = recommendation_engine.similar_courses(course_code, limit, bundle=bundle)
+        if similar is None:
+            return jsonify({"msg": "Course not found"}), 404
+
+        courses = snapshot.by_code
+
+        result = []
+        for code, score in similar:
+            course = courses.get(code)
+            if not course:
+                continue
+            result.append({
+                "id": str(course["_id"]),
+                "_id": str(course["_id"]),
+                "course_code": code,
+                "course_name": course.get("course_name"),
+                "description": course.get("description", ""),
+                "level": course.get("level", 1),
+                "credit_hours": course.get("credit_hours", 3),
+                "skills": course.get("skills", []),
+                "is_available_this_semester": course.get("is_available_this_semester", False),
+                "similarity": round(score * 100, 1)
+            })
+
+        return jsonify(result), 200
+
+    except Exception as e:
+        return jsonify({"msg": f"Error fetching similar courses: {str(e)}"}), 500
+
+
 @course_bp.route("/level/<int:level>", methods=["GET"])
 @jwt_required()
 def get_courses_by_level(level):
     """Get all courses for a specific level"""
     try:
-        courses = list(mongo.db.courses.find({"level": level}))
+        courses = [course for course in catalog.snapshot().courses if course.get("level") == level]
         result = []
 
         for course in courses:
@@ -144,29 +233,47 @@ def get_courses_by_level(level):
 @jwt_required()
 def search_courses():
     """
-    Search courses by query string
-    Searches in: course code, course name, description, skills
+    Search courses by query string, best match first
+    Ranked by TF-IDF relevance over course name, description and skills
+    (the recommendation model's inverted index), after courses whose code
+    matches or starts with the query.
+    
+    Query params:
+        q: Search string
+        page: Page number, from 1
+        per_page: Results per page (default 20, max 100)
     """
     query = request.args.get('q', '').strip()
+    page = max(1, request.args.get("page", 1, type=int))
+    per_page = max(1, min(request.args.get("per_page", SEARCH_PER_PAGE, type=int), MAX_SEARCH_PER_PAGE))
     
     if not query:
         return jsonify([]), 200
     
     try:
-        # Create search filter
-        search_filter = {
-            "$or": [
-                {"course_code": {"$regex": query, "$options": "i"}},
-                {"course_name": {"$regex": query, "$options": "i"}},
-                {"description": {"$regex": query, "$options": "i"}},
-                {"skills": {"$regex": query, "$options": "i"}}
-            ]
-        }
-        
-        courses = list(mongo.db.courses.find(search_filter))
-        result = []
+        snapshot = catalog.snapshot()
+        wanted = page * per_page
+
+        # Course codes first: an exact code (e.g. "csci 1100"), then codes
+        # it prefixes (e.g. "CSCI3"); the text index drops digits and codes
+        code_query = query.replace(" ", "").upper()
+        hits = [(snapshot.get_by_code(code), 100.0) for code in snapshot.codes_with_prefix(code_query, wanted)]
+        hits.sort(key=lambda hit: hit[0].get("course_code") != code_query)
+        matched = {id(course) for course, _ in hits}
+
+        bundle = recommendation_engine.bundle
+        if bundle is not None:
+            ranked = recommendation_engine.keyword_search(query, wanted, bundle=bundle)
+            for code, score in ranked:
+                course = snapshot.get_by_code(code)
+                if course and id(course) not in matched:
+                    hits.append((course, round(score * 100, 1)))
+        else:
+            # No model loaded: unranked scan with $regex-like matching
+            hits.extend((course, None) for course in _scan_courses(snapshot, query) if id(course) not in matched)
 
-        for course in courses:
+        result = []
+        for course, relevance in hits[(page - 1) * per_page:page * per_page]:
             result.append({
                 "id": str(course["_id"]),
                 "_id": str(course["_id"]),
@@ -179,7 +286,8 @@ def search_courses():
                 "skills": course.get("skills", []),
                 "prerequisites": course.get("prerequisites", []),
                 "is_available_this_semester": course.get("is_available_this_semester", False),
-                "semester": course.get("semester", "")
+                "semester": course.get("semester", ""),
+                "relevance": relevance
             })
 
         return jsonify(result), 200
@@ -188,6 +296,26 @@ def search_courses():
         return jsonify({"msg": f"Error searching courses: {str(e)}"}), 500
 
 
+def _scan_courses(snapshot, query):
+    """
+    Courses whose code, name, description or any skill contains the query
+    (case-insensitive; the query is matched literally, so "C++" or "("
+    are plain text), in catalog order
+    """
+    pattern = re.compile(re.escape(query), re.IGNORECASE)
+
+    def matches(value):
+        return isinstance(value, str) and pattern.search(value) is not None
+
+    return [
+        course for course in snapshot.courses
+        if matches(course.get("course_code"))
+        or matches(course.get("course_name"))
+        or matches(course.get("description"))
+        or any(matches(skill) for skill in course.get("skills") or ())
+    ]
+
+
 @course_bp.route("/", methods=["POST"])
 @jwt_required()
 def add_course():
@@ -245,7 +373,14 @@ def add_course():
         "updated_at": datetime.utcnow()
     }
 
-    result = mongo.db.courses.insert_one(course_doc)
+    # Course codes are unique (database/indexes.py), which catches a
+    # concurrent add of the same code
+    try:
+        result = mongo.db.courses.insert_one(course_doc)
+    except DuplicateKeyError:
+        return jsonify({"msg": "Course code already exists"}), 409
+
+    _sync_course_model(course_doc)
 
     return jsonify({
         "msg": "Course added successfully",
@@ -285,11 +420,18 @@ def update_course(course_id):
     
     update_data["updated_at"] = datetime.utcnow()
     
-    mongo.db.courses.update_one(
+    course = mongo.db.courses.find_one_and_update(
         {"_id": ObjectId(course_id)},
-        {"$set": update_data}
+        {"$set": update_data},
+        return_document=ReturnDocument.AFTER
     )
     
+    if not course:
+        return jsonify({"msg": "Course not found"}), 404
+    
+    # Re-index the course text and attributes in the live model
+    _sync_course_model(course)
+    
     return jsonify({"msg": "Course updated successfully"}), 200
 
 
@@ -304,11 +446,13 @@ def delete_course(course_id):
     if not user or user.get("role") != "admin":
         return jsonify({"msg": "Admin access required"}), 403
     
-    result = mongo.db.courses.delete_one({"_id": ObjectId(course_id)})
+    course = mongo.db.courses.find_one_and_delete({"_id": ObjectId(course_id)})
     
-    if result.deleted_count == 0:
+    if not course:
         return jsonify({"msg": "Course not found"}), 404
     
+    _sync_course_model(deleted_code=course.get("course_code"))
+    
     return jsonify({"msg": "Course deleted successfully"}), 200
 
 
@@ -343,14 +487,18 @@ def set_course_availability(course_id):
     if "semester" in data:
         update_data["semester"] = data["semester"]
     
-    result = mongo.db.courses.update_one(
+    course = mongo.db.courses.find_one_and_update(
         {"_id": ObjectId(course_id)},
-        {"$set": update_data}
+        {"$set": update_data},
+        return_document=ReturnDocument.AFTER
     )
     
-    if result.matched_count == 0:
+    if not course:
         return jsonify({"msg": "Course not found"}), 404
     
+    catalog.bump()
+    recommendation_engine.attributes.update(course)
+    
     return jsonify({"msg": "Course availability updated"}), 200
 
 
@@ -359,13 +507,14 @@ def set_course_availability(course_id):
 def get_course_stats():
     """Get overall course statistics"""
     try:
-        total_courses = mongo.db.courses.count_documents({})
-        available_courses = mongo.db.courses.count_documents({"is_available_this_semester": True})
+        courses = catalog.snapshot().courses
+        total_courses = len(courses)
+        available_courses = sum(1 for course in courses if course.get("is_available_this_semester") is True)
         
         # Count by level
         courses_by_level = {}
         for level in range(1, 5):
-            count = mongo.db.courses.count_documents({"level": level})
+            count = sum(1 for course in courses if course.get("level") == level)
             courses_by_level[f"level_{level}"] = count
         
         return jsonify({
@@ -1,9 +1,16 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
 from datetime import datetime
 
 from database.mongo import mongo
+from database.catalog import catalog
+from database.queries import DEFAULT_CREDIT_HOURS, enrolled_courses
+from database.seats import (
+    MAX_CREDIT_HOURS, claim_credit_hours, claim_seat, credit_hours_total,
+    release_credit_hours, release_seat
+)
 
 enrollment_bp = Blueprint("enrollment", __name__, url_prefix="/enroll")
 
@@ -19,61 +26,51 @@ def enroll_course():
         return jsonify({"msg": "course_id is required"}), 400
 
     # Check course exists
-    course = mongo.db.courses.find_one({"_id": ObjectId(course_id)})
+    course = catalog.snapshot().get(course_id)
     if not course:
         return jsonify({"msg": "Course not found"}), 404
 
-    capacity = course.get("capacity", 0)
-    course_credit_hours = course.get("credit_hours", 3)  # Default to 3 if not specified
+    course_credit_hours = course.get("credit_hours", DEFAULT_CREDIT_HOURS)
+    course_oid, user_oid = ObjectId(course_id), ObjectId(user_id)
+    enrollment_filter = {"user_id": user_oid, "course_id": course_oid, "status": "enrolled"}
 
-    # Count current enrollments
-    enrolled_count = mongo.db.enrollments.count_documents({
-        "course_id": ObjectId(course_id),
-        "status": "enrolled"
-    })
+    # An existing enrollment takes precedence over a full course or the
+    # credit hour limit (its own seat and credit hours count towards both)
+    if mongo.db.enrollments.find_one(enrollment_filter, {"_id": 1}):
+        return jsonify({"msg": "Already enrolled"}), 400
 
-    if enrolled_count >= capacity:
+    # Claim a seat and the credit hours with conditional updates; each
+    # check and increment is atomic, so concurrent requests can't overbook
+    if claim_seat(mongo.db, course_oid) is None:
         return jsonify({
             "msg": "Course is full",
             "course_id": course_id
         }), 409
 
-    # Prevent duplicate enrollment
-    existing = mongo.db.enrollments.find_one({
-        "course_id": ObjectId(course_id),
-        "user_id": ObjectId(user_id),
-        "status": "enrolled"
-    })
-
-    if existing:
-        return jsonify({"msg": "Already enrolled"}), 400
-
-    # Check credit hour limit (20 credit hours max)
-    user_enrollments = mongo.db.enrollments.find({
-        "user_id": ObjectId(user_id),
-        "status": "enrolled"
-    })
-    
-    total_credit_hours = 0
-    for enrollment in user_enrollments:
-        enrolled_course = mongo.db.courses.find_one({"_id": enrollment["course_id"]})
-        if enrolled_course:
-            total_credit_hours += enrolled_course.get("credit_hours", 3)
-    
-    if total_credit_hours + course_credit_hours > 20:
+    if claim_credit_hours(mongo.db, user_oid, course_credit_hours) is None:
+        release_seat(mongo.db, course_oid)
         return jsonify({
             "msg": "Credit hour limit reached",
-            "current_credit_hours": total_credit_hours,
-            "max_credit_hours": 20
+            "current_credit_hours": credit_hours_total(mongo.db, user_oid),
+            "max_credit_hours": MAX_CREDIT_HOURS
         }), 400
 
-    # Create enrollment
-    mongo.db.enrollments.insert_one({
-        "user_id": ObjectId(user_id),
-        "course_id": ObjectId(course_id),
-        "enrolled_at": datetime.utcnow(),
-        "status": "enrolled"
-    })
+    # Create the enrollment unless a concurrent request just did; the
+    # credit hours are kept so dropping the course releases what was claimed
+    try:
+        result = mongo.db.enrollments.update_one(
+            enrollment_filter,
+            {"$setOnInsert": {"enrolled_at": datetime.utcnow(), "credit_hours": course_credit_hours}},
+            upsert=True
+        )
+        created = result.upserted_id is not None
+    except DuplicateKeyError:
+        created = False
+
+    if not created:
+        release_seat(mongo.db, course_oid)
+        release_credit_hours(mongo.db, user_oid, course_credit_hours)
+        return jsonify({"msg": "Already enrolled"}), 400
 
     return jsonify({
         "msg": "Enrollment successful",
@@ -87,22 +84,17 @@ from bson import ObjectId
 def my_enrollments():
     user_id = get_jwt_identity()
 
-    enrollments = mongo.db.enrollments.find({
-        "user_id": ObjectId(user_id),
-        "status": "enrolled"
-    })
-
-    results = []
-    for e in enrollments:
-        course = mongo.db.courses.find_one({"_id": e["course_id"]})
-        if course:
-            results.append({
-                "course_id": str(course["_id"]),
-                "course_code": course.get("course_code"),
-                "course_name": course.get("course_name"),
-                "level": course.get("level"),
-                "enrolled_at": e.get("enrolled_at")
-            })
+    # Enrollments joined with their courses in one aggregation
+    results = [
+        {
+            "course_id": str(e["course_id"]),
+            "course_code": e["course"].get("course_code"),
+            "course_name": e["course"].get("course_name"),
+            "level": e["course"].get("level"),
+            "enrolled_at": e.get("enrolled_at")
+        }
+        for e in enrolled_courses(mongo.db, user_id)
+    ]
     
     print(f"Enrolled courses for user {user_id}: {len(results)} courses")
     return jsonify(results), 200
@@ -112,13 +104,19 @@ def my_enrollments():
 def remove_enrollment(course_id):
     user_id = get_jwt_identity()
     
-    result = mongo.db.enrollments.delete_one({
+    enrollment = mongo.db.enrollments.find_one_and_delete({
         "user_id": ObjectId(user_id),
         "course_id": ObjectId(course_id),
         "status": "enrolled"
     })
     
-    if result.deleted_count > 0:
+    if enrollment:
+        credit_hours = enrollment.get("credit_hours")
+        if credit_hours is None:
+            course = catalog.snapshot().get(course_id)
+            credit_hours = course.get("credit_hours", DEFAULT_CREDIT_HOURS) if course else DEFAULT_CREDIT_HOURS
+        release_seat(mongo.db, enrollment["course_id"])
+        release_credit_hours(mongo.db, enrollment["user_id"], credit_hours)
         return jsonify({"msg": "Enrollment removed"}), 200
     else:
         return jsonify({"msg": "Enrollment not found"}), 404
\ No newline at end of file
@@ -1,7 +1,10 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from database.mongo import mongo
+from database.catalog import catalog
+from ml.recommendation_engine import recommendation_engine
 from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
 from datetime import datetime
 
 feedback_bp = Blueprint("feedback", __name__, url_prefix="/feedback")
@@ -33,7 +36,7 @@ def add_feedback():
         return jsonify({"msg": "Rating must be between 1 and 5"}), 400
 
     # Get course details
-    course = mongo.db.courses.find_one({"course_code": course_code})
+    course = catalog.snapshot().get_by_code(course_code)
     if not course:
         return jsonify({"msg": "Course not found"}), 404
 
@@ -75,7 +78,15 @@ def add_feedback():
         "updated_at": datetime.utcnow().isoformat()
     }
 
-    result = mongo.db.feedback.insert_one(feedback_doc)
+    # One review per student and course; the unique index
+    # (database/indexes.py) catches a concurrent submission
+    try:
+        result = mongo.db.feedback.insert_one(feedback_doc)
+    except DuplicateKeyError:
+        return jsonify({"msg": "You have already submitted feedback for this course"}), 400
+    
+    # Keep the engine's per-course rating aggregates current
+    recommendation_engine.ratings.add(course_code, rating)
 
     return jsonify({
         "msg": "Feedback submitted successfully",
@@ -191,6 +202,11 @@ def update_feedback(feedback_id):
             {"$set": update_data}
         )
         
+        if "rating" in update_data:
+            recommendation_engine.ratings.update(
+                feedback.get("course_code"), feedback.get("rating", 0), update_data["rating"]
+            )
+        
         return jsonify({"msg": "Feedback updated successfully"}), 200
     
     except Exception as e:
@@ -219,7 +235,10 @@ def delete_feedback(feedback_id):
             return jsonify({"msg": "Unauthorized"}), 403
         
         # Delete feedback
-        mongo.db.feedback.delete_one({"_id": ObjectId(feedback_id)})
+        result = mongo.db.feedback.delete_one({"_id": ObjectId(feedback_id)})
+        
+        if result.deleted_count:
+            recommendation_engine.ratings.remove(feedback.get("course_code"), feedback.get("rating", 0))
         
         return jsonify({"msg": "Feedback deleted successfully"}), 200
     
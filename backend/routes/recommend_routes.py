@@ -1,7 +1,13 @@
+import time
+from datetime import datetime
+
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from database.mongo import mongo
+from database.catalog import catalog
+from database.queries import enrolled_course_codes
 from ml.recommendation_engine import recommendation_engine
+from ml.scoring import top_k
 
 recommend_routes = Blueprint(
     "recommend_routes",
@@ -9,17 +15,125 @@ recommend_routes = Blueprint(
     url_prefix="/recommend"
 )
 
+# Re-read rating aggregates / course attributes this often to pick up
+# writes from other workers and scripts
+RATINGS_REFRESH_SECONDS = 300
+ATTRIBUTES_REFRESH_SECONDS = 300
+
+# Number of recommendations returned by /recommend/
+TOP_K = 10
+
+# Field weights set through PUT /recommend/field-weights are stored in the
+# settings collection; every worker re-reads them this often
+FIELD_WEIGHTS_SETTING = "field_weights"
+FIELD_WEIGHTS_REFRESH_SECONDS = 30
+_field_weights_checked_at = 0.0
+
+
+def ensure_ratings_loaded(bundle):
+    """Load per-course rating aggregates into the bundle if missing or stale"""
+    if bundle.ratings.needs_refresh(RATINGS_REFRESH_SECONDS):
+        bundle.ratings.load(mongo.db.feedback.aggregate([
+            {
+                "$group": {
+                    "_id": "$course_code",
+                    "sum": {"$sum": "$rating"},
+                    "count": {"$sum": 1}
+                }
+            }
+        ]))
+
+
+def ensure_field_weights_current(bundle):
+    """Apply the stored field weights if the model has field blocks"""
+    global _field_weights_checked_at
+    if not bundle.manifest.get("fields"):
+        return
+    
+    now = time.time()
+    if now - _field_weights_checked_at < FIELD_WEIGHTS_REFRESH_SECONDS:
+        return
+    _field_weights_checked_at = now
+    
+    setting = mongo.db.settings.find_one({"_id": FIELD_WEIGHTS_SETTING})
+    if setting and setting.get("weights"):
+        try:
+            recommendation_engine.set_field_weights(setting["weights"])
+        except ValueError as e:
+            print(f"⚠️  Ignoring stored field weights: {e}")
+
+
+def _format_recommendation(course, score, row, prefs, preferred_kulliyyah, num_feedback,
+                           content_scores, collab_scores, alpha_used):
+    """Build the response entry (with explanation) for one recommended course"""
+    score = float(score)
+    course_code = course.get("course_code")
+    
+    # Generate explanation based on preferences
+    reason_parts = []
+    
+    # Check if matches kulliyyah preference
+    if preferred_kulliyyah and course.get("kulliyyah") == preferred_kulliyyah:
+        reason_parts.append(f"Matches your {preferred_kulliyyah} preference")
+    
+    # Check if matches course type preferences
+    if prefs and prefs.get("preferredTypes"):
+        reason_parts.append(f"Fits your {', '.join(prefs.get('preferredTypes'))} preference")
+    
+    # Add AI match score
+    if reason_parts:
+        reason = f"{' • '.join(reason_parts)} (Match: {score:.0f}%)"
+    elif num_feedback > 5:
+        reason = f"Based on your learning history (Match: {score:.0f}%)"
+    else:
+        reason = f"AI-recommended course (Match: {score:.0f}%)"
+    
+    return {
+        "_id": str(course.get("_id")),
+        "course_code": course_code,
+        "course_name": course.get("course_name"),
+        "description": course.get("description", ""),
+        "credit_hours": course.get("credit_hours", 3),
+        "level": course.get("level", 1),
+        "kulliyyah": course.get("kulliyyah", ""),
+        "program": course.get("program", ""),
+        "skills": course.get("skills", []),
+        "score": score,
+        "reason": reason,
+        "content_score": float(content_scores[row]) * 100,
+        "collab_score": float(collab_scores[row]) * 100,
+        "alpha": alpha_used,
+        "matches_preference": preferred_kulliyyah == course.get("kulliyyah") if preferred_kulliyyah else False
+    }
+
+
+def ensure_course_attributes_loaded(bundle):
+    """Load per-course attribute arrays from the catalog snapshot if missing or stale"""
+    snapshot = catalog.snapshot()
+    attributes = bundle.attributes
+    if attributes.needs_refresh(ATTRIBUTES_REFRESH_SECONDS) or attributes.catalog_version != snapshot.version:
+        attributes.load(snapshot.courses, snapshot.version)
+
+
 @recommend_routes.route("/", methods=["GET", "POST"])
 @jwt_required()
 def recommend():
     """
     Generate personalized course recommendations for the user
     Uses hybrid approach: content-based + collaborative filtering
+    
+    Query params:
+        available_only: "true" to only recommend courses offered this semester
     """
     user_id = get_jwt_identity()
+    available_only = request.args.get("available_only", "").lower() in ("1", "true", "yes")
+    
+    # Pin one model bundle for the whole request; a reload that lands
+    # mid-request swaps in a new bundle without affecting this one
+    bundle = recommendation_engine.bundle
     
     # Check if AI models are loaded
-    if not recommendation_engine.is_loaded:
+    if bundle is None:
         return jsonify({
             "error": "AI models not loaded",
             "message": "Please contact administrator to rebuild AI models",
@@ -31,9 +145,10 @@ def recommend():
         sort=[("created_at", -1)]
     )
     
-    all_courses = list(mongo.db.courses.find({}))
+    # Scores follow model row order; the manifest pins row i to course_codes[i]
+    course_codes = bundle.course_codes
     
-    if not all_courses:
+    if not course_codes:
         return jsonify([]), 200
     
     academic_data = mongo.db.academic_data.find_one({"user_id": user_id})
@@ -43,13 +158,14 @@ def recommend():
         taken_course_codes = {c.get("course_code") for c in academic_data.get("courses_taken", [])}
     
 
-    enrollments = list(mongo.db.enrollments.find({"user_id": user_id}))
-    for enrollment in enrollments:
-        course = mongo.db.courses.find_one({"_id": enrollment.get("course_id")})
-        if course:
-            taken_course_codes.add(course.get("course_code"))
+    # One $lookup round-trip however many courses the user is enrolled in
+    taken_course_codes |= enrolled_course_codes(mongo.db, user_id)
     
-    feedback_docs = list(mongo.db.feedback.find({"user_id": user_id}))
+    # Only the count is needed per user; course ratings come from the engine's table
+    num_feedback = mongo.db.feedback.count_documents({"user_id": user_id})
+    ensure_ratings_loaded(bundle)
+    ensure_course_attributes_loaded(bundle)
+    ensure_field_weights_current(bundle)
     
     user_interests = []
     preferred_kulliyyah = None
@@ -92,19 +208,18 @@ def recommend():
     print(f"RECOMMENDATION REQUEST")
     print(f"{'='*60}")
     print(f"User ID: {user_id}")
+    print(f"Model Version: {bundle.version}")
     print(f"Preferred Kulliyyah: {preferred_kulliyyah}")
     print(f"User Query: {user_query}")
-    print(f"Total Courses: {len(all_courses)}")
+    print(f"Total Courses: {len(course_codes)}")
     print(f"Taken Courses: {len(taken_course_codes)}")
-    print(f"Feedback Count: {len(feedback_docs)}")
-    
-    course_codes = [c.get("course_code") for c in all_courses]
+    print(f"Feedback Count: {num_feedback}")
     
     try:
         final_scores, alpha_used, content_scores, collab_scores = recommendation_engine.hybrid_recommend(
             user_query=user_query,
-            course_codes=course_codes,
-            feedback_docs=feedback_docs
+            num_feedback=num_feedback,
+            bundle=bundle
         )
         
         print(f"Alpha (Content Weight): {alpha_used:.2f}")
@@ -112,67 +227,48 @@ def recommend():
         print(f"Collab Scores - Max: {collab_scores.max():.3f}, Mean: {collab_scores.mean():.3f}")
         print(f"Final Scores - Max: {final_scores.max():.3f}, Mean: {final_scores.mean():.3f}")
         
+        # Kulliyyah boost and 99% cap as whole-array operations
+        scores, _ = recommendation_engine.apply_kulliyyah_boost(
+            final_scores * 100,  # Convert to percentage
+            preferred_kulliyyah,
+            bundle=bundle
+        )
+        
+        # Exclude taken (and deleted / unavailable) courses before selecting
+        candidates = recommendation_engine.candidate_mask(
+            taken_course_codes, available_only, bundle=bundle
+        )
+        courses_by_code = catalog.snapshot().by_code
         recommendations = []
         
-        for i, course in enumerate(all_courses):
-            course_code = course.get("course_code")
+        # Explain only the winners; course details come from the catalog
+        # snapshot. A course deleted since the attributes were last loaded
+        # can still win, so skip it and select again to keep TOP_K results
+        while len(recommendations) < TOP_K:
+            top_rows, top_scores = top_k(scores, TOP_K - len(recommendations), candidates)
+            if len(top_rows) == 0:
+                break
+            candidates[top_rows] = False
             
-            if course_code in taken_course_codes:
-                continue
-            
-            score = float(final_scores[i]) * 100  # Convert to percentage
-            
-            # Boost score if matches preferred kulliyyah
-            if preferred_kulliyyah and course.get("kulliyyah") == preferred_kulliyyah:
-                # Give significant boost to matching kulliyyah courses
-                # Apply 50% boost, with a minimum base score of 10%
-                base_score = max(score, 10)
-                score = min(base_score * 1.5, 99)
-            
-            # Generate explanation based on preferences
-            reason_parts = []
-            
-            # Check if matches kulliyyah preference
-            if preferred_kulliyyah and course.get("kulliyyah") == preferred_kulliyyah:
-                reason_parts.append(f"Matches your {preferred_kulliyyah} preference")
-            
-            # Check if matches course type preferences
-            if prefs and prefs.get("preferredTypes"):
-                reason_parts.append(f"Fits your {', '.join(prefs.get('preferredTypes'))} preference")
-            
-            # Add AI match score
-            if reason_parts:
-                reason = f"{' • '.join(reason_parts)} (Match: {score:.0f}%)"
-            elif len(feedback_docs) > 5:
-                reason = f"Based on your learning history (Match: {score:.0f}%)"
-            else:
-                reason = f"AI-recommended course (Match: {score:.0f}%)"
-            
-            recommendations.append({
-                "_id": str(course.get("_id")),
-                "course_code": course_code,
-                "course_name": course.get("course_name"),
-                "description": course.get("description", ""),
-                "credit_hours": course.get("credit_hours", 3),
-                "level": course.get("level", 1),
-                "kulliyyah": course.get("kulliyyah", ""),
-                "program": course.get("program", ""),
-                "skills": course.get("skills", []),
-                "score": min(score, 99),  # Cap at 99%
-                "reason": reason,
-                "content_score": float(content_scores[i]) * 100,
-                "collab_score": float(collab_scores[i]) * 100,
-                "alpha": alpha_used,
-                "matches_preference": preferred_kulliyyah == course.get("kulliyyah") if preferred_kulliyyah else False
-            })
-        
-        recommendations.sort(key=lambda x: x["score"], reverse=True)
+            for i, score in zip(top_rows, top_scores):
+                course = courses_by_code.get(course_codes[i])
+                
+                # Course removed from the catalog since the model was built
+                if course is None:
+                    continue
+                
+                recommendations.append(
+                    _format_recommendation(
+                        course, score, i, prefs, preferred_kulliyyah, num_feedback,
+                        content_scores, collab_scores, alpha_used
+                    )
+                )
         
         print(f"Generated {len(recommendations)} recommendations")
         print(f"Top 5 scores: {[r['score'] for r in recommendations[:5]]}")
         print(f"{'='*60}\n")
         
-        return jsonify(recommendations[:10]), 200
+        return jsonify(recommendations), 200
         
     except Exception as e:
         print(f"❌ Error in recommendation: {e}")
@@ -190,6 +286,12 @@ def reload_models():
     """
     Reload AI models (useful after rebuilding)
     Restricted to admin users only
+    
+    The new model loads in the background while requests keep using the
+    current one; poll /recommend/status for the new model_version.
+    
+    Query params:
+        wait: "true" to block until the reload finishes
     """
     user_id = get_jwt_identity()
     
@@ -199,17 +301,34 @@ def reload_models():
     if not user or user.get("role") != "admin":
         return jsonify({"msg": "Admin access required"}), 403
     
+    wait = request.args.get("wait", "").lower() in ("1", "true", "yes")
+    
+    if not wait:
+        if not recommendation_engine.reload_models(background=True):
+            return jsonify({
+                "msg": "A model reload is already in progress",
+                "model_version": recommendation_engine.model_version
+            }), 409
+        
+        return jsonify({
+            "msg": "Model reload started",
+            "model_version": recommendation_engine.model_version
+        }), 202
+    
     success = recommendation_engine.reload_models()
     
     if success:
         return jsonify({
             "msg": "Models reloaded successfully",
-            "status": "ready"
+            "status": "ready",
+            "model_version": recommendation_engine.model_version
         }), 200
     else:
         return jsonify({
             "msg": "Failed to reload models",
-            "status": "not_ready"
+            "status": "ready" if recommendation_engine.is_loaded else "not_ready",
+            "model_version": recommendation_engine.model_version,
+            "error": recommendation_engine.last_reload_error
         }), 500
 
 
@@ -219,9 +338,95 @@ def recommendation_status():
     """
     Check status of recommendation engine
     """
+    bundle = recommendation_engine.bundle
+    manifest = bundle.manifest if bundle is not None else {}
+    
+    return jsonify({
+        "models_loaded": bundle is not None,
+        "status": "ready" if bundle is not None else "not_ready",
+        "vocabulary_size": bundle.vocabulary_size if bundle is not None else 0,
+        "matrix_shape": bundle.tfidf_matrix.shape if bundle is not None else None,
+        "catalog_version": manifest.get("catalog_version"),
+        "built_at": manifest.get("built_at"),
+        "model_version": bundle.version if bundle is not None else None,
+        "scoring_mode": "lsa" if recommendation_engine.uses_lsa(bundle) else "sparse",
+        "ann_lists": bundle.ann.num_lists if bundle is not None and bundle.ann is not None else 0,
+        "fields": manifest.get("fields", []),
+        "field_weights": recommendation_engine.field_weights,
+        "loaded_at": bundle.loaded_at if bundle is not None else None,
+        "incremental": bundle.drift.as_dict() if bundle is not None else None,
+        "reload_in_progress": recommendation_engine.reload_in_progress,
+        "last_reload_error": recommendation_engine.last_reload_error,
+        "query_cache": recommendation_engine.query_cache.stats()
+    }), 200
+
+
+@recommend_routes.route("/field-weights", methods=["GET"])
+@jwt_required()
+def get_field_weights():
+    """
+    Current query-time field weights
+    
+    They only affect models built with per-field blocks
+    (`rebuild_models.py --fields`), listed under "fields".
+    """
+    bundle = recommendation_engine.bundle
+    manifest = bundle.manifest if bundle is not None else {}
+    if bundle is not None:
+        ensure_field_weights_current(bundle)
+    
+    return jsonify({
+        "fields": manifest.get("fields", []),
+        "field_weights": recommendation_engine.field_weights
+    }), 200
+
+
+@recommend_routes.route("/field-weights", methods=["PUT"])
+@jwt_required()
+def set_field_weights():
+    """
+    Change query-time field weights (no model rebuild needed)
+    Restricted to admin users only
+    
+    Applies at once on this worker; other workers pick the stored weights
+    up within FIELD_WEIGHTS_REFRESH_SECONDS.
+    
+    Expected JSON:
+    {
+        "name": 1.0,
+        "description": 1.0,
+        "skills": 2.0,
+        "organisation": 0.5
+    }
+    Fields left out keep their current weight.
+    """
+    global _field_weights_checked_at
+    user_id = get_jwt_identity()
+    
+    from bson import ObjectId
+    user = mongo.db.users.find_one({"_id": ObjectId(user_id)})
+    
+    if not user or user.get("role") != "admin":
+        return jsonify({"msg": "Admin access required"}), 403
+    
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not data:
+        return jsonify({"msg": "Expected a JSON object of field weights"}), 400
+    
+    try:
+        recommendation_engine.set_field_weights(data)
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+    
+    weights = recommendation_engine.field_weights
+    mongo.db.settings.update_one(
+        {"_id": FIELD_WEIGHTS_SETTING},
+        {"$set": {"weights": weights, "updated_at": datetime.utcnow(), "updated_by": user_id}},
+        upsert=True
+    )
+    _field_weights_checked_at = time.time()
+    
     return jsonify({
-        "models_loaded": recommendation_engine.is_loaded,
-        "status": "ready" if recommendation_engine.is_loaded else "not_ready",
-        "vocabulary_size": len(recommendation_engine.vectorizer.vocabulary_) if recommendation_engine.is_loaded else 0,
-        "matrix_shape": recommendation_engine.tfidf_matrix.shape if recommendation_engine.is_loaded else None
-    }), 200
\ No newline at end of file
+        "msg": "Field weights updated",
+        "field_weights": weights
+    }), 200
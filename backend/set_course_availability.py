@@ -5,6 +5,8 @@ Run this to mark which courses are offered this semester
 from pymongo import MongoClient
 from datetime import datetime
 
+from database.catalog import bump_catalog_version
+
 # Connect to MongoDB
 client = MongoClient('mongodb://localhost:27017/')
 db = client['fyp2']
@@ -60,6 +62,10 @@ result = db.courses.update_many(
 print(f"✓ Marked {result.modified_count} courses as available")
 print(f"  Semester: {CURRENT_SEMESTER}\n")
 
+# Running servers reload their catalog snapshot within seconds
+version = bump_catalog_version(db)
+print(f"✓ Catalog version bumped to {version}\n")
+
 # Show summary by level
 print("📊 Availability Summary by Level:")
 print("-" * 60)
@@ -0,0 +1,165 @@
+"""
+Registration-rush stress test for POST /enroll
+Seeds students and small-capacity courses in a throwaway database, then
+fires every student's enroll requests for every course (each twice, to
+race duplicate enrollments) plus random drops from a thread pool, all at
+once. Afterwards checks that:
+- no course holds more students than its capacity
+- every course's seat counter equals its enrollments
+- no student is over the credit hour limit and every credit hour
+  counter equals the student's enrollments
+- no student is enrolled twice in a course
+
+Needs a running MongoDB server (MONGO_URI, with the database name
+replaced by --database); the database is dropped at the end.
+
+Usage:
+    python stress_enrollment.py
+    python stress_enrollment.py --students 1000 --courses 20 --capacity 50 --workers 128
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from check_query_counts import test_database_uri
+from database.indexes import apply_indexes
+from database.seats import CREDIT_FIELD, MAX_CREDIT_HOURS, SEAT_FIELD
+
+CREDIT_HOURS = 3
+
+
+def seed(db, num_students, num_courses, capacity):
+    student_ids = db.users.insert_many([
+        {"name": f"Stress Student {i}", "email": f"stress{i}@example.com", "role": "student"}
+        for i in range(num_students)
+    ]).inserted_ids
+    course_ids = db.courses.insert_many([
+        {
+            "course_code": f"ST{i:04d}",
+            "course_name": f"Stress Course {i}",
+            "level": 1,
+            "credit_hours": CREDIT_HOURS,
+            "capacity": capacity,
+            "is_available": True
+        }
+        for i in range(num_courses)
+    ]).inserted_ids
+    return student_ids, course_ids
+
+
+def check(db, capacity):
+    """Invariant violations after the rush"""
+    failures = []
+    enrollments = list(db.enrollments.find({"status": "enrolled"}))
+
+    pairs = Counter((e["user_id"], e["course_id"]) for e in enrollments)
+    duplicates = sum(1 for n in pairs.values() if n > 1)
+    if duplicates:
+        failures.append(f"{duplicates} duplicate enrollments")
+
+    seats = Counter(e["course_id"] for e in enrollments)
+    for course in db.courses.find({}, {SEAT_FIELD: 1}):
+        held = seats.get(course["_id"], 0)
+        if held > capacity:
+            failures.append(f"course {course['_id']} overbooked: {held} > {capacity}")
+        if course.get(SEAT_FIELD, 0) != held:
+            failures.append(f"course {course['_id']} counter {course.get(SEAT_FIELD, 0)} != {held} enrollments")
+
+    hours = Counter()
+    for e in enrollments:
+        hours[e["user_id"]] += e.get("credit_hours", CREDIT_HOURS)
+    for user in db.users.find({}, {CREDIT_FIELD: 1}):
+        total = hours.get(user["_id"], 0)
+        if total > MAX_CREDIT_HOURS:
+            failures.append(f"student {user['_id']} over the limit: {total} credit hours")
+        if user.get(CREDIT_FIELD, 0) != total:
+            failures.append(f"student {user['_id']} counter {user.get(CREDIT_FIELD, 0)} != {total} credit hours")
+
+    return failures, len(enrollments)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent enrollment stress test")
+    parser.add_argument("--students", type=int, default=500)
+    parser.add_argument("--courses", type=int, default=10)
+    parser.add_argument("--capacity", type=int, default=100)
+    parser.add_argument("--drop-fraction", type=float, default=0.1,
+                        help="Drop requests to add, as a fraction of enroll requests")
+    parser.add_argument("--workers", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--database", default="scrs_stress_enrollment", help="Throwaway database name")
+    args = parser.parse_args()
+
+    from config.config import Config
+    Config.MONGO_URI = test_database_uri(Config.MONGO_URI or "mongodb://localhost:27017", args.database)
+    Config.JWT_SECRET_KEY = Config.JWT_SECRET_KEY or os.urandom(32).hex()
+
+    from flask_jwt_extended import create_access_token
+
+    from app import create_app
+    from database.mongo import mongo
+
+    app = create_app()
+    rng = random.Random(args.seed)
+
+    with app.app_context():
+        db = mongo.db
+        if db.name != args.database:
+            raise SystemExit(f"❌ Refusing to use database {db.name}")
+        mongo.cx.drop_database(args.database)
+        apply_indexes(db)
+
+        student_ids, course_ids = seed(db, args.students, args.courses, args.capacity)
+        tokens = {
+            student_id: f"Bearer {create_access_token(identity=str(student_id))}"
+            for student_id in student_ids
+        }
+
+    requests = [
+        ("POST", "/enroll", student_id, {"course_id": str(course_id)})
+        for student_id in student_ids for course_id in course_ids for _ in range(2)
+    ]
+    requests += [
+        ("DELETE", f"/enroll/{rng.choice(course_ids)}", rng.choice(student_ids), None)
+        for _ in range(int(len(requests) * args.drop_fraction))
+    ]
+    rng.shuffle(requests)
+
+    def send(request):
+        method, path, student_id, body = request
+        response = app.test_client().open(
+            path, method=method, headers={"Authorization": tokens[student_id]}, json=body
+        )
+        return method, response.status_code, (response.get_json() or {}).get("msg")
+
+    print(f"{len(requests)} requests from {args.students} students for {args.courses} courses "
+          f"x {args.capacity} seats on {args.workers} threads...")
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.workers) as pool:
+        outcomes = Counter(pool.map(send, requests))
+    elapsed = time.perf_counter() - start
+    print(f"Done in {elapsed:.2f} s ({len(requests) / elapsed:,.0f} requests/s)")
+    for (method, status, msg), n in sorted(outcomes.items(), key=lambda item: -item[1]):
+        print(f"  {n:>7}  {method:<6} {status} {msg}")
+
+    try:
+        with app.app_context():
+            failures, num_enrollments = check(mongo.db, args.capacity)
+    finally:
+        with app.app_context():
+            mongo.cx.drop_database(args.database)
+
+    print(f"{num_enrollments} enrollments held")
+    for failure in failures[:20]:
+        print(f"❌ {failure}")
+    if failures:
+        sys.exit(1)
+    print("✓ No overbooking, no duplicates, counters consistent")
+
+
+if __name__ == "__main__":
+    main()
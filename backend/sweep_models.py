@@ -0,0 +1,263 @@
+"""
+Hyperparameter sweep: TF-IDF vectorizer settings x adaptive-alpha schedules
+Cleans the course corpus once, shares it with a process pool, and for
+every vectorizer configuration fits a model in memory and scores
+leave-one-out cases under every alpha schedule with the engine's
+hybrid_recommend() and Precision/Recall/Hit Rate@K. Writes a ranked CSV
+report with wall-clock cost per configuration (fit time and per-request
+scoring time).
+
+Ground truth comes from ml/data: users.csv (interests) and feedback.csv.
+Each rating >= RELEVANCE_THRESHOLD becomes one case: that rating is held
+out, the collaborative scores use all the other feedback, the user's
+other rated courses are excluded, and the held-out course is the only
+relevant one.
+
+Usage:
+    python sweep_models.py
+    python sweep_models.py --workers 4 --rank-by recall@10 --top 20
+    python sweep_models.py --data-dir path/to/csvs --output sweep_report.csv
+"""
+import argparse
+import csv
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from ml.model_builder import VECTORIZER_OPTIONS, course_text, fit_vectorizer
+from ml.model_bundle import ModelBundle
+from ml.preprocessing import preprocess_many
+from ml.recommendation_engine import ALPHA_SCHEDULE, MIN_ALPHA, RecommendationEngine
+from ml.scoring import CosineScorer
+
+K_VALUES = [3, 5, 10]
+RELEVANCE_THRESHOLD = 4  # Rating >= 4 is considered relevant (as in ml/run_evaluation.py)
+
+# Values tried per vectorizer option; the rest of VECTORIZER_OPTIONS stays fixed
+VECTORIZER_GRID = {
+    "ngram_range": [(1, 1), (1, 2), (1, 3)],
+    "max_df": [0.5, 0.85, 1.0],
+    "min_df": [1, 2],
+    "sublinear_tf": [True, False]
+}
+
+# name -> (alpha_schedule, min_alpha), see RecommendationEngine.adaptive_alpha()
+ALPHA_SCHEDULES = {
+    "current": (ALPHA_SCHEDULE, MIN_ALPHA),
+    "content-only": ((), 1.0),
+    "flat-0.7": ((), 0.7),
+    "flat-0.5": ((), 0.5),
+    "early-collab": (((1, 0.9), (3, 0.6), (10, 0.4)), 0.2),
+    "late-collab": (((1, 0.95), (10, 0.85), (50, 0.7)), 0.5)
+}
+
+# Set in each pool worker by _init_worker()
+_shared = None
+
+
+def load_cases(data_dir):
+    """
+    Course corpus and leave-one-out cases from the ml/data CSVs
+
+    Returns:
+        tuple: (course_codes, documents, cases); each case is a dict with
+        query, feedback (the other feedback rows), num_feedback, exclude
+        and relevant
+    """
+    with open(os.path.join(data_dir, "courses.csv"), encoding="utf-8") as f:
+        courses = [
+            {
+                "course_code": row["course_code"],
+                "course_name": row["course_name"],
+                "description": row["description"],
+                "skills": row["skills"].split(",")
+            }
+            for row in csv.DictReader(f)
+        ]
+
+    with open(os.path.join(data_dir, "users.csv"), encoding="utf-8") as f:
+        interests = {row["user_id"]: row["interests"].replace(",", " ") for row in csv.DictReader(f)}
+
+    with open(os.path.join(data_dir, "feedback.csv"), encoding="utf-8") as f:
+        feedback = [
+            {"user_id": row["user_id"], "course_code": row["course_code"], "rating": int(row["rating"])}
+            for row in csv.DictReader(f)
+        ]
+
+    cases = []
+    for i, held_out in enumerate(feedback):
+        user_id = held_out["user_id"]
+        if held_out["rating"] < RELEVANCE_THRESHOLD or user_id not in interests:
+            continue
+
+        others = feedback[:i] + feedback[i + 1:]
+        rated = [fb["course_code"] for fb in others if fb["user_id"] == user_id]
+        cases.append({
+            "query": interests[user_id],
+            "feedback": others,
+            "num_feedback": len(rated),
+            "exclude": rated,
+            "relevant": [held_out["course_code"]]
+        })
+
+    return [course["course_code"] for course in courses], [course_text(c) for c in courses], cases
+
+
+def vectorizer_configs():
+    """Every combination of VECTORIZER_GRID values, as option overrides"""
+    names = list(VECTORIZER_GRID)
+    return [dict(zip(names, values)) for values in itertools.product(*VECTORIZER_GRID.values())]
+
+
+def _init_worker(shared):
+    global _shared
+    _shared = shared
+
+
+def evaluate_config(options):
+    """
+    Fit one vectorizer configuration and score every case under every
+    alpha schedule (runs in a pool worker)
+
+    Returns:
+        list of report rows, one per alpha schedule (a single row with an
+        "error" key if the configuration cannot be fitted)
+    """
+    course_codes, cleaned_corpus, cases = _shared
+
+    start = time.perf_counter()
+    try:
+        vectorizer, tfidf_matrix = fit_vectorizer(cleaned_corpus, options=options)
+    except ValueError as e:
+        return [{"options": options, "error": str(e)}]
+    scorer = CosineScorer(tfidf_matrix)
+    fit_seconds = time.perf_counter() - start
+
+    bundle = ModelBundle(
+        "sweep", vectorizer, tfidf_matrix, scorer, {"course_codes": course_codes}, "memory"
+    )
+    # No query cache: every request pays full scoring cost, as on a cold server
+    engine = RecommendationEngine(query_cache_size=0)
+
+    rows = []
+    for name, (schedule, min_alpha) in ALPHA_SCHEDULES.items():
+        metrics = {f"{metric}@{k}": [] for k in K_VALUES for metric in ("precision", "recall", "hit_rate")}
+        scoring_seconds = 0.0
+
+        for case in cases:
+            alpha = engine.adaptive_alpha(case["num_feedback"], schedule, min_alpha)
+
+            start = time.perf_counter()
+            final_scores, _, _, _ = engine.hybrid_recommend(
+                case["query"], feedback_docs=case["feedback"], alpha=alpha, bundle=bundle
+            )
+            mask = engine.candidate_mask(case["exclude"], bundle=bundle)
+            recommended = [
+                code for code, _ in
+                engine.get_top_recommendations(final_scores, top_k=max(K_VALUES), mask=mask, bundle=bundle)
+            ]
+            scoring_seconds += time.perf_counter() - start
+
+            for k in K_VALUES:
+                metrics[f"precision@{k}"].append(engine.precision_at_k(recommended, case["relevant"], k))
+                metrics[f"recall@{k}"].append(engine.recall_at_k(recommended, case["relevant"], k))
+                metrics[f"hit_rate@{k}"].append(engine.hit_rate_at_k(recommended, case["relevant"], k))
+
+        rows.append({
+            "options": options,
+            "alpha_schedule": name,
+            "vocabulary_size": bundle.vocabulary_size,
+            "fit_seconds": fit_seconds,
+            "ms_per_request": scoring_seconds * 1000 / max(len(cases), 1),
+            "wall_seconds": fit_seconds + scoring_seconds,
+            **{metric: float(np.mean(values)) if values else 0.0 for metric, values in metrics.items()}
+        })
+
+    return rows
+
+
+def write_report(rows, path):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    fields = ["rank", *VECTORIZER_GRID, "alpha_schedule", "vocabulary_size", "fit_seconds",
+              "ms_per_request", "wall_seconds",
+              *(f"{metric}@{k}" for k in K_VALUES for metric in ("precision", "recall", "hit_rate"))]
+
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        for rank, row in enumerate(rows, 1):
+            writer.writerow({
+                "rank": rank,
+                **{name: row["options"][name] for name in VECTORIZER_GRID},
+                **{field: round(row[field], 4) if isinstance(row[field], float) else row[field]
+                   for field in fields if field in row}
+            })
+
+
+def main():
+    metric_names = [f"{metric}@{k}" for k in K_VALUES for metric in ("precision", "recall", "hit_rate")]
+
+    parser = argparse.ArgumentParser(description="Sweep TF-IDF settings and alpha schedules")
+    parser.add_argument("--data-dir", default="ml/data", help="Folder with courses/users/feedback CSVs")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--rank-by", default="hit_rate@5", choices=metric_names,
+                        help="Metric to rank by (ties go to the cheaper configuration)")
+    parser.add_argument("--output", default="ml/artifacts/sweep_report.csv")
+    parser.add_argument("--top", type=int, default=10, help="Rows to print")
+    args = parser.parse_args()
+
+    course_codes, documents, cases = load_cases(args.data_dir)
+    if not cases:
+        raise SystemExit(f"❌ No feedback rated >= {RELEVANCE_THRESHOLD} in {args.data_dir}")
+
+    # Clean once; every configuration refits from the same cleaned corpus
+    start = time.perf_counter()
+    shared = (course_codes, preprocess_many(documents), cases)
+    print(f"Cleaned {len(documents)} courses in {time.perf_counter() - start:.2f} s; {len(cases)} cases")
+
+    configs = vectorizer_configs()
+    print(f"Sweeping {len(configs)} vectorizer configs x {len(ALPHA_SCHEDULES)} alpha schedules "
+          f"on {args.workers} workers...")
+
+    start = time.perf_counter()
+    if args.workers > 1:
+        with ProcessPoolExecutor(args.workers, initializer=_init_worker, initargs=(shared,)) as pool:
+            results = list(pool.map(evaluate_config, configs))
+    else:
+        _init_worker(shared)
+        results = [evaluate_config(options) for options in configs]
+    elapsed = time.perf_counter() - start
+
+    rows = [row for config_rows in results for row in config_rows if "error" not in row]
+    for config_rows in results:
+        if "error" in config_rows[0]:
+            print(f"  skipped {config_rows[0]['options']}: {config_rows[0]['error']}")
+
+    rows.sort(key=lambda row: (-row[args.rank_by], row["wall_seconds"]))
+    write_report(rows, args.output)
+
+    print(f"Done in {elapsed:.2f} s ({sum(row['wall_seconds'] for row in rows):.2f} s of fitting + scoring)")
+    print(f"\nTop {min(args.top, len(rows))} by {args.rank_by}:")
+    for rank, row in enumerate(rows[:args.top], 1):
+        options = ", ".join(f"{name}={row['options'][name]}" for name in VECTORIZER_GRID)
+        print(f"  {rank:>3}. {row[args.rank_by]:.3f}  {options}, alpha={row['alpha_schedule']}  "
+              f"(fit {row['fit_seconds'] * 1000:.1f} ms, {row['ms_per_request']:.2f} ms/request)")
+
+    current = next(
+        (rank for rank, row in enumerate(rows, 1)
+         if row["alpha_schedule"] == "current"
+         and all(row["options"][name] == VECTORIZER_OPTIONS[name] for name in VECTORIZER_GRID)),
+        None
+    )
+    print(f"\nCurrent settings rank {current} of {len(rows)}")
+    print(f"✓ Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
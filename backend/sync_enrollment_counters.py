@@ -0,0 +1,31 @@
+"""
+Rebuild the seat and credit hour counters from the enrollments and
+create the indexes (including the unique enrollment index)
+POST /enroll claims seats from each course's enrolled_count and credit
+hours from each user's enrolled_credit_hours. Missing counters are
+initialized on their first claim; run this after any script or import
+that writes enrollments directly (which leaves existing counters stale)
+and after upgrading, to create the indexes. Run it while enrollment is
+closed.
+
+Usage:
+    python sync_enrollment_counters.py
+"""
+from pymongo import MongoClient
+
+from database.indexes import apply_indexes
+from database.seats import recount_enrollment_counters
+
+# Connect to MongoDB
+client = MongoClient('mongodb://localhost:27017/')
+db = client['fyp2']
+
+print("🔢 Recounting enrollment counters...")
+courses, users = recount_enrollment_counters(db)
+print(f"✓ Updated seat counts of {courses} courses and credit hour totals of {users} users")
+
+failures = apply_indexes(db)
+for collection, name, error in failures:
+    print(f"❌ Index {collection}.{name} not created: {error}")
+if not failures:
+    print("✓ Indexes in place")
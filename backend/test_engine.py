@@ -25,19 +25,15 @@ if success:
         print(f"   Generated {len(scores)} scores")
         print(f"   Score range: [{scores.min():.3f}, {scores.max():.3f}]")
         
-        # Get top 5 courses
+        # Get top 5 courses (scores follow the model's row order)
         client = MongoClient('mongodb://localhost:27017/')
         db = client['fyp2']
-        courses = list(db.courses.find({}))
-        
-        # Sort by score
-        course_scores = [(courses[i]['course_code'], courses[i]['course_name'], scores[i]) 
-                        for i in range(len(courses))]
-        course_scores.sort(key=lambda x: x[2], reverse=True)
+        names = {c['course_code']: c.get('course_name', '') for c in db.courses.find({})}
         
+        # Top 5 straight from the inverted index
         print("\n🎯 Top 5 recommended courses:")
-        for code, name, score in course_scores[:5]:
-            print(f"   {code}: {name} (score: {score:.3f})")
+        for code, score in engine.content_top_k(test_query, top_k=5):
+            print(f"   {code}: {names.get(code, '')} (score: {score:.3f})")
             
     except Exception as e:
         print(f"❌ Error testing recommendation: {e}")